@@ -1,31 +1,212 @@
 from dotenv import load_dotenv
+import hmac
 import os
 import requests
 import datetime
+import time
 
-from flask import Flask, jsonify, make_response, Response, request
+from flask import Flask, g, jsonify, make_response, Response, request, stream_with_context
+from flask.logging import default_handler
+from werkzeug.exceptions import Forbidden, Unauthorized
 # from flask_cors import CORS
 
+from meal_max.models.favorite_location_model import FavoriteLocation
 from meal_max.models.user_model import User
 from meal_max.models import weather_model
-from meal_max.db import db
-from config import TestConfig
+from meal_max.models.weather_refresher import WeatherRefresher
+from meal_max.db import configure_sqlite_pragmas, db
+from meal_max.utils import bulk_io, encoding, http_cache, metrics, projection
+from meal_max.utils.encoding import FastJSONProvider
+from meal_max.utils.logger import configure_logger
+from config import get_config
 
 
 
 # Load environment variables from .env file
 load_dotenv()
 
-def create_app(config_class=TestConfig):
+HTTP_REQUEST_SECONDS = metrics.registry.histogram(
+    'http_request_duration_seconds', 'Request latency by route and status.', ('method', 'route', 'status'))
+RESPONSE_ENCODE_SECONDS = metrics.registry.histogram(
+    'response_encode_duration_seconds', 'Time spent serializing and compressing response bodies.', ('step',))
+
+def create_app(config_class=None):
     app = Flask(__name__)
-    app.config.from_object(config_class)
+    app.json = FastJSONProvider(app)  # orjson-backed when installed
+    # Route logs through the shared (optionally queued, JSON) handler instead of Flask's own
+    app.logger.removeHandler(default_handler)
+    configure_logger(app.logger)
+    # Without an explicit class, the APP_CONFIG environment variable picks one
+    app.config.from_object(config_class or get_config())
+    if not app.config.get('SECRET_KEY'):
+        # A per-process random key would invalidate session tokens across workers and restarts
+        if not app.testing:
+            raise ValueError('SECRET_KEY must be set; every worker needs the same key to verify session tokens')
+        app.config['SECRET_KEY'] = os.urandom(32).hex()
 
     db.init_app(app)  # Initialize db with app
     with app.app_context():
-        db.create_all()  # Recreate all tables
+        if db.engine.dialect.name == 'sqlite' and app.config.get('SQLITE_PRAGMAS'):
+            configure_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+        db.create_all()  # Create any missing tables
+
+    # Pre-warm the weather cache for every distinct favorite location in the background
+    if app.config.get('WEATHER_REFRESH_INTERVAL') and not app.testing:
+        refresher = WeatherRefresher.from_config(app)
+        app.extensions['weather_refresher'] = refresher
+        refresher.start()
 
     user_model = User()
 
+    def resolve_username():
+        """
+        Resolves the caller's username for a weather request.
+
+        A signed session token in an ``Authorization: Bearer`` header takes
+        precedence and is verified without a database lookup. Otherwise the
+        ``username`` query parameter is used.
+
+        Returns:
+            The username of the caller.
+
+        Raises:
+            Unauthorized: If a bearer token is present but invalid or expired.
+        """
+        auth_header = request.headers.get("Authorization", "")
+        if auth_header.startswith("Bearer "):
+            try:
+                return user_model.verify_session_token(auth_header[len("Bearer "):].strip())
+            except ValueError as e:
+                raise Unauthorized(str(e))
+        return request.args.get("username")
+
+    def require_admin() -> None:
+        """
+        Checks the admin token that guards the bulk routes.
+
+        Raises:
+            Forbidden: If no BULK_ADMIN_TOKEN is configured, which disables the routes.
+            Unauthorized: If the X-Admin-Token header is missing or does not match.
+        """
+        expected = app.config.get('BULK_ADMIN_TOKEN')
+        if not expected:
+            raise Forbidden('Bulk routes are disabled; set BULK_ADMIN_TOKEN to enable them')
+        supplied = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(supplied.encode(), expected.encode()):
+            raise Unauthorized('A valid X-Admin-Token header is required')
+
+    def weather_response(data: dict, section: str, endpoint: str) -> Response:
+        """
+        Builds a cacheable response for a weather fetcher's result.
+
+        A ``fields`` query parameter of comma-separated dotted paths prunes
+        the upstream payload, and clients that prefer MessagePack in their
+        Accept header get it instead of JSON. The ETag is derived from the
+        (pruned) payload, so it only changes when OpenWeather reports new
+        data, and Cache-Control's max-age is the time left before the cached
+        payload expires. A request whose If-None-Match or If-Modified-Since
+        still matches gets an empty 304.
+
+        Args:
+            data (dict): The fetcher's result, with ``age`` and ``stale`` markers.
+            section (str): The key holding the upstream payload.
+            endpoint (str): The upstream endpoint name, used to pick the TTL.
+
+        Returns:
+            The 200 or 304 response, or a 400 if ``fields`` is malformed.
+        """
+        try:
+            fields = projection.parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        if fields is not None:
+            data = {**data, section: projection.project(data[section], fields)}
+
+        etag = http_cache.payload_etag(data['location'], data[section])
+        if encoding.wants_msgpack(request.headers.get('Accept')):
+            with RESPONSE_ENCODE_SECONDS.time(('msgpack',)):
+                response = app.response_class(encoding.pack(data), mimetype=encoding.MSGPACK_MIMETYPE)
+            etag += '-msgpack'
+        else:
+            with RESPONSE_ENCODE_SECONDS.time(('json',)):
+                response = make_response(jsonify(data), 200)
+        response.set_etag(etag, weak=True)
+        response.headers['Last-Modified'] = http_cache.last_modified(data['age'])
+        response.headers['Cache-Control'] = http_cache.cache_control(
+            weather_model.CACHE_TTLS[endpoint], data['age'], data['stale'],
+            private='Authorization' in request.headers,
+            stale_while_revalidate=weather_model.STALE_WHILE_REVALIDATE,
+            stale_if_error=weather_model.STALE_IF_ERROR,
+        )
+        response.vary.update(('Authorization', 'Accept'))
+        return response.make_conditional(request)
+
+    def weather_error_response(e: Exception) -> Response:
+        """
+        Builds the error response for a failed weather fetch.
+
+        An exhausted upstream quota, ours or OpenWeather's, becomes a 503
+        with Retry-After and an upstream timeout a 504, instead of an
+        opaque 500.
+
+        Args:
+            e (Exception): The error raised by the fetcher.
+
+        Returns:
+            The JSON error response.
+        """
+        status, retry_after = weather_model.upstream_error_status(e)
+        app.logger.error("Weather request failed with %d: %s", status, str(e))
+        response = make_response(jsonify({'error': str(e)}), status)
+        if retry_after is not None:
+            response.headers['Retry-After'] = str(retry_after)
+        return response
+
+    @app.before_request
+    def start_timer() -> None:
+        g.request_started = time.perf_counter()
+
+    # Registered before compress_response so that it runs after it
+    @app.after_request
+    def record_latency(response: Response) -> Response:
+        """Observes the request's latency, labelled by route template rather than raw path."""
+        started = g.pop('request_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                         (request.method, route, str(response.status_code)))
+        return response
+
+    @app.after_request
+    def compress_response(response: Response) -> Response:
+        """
+        Compresses buffered JSON, CSV and MessagePack bodies the client accepts.
+
+        Streamed responses, small bodies and bodies without content are sent
+        as they are.
+        """
+        content_coding = encoding.choose_encoding(request.headers.get('Accept-Encoding'))
+        if (content_coding is None or response.direct_passthrough or response.is_streamed
+                or response.status_code in (204, 304) or 'Content-Encoding' in response.headers
+                or response.mimetype not in encoding.COMPRESSIBLE_MIMETYPES):
+            return response
+        body = response.get_data()
+        if len(body) < encoding.MIN_COMPRESS_SIZE:
+            return response
+        with RESPONSE_ENCODE_SECONDS.time((content_coding,)):
+            response.set_data(encoding.compress(body, content_coding))
+        response.headers['Content-Encoding'] = content_coding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    @app.errorhandler(Unauthorized)
+    def handle_unauthorized(e) -> Response:
+        return make_response(jsonify({'error': e.description}), 401)
+
+    @app.errorhandler(Forbidden)
+    def handle_forbidden(e) -> Response:
+        return make_response(jsonify({'error': e.description}), 403)
+
 
 ####################################################
 #
@@ -40,10 +221,24 @@ def create_app(config_class=TestConfig):
         Health check route to verify the service is running.
 
         Returns:
-            JSON response indicating the health status of the service.
+            JSON response indicating the health status of the service, along
+            with cache and request-coalescing counters for the upstream API.
         """
         app.logger.info('Health check')
-        return make_response(jsonify({'status': 'healthy'}), 200)
+        body = {'status': 'healthy', 'upstream': weather_model.upstream_stats()}
+        if 'weather_refresher' in app.extensions:
+            body['refresher'] = app.extensions['weather_refresher'].stats()
+        return make_response(jsonify(body), 200)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics_route() -> Response:
+        """
+        Exposes latency histograms and cache, quota and circuit gauges for Prometheus.
+
+        Returns:
+            The metrics in the Prometheus text exposition format.
+        """
+        return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
 
 
     ##########################################################
@@ -136,7 +331,9 @@ def create_app(config_class=TestConfig):
             - password (str): The password for the account.
 
         Returns:
-            JSON response indicating the success of the login.
+            JSON response indicating the success of the login. On success it
+            includes a signed session ``token`` that later requests can send
+            as ``Authorization: Bearer <token>`` instead of a username.
         Raises:
             400 error if input validation fails.
             500 error if there is an issue with the login.
@@ -159,7 +356,8 @@ def create_app(config_class=TestConfig):
 
             if success:
                 app.logger.info("Login successful for account: %s", username)
-                return make_response(jsonify({'status': 'login successful', 'username': username}), 200)
+                token = user_model.issue_session_token(username)
+                return make_response(jsonify({'status': 'login successful', 'username': username, 'token': token}), 200)
             else:
                 app.logger.info("Login failed for account: %s", username)
                 return make_response(jsonify({'error': 'login failed'}), 401)
@@ -167,6 +365,105 @@ def create_app(config_class=TestConfig):
             app.logger.error("Failed to login: %s", str(e))
             return make_response(jsonify({'error': str(e)}), 500)
         
+    ##########################################################
+    #
+    # Bulk Import / Export
+    #
+    ##########################################################
+
+    @app.route('/api/bulk/create-accounts', methods=['POST'])
+    def bulk_create_accounts_route() -> Response:
+        """
+        Route to create many accounts from a streamed upload.
+
+        Expected Input:
+            A newline-delimited JSON body (one {"username", "password"} object
+            per line) or, with a text/csv Content-Type or ?format=csv, a CSV
+            body with username and password columns.
+
+        Returns:
+            JSON response with the number of accounts created and the
+            per-row errors for rows that were skipped.
+        Raises:
+            400 error if the format is not supported.
+            401 error if the X-Admin-Token header is missing or wrong.
+            403 error if no admin token is configured.
+            500 error if there is an issue writing to the database.
+        """
+        require_admin()
+        app.logger.info('Bulk creating accounts')
+        try:
+            fmt = bulk_io.detect_format(request.content_type, request.args.get('format'))
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        try:
+            report = user_model.bulk_create_accounts(bulk_io.read_rows(request.stream, fmt))
+            app.logger.info("Bulk account import: %d created, %d errors", report['created'], len(report['errors']))
+            return make_response(jsonify({'status': 'accounts imported', **report}), 200)
+        except Exception as e:
+            app.logger.error("Failed to bulk create accounts: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/bulk/set-favorites', methods=['POST'])
+    def bulk_set_favorites_route() -> Response:
+        """
+        Route to set favorite locations for many users from a streamed upload.
+
+        Expected Input:
+            Newline-delimited JSON or CSV rows with username, city_name,
+            latitude and longitude, in the format written by
+            /api/bulk/export-favorites.
+
+        Returns:
+            JSON response with the number of favorites updated and the
+            per-row errors for rows that were skipped.
+        Raises:
+            400 error if the format is not supported.
+            401 error if the X-Admin-Token header is missing or wrong.
+            403 error if no admin token is configured.
+            500 error if there is an issue writing to the database.
+        """
+        require_admin()
+        app.logger.info('Bulk setting favorite locations')
+        try:
+            fmt = bulk_io.detect_format(request.content_type, request.args.get('format'))
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        try:
+            report = user_model.bulk_set_favorites(bulk_io.read_rows(request.stream, fmt))
+            app.logger.info("Bulk favorite import: %d updated, %d errors", report['updated'], len(report['errors']))
+            return make_response(jsonify({'status': 'favorites imported', **report}), 200)
+        except Exception as e:
+            app.logger.error("Failed to bulk set favorites: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/bulk/export-favorites', methods=['GET'])
+    def export_favorites_route() -> Response:
+        """
+        Route to stream every user's favorite location.
+
+        Query Parameters:
+            - format (str, optional): "ndjson" (default) or "csv".
+
+        Returns:
+            A streamed NDJSON or CSV body with username, city_name, latitude
+            and longitude for each user.
+        Raises:
+            400 error if the format is not supported.
+            401 error if the X-Admin-Token header is missing or wrong.
+            403 error if no admin token is configured.
+        """
+        require_admin()
+        app.logger.info('Exporting favorite locations')
+        try:
+            fmt = bulk_io.detect_format(None, request.args.get('format'))
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        fieldnames = ['username', 'city_name', 'latitude', 'longitude']
+        chunks = bulk_io.write_rows(user_model.export_favorites(), fmt, fieldnames)
+        mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        return Response(stream_with_context(chunks), mimetype=mimetype)
+
     ##########################################################
     #
     # Favorite Location Management
@@ -215,6 +512,87 @@ def create_app(config_class=TestConfig):
             app.logger.error("Failed to set favorite location: %s", str(e))
             return make_response(jsonify({'error': str(e)}), 500)
 
+    @app.route('/api/favorite-locations', methods=['POST'])
+    def add_favorite_location_route() -> Response:
+        """
+        Route to add a location to a user's list of favorite locations.
+
+        Expected JSON Input:
+            - username (str): The username of the user.
+            - city_name (str): The name of the location.
+            - latitude (float): The latitude of the location.
+            - longitude (float): The longitude of the location.
+
+        Returns:
+            JSON response with the new location's position.
+
+        Raises:
+            400 error if input validation fails, the user is not found or
+                already has the maximum number of locations.
+            500 error if there is an issue adding the location.
+        """
+        data = request.get_json(silent=True) or {}
+        username = data.get('username')
+        city_name = data.get('city_name')
+        latitude = data.get('latitude')
+        longitude = data.get('longitude')
+        if not username or not city_name or latitude is None or longitude is None:
+            return make_response(jsonify({'error': 'Invalid input, all fields are required'}), 400)
+        try:
+            position = FavoriteLocation.add_location(str(username), city_name, float(latitude), float(longitude))
+            return make_response(jsonify({'status': 'favorite location added', 'username': username,
+                                          'city_name': city_name, 'position': position}), 201)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error("Failed to add favorite location: %s", str(e))
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/favorite-locations', methods=['GET'])
+    def list_favorite_locations_route() -> Response:
+        """
+        Route to list a user's favorite locations.
+
+        Query Parameters:
+            - username (str): The username of the user.
+
+        Returns:
+            JSON response with the locations in position order.
+
+        Raises:
+            400 error if the user is not found.
+        """
+        username = resolve_username()
+        try:
+            locations = FavoriteLocation.get_locations(str(username))
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        return make_response(jsonify({'username': username, 'locations': [
+            {'position': position, 'city_name': name, 'latitude': lat, 'longitude': lon}
+            for name, lat, lon, position in locations
+        ]}), 200)
+
+    @app.route('/api/favorite-locations/<int:position>', methods=['DELETE'])
+    def remove_favorite_location_route(position: int) -> Response:
+        """
+        Route to remove one of a user's favorite locations.
+
+        Query Parameters:
+            - username (str): The username of the user.
+
+        Returns:
+            JSON response indicating the success of the operation.
+
+        Raises:
+            404 error if the user or location is not found.
+        """
+        username = resolve_username()
+        try:
+            FavoriteLocation.remove_location(str(username), position)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 404)
+        return make_response(jsonify({'status': 'favorite location removed', 'position': position}), 200)
+
 
     @app.route('/api/current-weather', methods=['GET'])
     def fetch_current_weather_route():
@@ -223,16 +601,18 @@ def create_app(config_class=TestConfig):
 
         Returns:
             JSON response containing the current weather data.
+            A 304 with no body if the client's cached copy is still current.
 
         Raises:
+            503 error if the upstream quota is exhausted.
             500 error if there is an issue fetching the weather data.
         """
-        username = request.args.get("username")
+        username = resolve_username()
         try:
             current_weather_data = weather_model.fetch_current_weather(str(username))
-            return make_response(jsonify(current_weather_data), 200)
+            return weather_response(current_weather_data, 'current_weather', 'weather')
         except Exception as e:
-            return make_response(jsonify({'error': str(e)}), 500)
+            return weather_error_response(e)
         
     @app.route('/api/forecast', methods=['GET'])
     def fetch_forecast_route():
@@ -241,38 +621,101 @@ def create_app(config_class=TestConfig):
 
         Returns:
             JSON response containing the weather forecast data.
+            A 304 with no body if the client's cached copy is still current.
 
         Raises:
+            503 error if the upstream quota is exhausted.
             500 error if there is an issue fetching the forecast data.
         """
-        username = request.args.get("username")
+        username = resolve_username()
         try:
             forecast_data = weather_model.fetch_forecast(str(username))
-            return make_response(jsonify(forecast_data), 200)
+            return weather_response(forecast_data, 'forecast', 'onecall')
         except Exception as e:
-            return make_response(jsonify({'error': str(e)}), 500)
+            return weather_error_response(e)
 
     @app.route('/api/historical-weather', methods=['GET'])
     def fetch_historical_weather_route():
         """
         route to fetch historical weather data for the user's favorite location.
 
+        Query Parameters:
+            - username (str): The username of the user.
+            - date (str): A single date in YYYY-MM-DD format, or
+            - start, end (str): An inclusive date range in YYYY-MM-DD format.
+
         Returns:
-            JSON response containing the historical weather data.
+            JSON response containing the historical weather data for a single
+            date. For a range, a newline-delimited JSON stream with one entry
+            per day, in date order.
 
         Raises:
-            400 error if the date parameter is missing.
+            400 error if the date parameters are missing or invalid.
+            503 error if the upstream quota is exhausted.
             500 error if there is an issue fetching the historical weather data.
         """
-        username = request.args.get("username")
+        username = resolve_username()
         query_date = request.args.get("date")
+        start_date = request.args.get("start")
+        end_date = request.args.get("end")
+        if start_date or end_date:
+            if not (start_date and end_date):
+                return make_response(jsonify({"error": "Both start and end parameters are required"}), 400)
+            try:
+                days = weather_model.fetch_historical_weather_range(str(username), start_date, end_date)
+            except ValueError as e:
+                return make_response(jsonify({'error': str(e)}), 400)
+            except Exception as e:
+                return weather_error_response(e)
+            lines = (app.json.dumps(day) + "\n" for day in days)
+            return Response(stream_with_context(lines), mimetype="application/x-ndjson")
         if not query_date:
             return make_response(jsonify({"error": "Date parameter is required"}), 400)
         try:
             historical_weather_data = weather_model.fetch_historical_weather(str(username), query_date)
             return make_response(jsonify(historical_weather_data), 200)
         except Exception as e:
-            return make_response(jsonify({'error': str(e)}), 500)
+            return weather_error_response(e)
+
+    @app.route('/api/historical-weather/statistics', methods=['GET'])
+    def fetch_historical_statistics_route():
+        """
+        Route to summarize historical weather over a date range for the user's favorite location.
+
+        Query Parameters:
+            - username (str): The username of the user.
+            - start, end (str): An inclusive date range in YYYY-MM-DD format.
+            - percentiles (str, optional): Comma-separated percentiles of daily mean temperature (default 10,25,50,75,90).
+            - window (int, optional): Days in the rolling windows (default 7).
+            - base (float, optional): Degree-day base temperature in degrees Celsius (default 18).
+
+        Returns:
+            JSON response containing temperature, precipitation, degree-day
+            and rolling-window statistics for the range.
+
+        Raises:
+            400 error if the parameters are missing or invalid.
+            503 error if the upstream quota is exhausted.
+            500 error if there is an issue fetching the historical weather data.
+        """
+        username = resolve_username()
+        start_date = request.args.get("start")
+        end_date = request.args.get("end")
+        if not (start_date and end_date):
+            return make_response(jsonify({"error": "Both start and end parameters are required"}), 400)
+        try:
+            percentiles = request.args.get("percentiles")
+            statistics = weather_model.fetch_historical_statistics(
+                str(username), start_date, end_date,
+                percentiles=[float(value) for value in percentiles.split(",")] if percentiles else None,
+                window=int(request.args["window"]) if "window" in request.args else None,
+                base_temperature=float(request.args["base"]) if "base" in request.args else None,
+            )
+            return make_response(jsonify(statistics), 200)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            return weather_error_response(e)
 
     @app.route('/api/air-quality', methods=['GET'])
     def fetch_air_quality_route():
@@ -281,16 +724,18 @@ def create_app(config_class=TestConfig):
 
         Returns:
             JSON response containing the air quality data.
+            A 304 with no body if the client's cached copy is still current.
 
         Raises:
+            503 error if the upstream quota is exhausted.
             500 error if there is an issue fetching the air quality data.
         """
-        username = request.args.get("username")
+        username = resolve_username()
         try:
             air_quality_data = weather_model.fetch_air_quality(username)
-            return make_response(jsonify(air_quality_data), 200)
+            return weather_response(air_quality_data, 'air_quality', 'air_pollution')
         except Exception as e:
-            return make_response(jsonify({'error': str(e)}), 500)
+            return weather_error_response(e)
         
     @app.route('/api/weather-overview', methods=['GET'])
     def fetch_weather_overview_route():
@@ -299,16 +744,71 @@ def create_app(config_class=TestConfig):
 
         Returns:
             JSON response containing the weather overview data.
+            A 304 with no body if the client's cached copy is still current.
 
         Raises:
+            503 error if the upstream quota is exhausted.
             500 error if there is an issue fetching the weather data.
         """
-        username = request.args.get("username")
+        username = resolve_username()
         try:
             weather_overview_data = weather_model.fetch_weather_overview(str(username))
-            return make_response(jsonify(weather_overview_data), 200)
+            return weather_response(weather_overview_data, 'weather_overview', 'overview')
         except Exception as e:
-            return make_response(jsonify({'error': str(e)}), 500)
+            return weather_error_response(e)
+
+    @app.route('/api/dashboard', methods=['GET'])
+    def fetch_dashboard_route():
+        """
+        Route to fetch current weather, forecast and air quality for the user's
+        favorite location in a single request.
+
+        Query Parameters:
+            - username (str): The username of the user.
+            - sections (str, optional): Comma-separated sections to include
+              (current_weather, forecast, air_quality, weather_overview).
+
+        Returns:
+            JSON response containing every requested section, plus an
+            ``errors`` object naming any section that failed.
+
+        Raises:
+            400 error if an unknown section is requested.
+            500 error if the favorite location cannot be resolved.
+        """
+        username = resolve_username()
+        sections = request.args.get("sections")
+        sections = [name.strip() for name in sections.split(",") if name.strip()] if sections else None
+        unknown = [name for name in sections or [] if name not in weather_model.DASHBOARD_SECTIONS]
+        if unknown:
+            return make_response(jsonify({"error": f"Unknown sections: {', '.join(unknown)}"}), 400)
+        try:
+            dashboard_data = weather_model.fetch_dashboard(str(username), sections)
+            return make_response(jsonify(dashboard_data), 200)
+        except Exception as e:
+            return weather_error_response(e)
+
+    @app.route('/api/favorite-locations/weather', methods=['GET'])
+    def fetch_locations_weather_route():
+        """
+        Route to fetch current weather for all of a user's favorite locations at once.
+
+        Query Parameters:
+            - username (str): The username of the user.
+
+        Returns:
+            JSON response with one entry per location, each holding its
+            current weather or an ``error``.
+
+        Raises:
+            500 error if the user is not found or the locations cannot be loaded.
+        """
+        username = resolve_username()
+        try:
+            locations_weather = weather_model.fetch_locations_weather(str(username))
+            return make_response(jsonify(locations_weather), 200)
+        except Exception as e:
+            return weather_error_response(e)
 
     return app
 if __name__ == '__main__':
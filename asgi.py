@@ -0,0 +1,208 @@
+"""
+ASGI serving mode.
+
+The weather routes are served by async handlers that await the upstream
+OpenWeather calls on a non-blocking HTTP client, so one process can hold
+thousands of weather requests in flight. Every other route, and the
+streamed historical date ranges, fall through to the regular Flask app.
+
+Run with:
+    uvicorn asgi:create_asgi_app --factory --host 0.0.0.0 --port 5050
+"""
+import time
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import HTTP_REQUEST_SECONDS, create_app
+from meal_max.models import weather_model
+from meal_max.models.user_model import User
+from meal_max.utils import encoding, http_cache, projection
+
+
+async def current_weather(username, query):
+    return await weather_model.fetch_current_weather_async(str(username))
+
+async def forecast(username, query):
+    return await weather_model.fetch_forecast_async(str(username))
+
+async def air_quality(username, query):
+    return await weather_model.fetch_air_quality_async(str(username))
+
+async def weather_overview(username, query):
+    return await weather_model.fetch_weather_overview_async(str(username))
+
+async def historical_weather(username, query):
+    return await weather_model.fetch_historical_weather_async(str(username), query["date"])
+
+async def dashboard(username, query):
+    sections = query.get("sections")
+    sections = [name.strip() for name in sections.split(",") if name.strip()] if sections else None
+    return await weather_model.fetch_dashboard_async(str(username), sections)
+
+async def locations_weather(username, query):
+    return await weather_model.fetch_locations_weather_async(str(username))
+
+
+# Path -> async handler for the routes served natively on the event loop.
+ASYNC_ROUTES = {
+    "/api/current-weather": current_weather,
+    "/api/forecast": forecast,
+    "/api/air-quality": air_quality,
+    "/api/weather-overview": weather_overview,
+    "/api/historical-weather": historical_weather,
+    "/api/dashboard": dashboard,
+    "/api/favorite-locations/weather": locations_weather,
+}
+
+# Path -> (result key holding the upstream payload, upstream endpoint) for
+# the routes that send ETag and Cache-Control headers.
+CACHEABLE_ROUTES = {
+    "/api/current-weather": ("current_weather", "weather"),
+    "/api/forecast": ("forecast", "onecall"),
+    "/api/air-quality": ("air_quality", "air_pollution"),
+    "/api/weather-overview": ("weather_overview", "overview"),
+}
+
+
+async def _send(send, status: int, payload: bytes, content_type: str = None,
+                headers: list = (), request_headers: dict = None) -> None:
+    """Sends a complete response, compressed when the client accepts it and it is large enough."""
+    start_headers = list(headers)
+    if content_type:
+        start_headers.append(("content-type", content_type))
+    content_coding = encoding.choose_encoding((request_headers or {}).get(b"accept-encoding", b"").decode())
+    if content_coding and len(payload) >= encoding.MIN_COMPRESS_SIZE:
+        payload = encoding.compress(payload, content_coding)
+        start_headers += [("content-encoding", content_coding), ("vary", "Accept-Encoding")]
+    start_headers.append(("content-length", str(len(payload))))
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(name.encode(), value.encode()) for name, value in start_headers],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+async def _send_json(send, status: int, body: dict, headers: list = (), request_headers: dict = None) -> None:
+    await _send(send, status, encoding.dumps(body), "application/json", headers, request_headers)
+
+
+def _cache_headers(etag: str, endpoint: str, body: dict, request_headers: dict) -> list:
+    """Returns the ETag, Last-Modified, Cache-Control and Vary headers the Flask routes send."""
+    return [
+        ("etag", f'W/"{etag}"'),
+        ("last-modified", http_cache.last_modified(body["age"])),
+        ("cache-control", http_cache.cache_control(
+            weather_model.CACHE_TTLS[endpoint], body["age"], body["stale"],
+            private=b"authorization" in request_headers,
+            stale_while_revalidate=weather_model.STALE_WHILE_REVALIDATE,
+            stale_if_error=weather_model.STALE_IF_ERROR,
+        )),
+        ("vary", "Authorization, Accept"),
+    ]
+
+
+def _validate(path: str, query: dict):
+    """Returns an error message for the same bad input the Flask routes reject with 400."""
+    if path in CACHEABLE_ROUTES:
+        try:
+            projection.parse_fields(query.get("fields"))
+        except ValueError as e:
+            return str(e)
+    if path == "/api/historical-weather" and not query.get("date"):
+        return "Date parameter is required"
+    if path == "/api/dashboard" and query.get("sections"):
+        names = [name.strip() for name in query["sections"].split(",") if name.strip()]
+        unknown = [name for name in names if name not in weather_model.ASYNC_DASHBOARD_SECTIONS]
+        if unknown:
+            return f"Unknown sections: {', '.join(unknown)}"
+    return None
+
+
+def create_asgi_app(config_class=None):
+    """
+    Creates the ASGI application.
+
+    Args:
+        config_class: The Flask configuration class, selected from
+            APP_CONFIG when omitted.
+
+    Returns:
+        An ASGI callable.
+    """
+    flask_app = create_app(config_class)
+    wsgi_app = WsgiToAsgi(flask_app)
+
+    async def handle_weather(scope, send, handler, query) -> None:
+        error = _validate(scope["path"], query)
+        if error:
+            await _send_json(send, 400, {"error": error})
+            return
+        headers = dict(scope["headers"])
+        auth_header = headers.get(b"authorization", b"").decode()
+        with flask_app.app_context():
+            if auth_header.startswith("Bearer "):
+                try:
+                    username = User.verify_session_token(auth_header[len("Bearer "):].strip())
+                except ValueError as e:
+                    await _send_json(send, 401, {"error": str(e)})
+                    return
+            else:
+                username = query.get("username")
+            try:
+                body = await handler(username, query)
+            except Exception as e:
+                status, retry_after = weather_model.upstream_error_status(e)
+                headers_out = [("retry-after", str(retry_after))] if retry_after is not None else []
+                await _send_json(send, status, {"error": str(e)}, headers_out)
+                return
+        if scope["path"] not in CACHEABLE_ROUTES:
+            await _send_json(send, 200, body, request_headers=headers)
+            return
+        section, endpoint = CACHEABLE_ROUTES[scope["path"]]
+        fields = projection.parse_fields(query.get("fields"))
+        if fields is not None:
+            body = {**body, section: projection.project(body[section], fields)}
+        etag = http_cache.payload_etag(body["location"], body[section])
+        use_msgpack = encoding.wants_msgpack(headers.get(b"accept", b"").decode())
+        if use_msgpack:
+            etag += "-msgpack"
+        response_headers = _cache_headers(etag, endpoint, body, headers)
+        if http_cache.etag_matches(headers.get(b"if-none-match", b"").decode(), etag):
+            await _send(send, 304, b"", headers=response_headers)
+        elif use_msgpack:
+            await _send(send, 200, encoding.pack(body), encoding.MSGPACK_MIMETYPE, response_headers, headers)
+        else:
+            await _send_json(send, 200, body, response_headers, headers)
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await weather_model.async_http_client.close()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        handler = ASYNC_ROUTES.get(scope.get("path"))
+        if scope["type"] == "http" and scope["method"] == "GET" and handler:
+            query = {key: values[0] for key, values in parse_qs(scope["query_string"].decode()).items()}
+            # Streamed historical ranges stay on the Flask route
+            if not ("start" in query or "end" in query):
+                started = time.perf_counter()
+                status = []
+
+                async def send_and_record(message):
+                    if message["type"] == "http.response.start":
+                        status.append(message["status"])
+                    await send(message)
+
+                await handle_weather(scope, send_and_record, handler, query)
+                HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                             ("GET", scope["path"], str(status[0] if status else 500)))
+                return
+        await wsgi_app(scope, receive, send)
+
+    return app
@@ -0,0 +1,220 @@
+"""
+A local stand-in for the OpenWeather API, for load tests and offline runs.
+
+Serves the six endpoints weather_model calls with deterministic payloads
+derived from the requested coordinates. Each response is delayed by a
+configurable latency distribution, and a configurable fraction fails with
+a 5xx or is throttled with a 429.
+
+Usage:
+    python -m benchmarks.fake_openweather [--port 8081] [--latency lognormal:0.08,0.5]
+        [--error-rate 0.01] [--throttle-rate 0.01] [--seed 1]
+
+Then start the app with OPENWEATHER_BASE_URL=http://127.0.0.1:8081.
+"""
+import argparse
+import math
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+from flask import Flask, jsonify, make_response, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+
+# Fake endpoint name -> path, matching weather_model.upstream_urls.
+ENDPOINT_PATHS = {
+    "weather": "/data/2.5/weather",
+    "overview": "/data/3.0/onecall/overview",
+    "onecall": "/data/3.0/onecall",
+    "timemachine": "/data/3.0/onecall/timemachine",
+    "day_summary": "/data/3.0/onecall/day_summary",
+    "air_pollution": "/data/2.5/air_pollution",
+}
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parses a latency distribution.
+
+    Accepted forms, in seconds: ``fixed:<s>``, ``uniform:<low>,<high>``,
+    ``exp:<mean>`` and ``lognormal:<median>,<sigma>``. The lognormal form
+    has the long tail real upstream latencies show.
+
+    Args:
+        spec (str): The distribution.
+
+    Returns:
+        Callable[[random.Random], float]: Draws one latency.
+
+    Raises:
+        ValueError: If the distribution is malformed.
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(value) for value in args.split(",") if value.strip()]
+        if kind == "fixed" and len(values) == 1:
+            return lambda rng: values[0]
+        if kind == "uniform" and len(values) == 2:
+            return lambda rng: rng.uniform(values[0], values[1])
+        if kind == "exp" and len(values) == 1:
+            return lambda rng: rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+        if kind == "lognormal" and len(values) == 2:
+            return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    except (ValueError, ZeroDivisionError):
+        pass
+    raise ValueError(f"Invalid latency '{spec}', expected fixed:<s>, uniform:<low>,<high>, "
+                     "exp:<mean> or lognormal:<median>,<sigma>")
+
+
+def _payload(endpoint: str, lat: float, lon: float, dt: Optional[int], date: Optional[str] = None) -> dict:
+    """Builds a response shaped like OpenWeather's, derived from the coordinates."""
+    temp = round(15 + 10 * math.sin(math.radians(lat * 3)) + lon / 100, 2)
+    if endpoint == "weather":
+        return {
+            "coord": {"lat": lat, "lon": lon},
+            "weather": [{"id": 800, "main": "Clear", "description": "clear sky"}],
+            "main": {"temp": temp, "humidity": 60, "pressure": 1013},
+            "wind": {"speed": 3.1, "deg": 200},
+        }
+    if endpoint == "overview":
+        return {"lat": lat, "lon": lon, "weather_overview": f"Clear skies, around {temp} degrees."}
+    if endpoint == "onecall":
+        return {
+            "lat": lat, "lon": lon,
+            "daily": [
+                {"temp": {"day": round(temp + day / 2, 2)}, "weather": [{"description": "clear sky"}]}
+                for day in range(8)
+            ],
+        }
+    if endpoint == "timemachine":
+        return {"lat": lat, "lon": lon, "data": [{"dt": dt, "temp": temp, "weather": [{"description": "clear sky"}]}]}
+    if endpoint == "day_summary":
+        day = int(date[-2:]) if date else 1
+        return {
+            "lat": lat, "lon": lon, "date": date, "units": "metric",
+            "temperature": {"min": round(temp - 5, 2), "max": round(temp + 5, 2),
+                            "morning": temp, "afternoon": round(temp + 4, 2), "evening": temp, "night": round(temp - 4, 2)},
+            "precipitation": {"total": float(day % 3)},
+        }
+    return {"coord": {"lat": lat, "lon": lon}, "list": [{"main": {"aqi": 1 + int(abs(lat + lon)) % 5}}]}
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, code="-", size="-") -> None:
+        pass  # One access log line per upstream call would drown a load test's report
+
+
+class FakeOpenWeather:
+    """
+    The fake server's behaviour and counters.
+
+    Requests are counted per endpoint and outcome, so a load test can
+    report how many upstream calls the app made.
+    """
+
+    def __init__(self, latency: str = "fixed:0", error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Args:
+            latency (str): The latency distribution; see parse_latency.
+            error_rate (float): Fraction of requests failing with a 5xx.
+            throttle_rate (float): Fraction of requests rejected with a 429.
+            seed (int, optional): Seeds latencies and injected failures.
+        """
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts: dict = {}
+
+    def _draw(self) -> tuple:
+        with self._lock:
+            return self.latency(self._rng), self._rng.random()
+
+    def _count(self, endpoint: str, outcome: str) -> None:
+        with self._lock:
+            counts = self.counts.setdefault(endpoint, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+    def stats(self) -> dict:
+        """
+        Returns the requests served so far.
+
+        Returns:
+            dict: ``total`` and, per endpoint, counts by outcome
+            (``ok``, ``error``, ``throttled``, ``unauthorized``).
+        """
+        with self._lock:
+            counts = {endpoint: dict(outcomes) for endpoint, outcomes in self.counts.items()}
+        return {"total": sum(sum(outcomes.values()) for outcomes in counts.values()), "endpoints": counts}
+
+    def reset(self) -> None:
+        """Clears the counters."""
+        with self._lock:
+            self.counts.clear()
+
+    def create_app(self) -> Flask:
+        """Creates the Flask app serving the fake endpoints."""
+        app = Flask(__name__)
+
+        def handle(endpoint: str):
+            delay, roll = self._draw()
+            if delay > 0:
+                time.sleep(delay)
+            if not request.args.get("appid"):
+                self._count(endpoint, "unauthorized")
+                return make_response(jsonify({"cod": 401, "message": "Invalid API key."}), 401)
+            if roll < self.throttle_rate:
+                self._count(endpoint, "throttled")
+                response = make_response(jsonify({"cod": 429, "message": "Too many requests."}), 429)
+                response.headers["Retry-After"] = "1"
+                return response
+            if roll < self.throttle_rate + self.error_rate:
+                self._count(endpoint, "error")
+                return make_response(jsonify({"cod": 503, "message": "Service unavailable."}), 503)
+            try:
+                lat = float(request.args["lat"])
+                lon = float(request.args["lon"])
+            except (KeyError, ValueError):
+                self._count(endpoint, "bad_request")
+                return make_response(jsonify({"cod": 400, "message": "wrong latitude or longitude"}), 400)
+            self._count(endpoint, "ok")
+            return jsonify(_payload(endpoint, lat, lon, request.args.get("dt", type=int), request.args.get("date")))
+
+        for endpoint, path in ENDPOINT_PATHS.items():
+            app.add_url_rule(path, endpoint, lambda endpoint=endpoint: handle(endpoint))
+        app.add_url_rule("/__stats", "stats", lambda: jsonify(self.stats()))
+        return app
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> tuple:
+        """
+        Serves the fake API on a background thread.
+
+        Args:
+            host (str): The interface to bind.
+            port (int): The port to bind; 0 picks a free one.
+
+        Returns:
+            tuple: The server, whose ``shutdown()`` stops it, and its base URL.
+        """
+        server = make_server(host, port, self.create_app(), threaded=True, request_handler=_QuietRequestHandler)
+        threading.Thread(target=server.serve_forever, name="fake-openweather", daemon=True).start()
+        return server, f"http://{host}:{server.server_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind.")
+    parser.add_argument("--port", type=int, default=8081, help="Port to bind.")
+    parser.add_argument("--latency", default="lognormal:0.08,0.5", help="Latency distribution in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 responses.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of 429 responses.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latencies and injected failures.")
+    args = parser.parse_args()
+
+    fake = FakeOpenWeather(args.latency, args.error_rate, args.throttle_rate, args.seed)
+    print(f"Fake OpenWeather on http://{args.host}:{args.port} (stats at /__stats)")
+    make_server(args.host, args.port, fake.create_app(), threaded=True).serve_forever()
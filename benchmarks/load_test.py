@@ -0,0 +1,245 @@
+"""
+End-to-end load test of the app against the local fake OpenWeather server.
+
+Creates users whose favorites cluster around a few metro areas, then
+replays a weighted mix of weather requests from concurrent clients
+through create_app(). Reports throughput, p50/p95/p99 latency per route,
+response statuses, and the upstream calls the fake server received.
+
+Usage:
+    python -m benchmarks.load_test [--users 500] [--requests 5000] [--concurrency 16]
+        [--latency lognormal:0.08,0.5] [--error-rate 0.01] [--throttle-rate 0.01]
+        [--quota 100000/min] [--seed 1] [--json]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks.fake_openweather import FakeOpenWeather
+
+
+# Metro areas users' favorites cluster around: (name, lat, lon).
+METROS = (
+    ("Boston", 42.3601, -71.0589),
+    ("New York", 40.7128, -74.0060),
+    ("Chicago", 41.8781, -87.6298),
+    ("London", 51.5074, -0.1278),
+    ("Tokyo", 35.6762, 139.6503),
+)
+
+# Degrees of jitter around a metro center (0.05 is about 5 km).
+METRO_SPREAD = 0.05
+
+# Route -> relative share of the replayed requests.
+REQUEST_MIX = {
+    "/api/current-weather": 50,
+    "/api/forecast": 15,
+    "/api/dashboard": 15,
+    "/api/air-quality": 10,
+    "/api/favorite-locations/weather": 5,
+    "/api/historical-weather": 5,
+}
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Returns the nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _summarize(latencies: list) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def populate(app, users: int, rng: random.Random) -> list:
+    """
+    Creates users with favorites clustered around METROS.
+
+    A fifth of the users also get two or three entries in their favorite
+    locations list.
+
+    Returns:
+        list: The usernames created.
+    """
+    from meal_max.models.favorite_location_model import FavoriteLocation
+    from meal_max.models.user_model import User
+
+    usernames = [f"load{i}" for i in range(users)]
+    favorites = []
+    for username in usernames:
+        name, lat, lon = rng.choice(METROS)
+        favorites.append((username, name, rng.gauss(lat, METRO_SPREAD), rng.gauss(lon, METRO_SPREAD)))
+    with app.app_context():
+        User.bulk_create_accounts({"username": username, "password": "load-test-password"} for username in usernames)
+        User.bulk_set_favorites(
+            {"username": username, "city_name": name, "latitude": lat, "longitude": lon}
+            for username, name, lat, lon in favorites
+        )
+        for username, name, lat, lon in favorites[:users // 5]:
+            FavoriteLocation.add_location(username, name, lat, lon)
+            for _ in range(rng.randint(1, 2)):
+                other, other_lat, other_lon = rng.choice(METROS)
+                FavoriteLocation.add_location(username, other, rng.gauss(other_lat, METRO_SPREAD),
+                                              rng.gauss(other_lon, METRO_SPREAD))
+    return usernames
+
+
+def build_requests(usernames: list, count: int, rng: random.Random) -> list:
+    """
+    Draws the request sequence: routes from REQUEST_MIX, users with a long tail.
+
+    Returns:
+        list: (route, query parameters) pairs.
+    """
+    routes = rng.choices(list(REQUEST_MIX), weights=list(REQUEST_MIX.values()), k=count)
+    # A few users make most of the requests, as in real traffic
+    users = rng.choices(usernames, weights=[1 / (rank + 1) for rank in range(len(usernames))], k=count)
+    today = datetime.date.today()
+    requests_ = []
+    for route, username in zip(routes, users):
+        query = {"username": username}
+        if route == "/api/historical-weather":
+            query["date"] = (today - datetime.timedelta(days=rng.randint(1, 30))).isoformat()
+        requests_.append((route, query))
+    return requests_
+
+
+def run_load_test(app, fake: FakeOpenWeather, requests_: list, concurrency: int) -> dict:
+    """
+    Replays requests against the app from concurrent clients.
+
+    Args:
+        app: The Flask app, with weather_model pointed at the fake server.
+        fake (FakeOpenWeather): The fake server, for its upstream counters.
+        requests_ (list): (route, query parameters) pairs from build_requests.
+        concurrency (int): Clients sending requests at once.
+
+    Returns:
+        dict: Throughput, overall and per-route latency percentiles,
+        response statuses, upstream calls and the cache hit ratio.
+    """
+    from meal_max.models import weather_model
+
+    local = threading.local()
+    results = []
+    results_lock = threading.Lock()
+
+    def send(item):
+        route, query = item
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        started = time.perf_counter()
+        response = client.get(route, query_string=query)
+        elapsed = time.perf_counter() - started
+        with results_lock:
+            results.append((route, response.status_code, elapsed))
+
+    fake.reset()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load-client") as executor:
+        list(executor.map(send, requests_))
+    duration = time.perf_counter() - started
+
+    statuses = {}
+    by_route = {}
+    for route, status, elapsed in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        by_route.setdefault(route, []).append(elapsed)
+    upstream = fake.stats()
+    return {
+        "requests": len(results),
+        "concurrency": concurrency,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(results) / duration, 1) if duration else 0.0,
+        "latency": _summarize([elapsed for _, _, elapsed in results]),
+        "routes": {route: _summarize(latencies) for route, latencies in sorted(by_route.items())},
+        "statuses": dict(sorted(statuses.items())),
+        "upstream_calls": upstream["total"],
+        "upstream": upstream["endpoints"],
+        "upstream_calls_per_request": round(upstream["total"] / len(results), 3) if results else 0.0,
+        "cache_hit_ratio": round(weather_model.weather_cache.stats()["hit_ratio"], 3),
+    }
+
+
+def format_report(report: dict) -> str:
+    """Renders a load test report as a table."""
+    lines = [
+        f"{report['requests']} requests, {report['concurrency']} clients, {report['duration_s']}s: "
+        f"{report['throughput_rps']} req/s",
+        f"{'route':<34}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+    ]
+    for route, summary in list(report["routes"].items()) + [("all", report["latency"])]:
+        lines.append(f"{route:<34}{summary['count']:>7}{summary['p50_ms']:>10}"
+                     f"{summary['p95_ms']:>10}{summary['p99_ms']:>10}")
+    lines.append(f"statuses: {report['statuses']}")
+    lines.append(f"upstream calls: {report['upstream_calls']} "
+                 f"({report['upstream_calls_per_request']} per request), cache hit ratio {report['cache_hit_ratio']}")
+    for endpoint, outcomes in sorted(report["upstream"].items()):
+        lines.append(f"  {endpoint:<14}{outcomes}")
+    return "\n".join(lines)
+
+
+def main(args) -> dict:
+    fake = FakeOpenWeather(args.latency, args.error_rate, args.throttle_rate, args.seed)
+    server, base_url = fake.start()
+    workdir = tempfile.mkdtemp(prefix="load-test-")
+    os.environ.setdefault("OPENWEATHER_API_KEY", "load-test-key")
+    os.environ["OPENWEATHER_BASE_URL"] = base_url
+    os.environ["UPSTREAM_QUOTA"] = args.quota
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Fake payloads must never reach the permanent historical store, and the
+    # run must not draw on quota buckets shared with real processes
+    os.environ["HISTORICAL_DB_PATH"] = os.path.join(workdir, "historical_weather.db")
+    if os.getenv("UPSTREAM_QUOTA_DB"):
+        os.environ["UPSTREAM_QUOTA_DB"] = os.path.join(workdir, "quota.db")
+
+    # Imported only now so module-level settings pick up the environment above
+    from app import create_app
+    from config import TestConfig
+
+    database = os.path.join(workdir, "app.db")
+
+    class LoadTestConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{database}"
+        SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 30, "check_same_thread": False}}
+
+    rng = random.Random(args.seed)
+    app = create_app(LoadTestConfig)
+    usernames = populate(app, args.users, rng)
+    try:
+        return run_load_test(app, fake, build_requests(usernames, args.requests, rng), args.concurrency)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500, help="Users to create.")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests to replay.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients.")
+    parser.add_argument("--latency", default="lognormal:0.08,0.5", help="Fake upstream latency distribution.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream 503s.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of upstream 429s.")
+    parser.add_argument("--quota", default="100000/min", help="Upstream quota (UPSTREAM_QUOTA) for the run.")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for users, requests and upstream behaviour.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+    report = main(args)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
@@ -0,0 +1,99 @@
+"""
+Micro-benchmark comparing the legacy full-row ORM lookups in the User model
+with the column-projected select()/UPDATE statements that replaced them.
+
+Usage:
+    python -m benchmarks.user_queries [--sizes 10000 100000] [--calls 2000]
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import insert
+
+from app import create_app
+from config import TestConfig
+from meal_max.db import db
+from meal_max.models.user_model import User, favorite_cache
+
+
+def legacy_get_favorite(username: str) -> tuple:
+    user = User.query.filter_by(username=username).first()
+    return user.location_name, user.latitude, user.longitude
+
+def legacy_get_credentials(username: str) -> tuple:
+    user = User.query.filter_by(username=username).first()
+    return user.salt, user.password
+
+def legacy_set_favorite(username: str, city_name: str, lat: float, lon: float) -> None:
+    user = User.query.filter_by(username=username).first()
+    user.location_name = city_name
+    user.latitude = lat
+    user.longitude = lon
+    db.session.commit()
+
+def projected_get_favorite(username: str) -> tuple:
+    # Bypass the favorite cache so only the query itself is measured
+    favorite_cache.clear()
+    return User.get_favorite(username)
+
+
+def populate(size: int) -> None:
+    """Fills the users table with ``size`` rows using precomputed hashes."""
+    rows = [
+        {
+            "username": f"user{i}",
+            "salt": "00" * 16,
+            "password": "0" * 64,
+            "location_name": "City",
+            "latitude": 40.0 + i % 100 / 100,
+            "longitude": -70.0 - i % 100 / 100,
+        }
+        for i in range(size)
+    ]
+    for start in range(0, size, 10000):
+        db.session.execute(insert(User), rows[start:start + 10000])
+    db.session.commit()
+
+def time_per_call(fn, usernames: list) -> float:
+    """Returns the mean microseconds per call of ``fn`` over ``usernames``."""
+    start = time.perf_counter()
+    for username in usernames:
+        fn(username)
+    return (time.perf_counter() - start) / len(usernames) * 1e6
+
+def run(sizes: list, calls: int) -> None:
+    cases = [
+        ("get_favorite", legacy_get_favorite, projected_get_favorite),
+        ("credentials", legacy_get_credentials, User._get_credentials),
+        ("set_favorite",
+         lambda username: legacy_set_favorite(username, "Boston", 42.36, -71.06),
+         lambda username: User.set_favorite(username, "Boston", 42.36, -71.06)),
+    ]
+    print(f"{'users':>8}  {'path':<14}{'legacy us/call':>16}{'projected us/call':>20}{'speedup':>10}")
+    for size in sizes:
+        app = create_app(TestConfig)
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            populate(size)
+            usernames = [f"user{random.randrange(size)}" for _ in range(calls)]
+            for name, legacy, projected in cases:
+                # Warm up both paths so statement compilation is not measured
+                legacy(usernames[0])
+                projected(usernames[0])
+                legacy_us = time_per_call(legacy, usernames)
+                db.session.expunge_all()
+                projected_us = time_per_call(projected, usernames)
+                print(f"{size:>8}  {name:<14}{legacy_us:>16.1f}{projected_us:>20.1f}{legacy_us / projected_us:>9.2f}x")
+            db.session.remove()
+            db.drop_all()
+    favorite_cache.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Table sizes to benchmark.")
+    parser.add_argument("--calls", type=int, default=2000, help="Calls timed per path and size.")
+    args = parser.parse_args()
+    run(args.sizes, args.calls)
@@ -1,7 +1,83 @@
 import os
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _engine_options(database_uri):
+    """Returns SQLAlchemy engine options suited to the database backend."""
+    if database_uri.startswith('sqlite'):
+        # Each connection waits on a locked database instead of failing immediately
+        return {'connect_args': {'timeout': 30, 'check_same_thread': False}}
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': True,
+    }
+
+
 class TestConfig():
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # Use in-memory database for tests
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # Use in-memory database for tests
+    SECRET_KEY = os.getenv('SECRET_KEY', 'test-secret-key')  # Signs session tokens
+    BCRYPT_LOG_ROUNDS = 4  # Minimum bcrypt cost keeps the test suite fast
+    SESSION_TOKEN_MAX_AGE = 24 * 60 * 60  # Session token lifetime in seconds
+    BULK_ADMIN_TOKEN = 'test-admin-token'  # Sent as X-Admin-Token to the bulk routes
+
+
+class ProductionConfig():
+    """Production configuration."""
+    TESTING = False
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # A server database URL (e.g. postgresql://...) or a file-backed SQLite database in db/
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///' + os.path.join(BASE_DIR, 'db', 'app.db'))
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
+    # Applied to every new SQLite connection; ignored for other backends
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',  # Readers no longer block the writer
+        'synchronous': 'NORMAL',  # Durable at checkpoints, safe with WAL
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+        'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', '65536')),  # Negative means KiB
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    }
+    SECRET_KEY = os.getenv('SECRET_KEY')  # Must be shared by every worker for session tokens to verify
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', '12'))
+    SESSION_TOKEN_MAX_AGE = int(os.getenv('SESSION_TOKEN_MAX_AGE', str(24 * 60 * 60)))
+    # Required in the X-Admin-Token header by the bulk routes; unset disables them
+    BULK_ADMIN_TOKEN = os.getenv('BULK_ADMIN_TOKEN')
+    # Background cache pre-warming for favorite locations; an interval of 0 disables it
+    WEATHER_REFRESH_INTERVAL = int(os.getenv('WEATHER_REFRESH_INTERVAL', '0'))
+    WEATHER_REFRESH_CONCURRENCY = int(os.getenv('WEATHER_REFRESH_CONCURRENCY', '4'))
+    # Upstream calls allowed per refresh run; unset means no limit
+    WEATHER_REFRESH_BUDGET = int(os.environ['WEATHER_REFRESH_BUDGET']) if os.getenv('WEATHER_REFRESH_BUDGET') else None
+
+
+CONFIGS = {
+    'production': ProductionConfig,
+    'test': TestConfig,
+}
+
+
+def get_config(name=None):
+    """
+    Selects a configuration class by name.
+
+    Args:
+        name (str, optional): 'production' or 'test'. Defaults to the
+            APP_CONFIG environment variable, or 'production' if unset.
+
+    Returns:
+        The configuration class.
+
+    Raises:
+        ValueError: If the name is not a known configuration.
+    """
+    name = (name or os.getenv('APP_CONFIG', 'production')).lower()
+    if name not in CONFIGS:
+        raise ValueError(f"Unknown configuration '{name}', expected one of: {', '.join(CONFIGS)}")
+    return CONFIGS[name]
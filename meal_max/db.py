@@ -1,3 +1,23 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+
+
+def configure_sqlite_pragmas(engine: Engine, pragmas: dict) -> None:
+    """
+    Applies PRAGMA settings to every new connection of a SQLite engine.
+
+    Args:
+        engine (Engine): The SQLite engine.
+        pragmas (dict): PRAGMA names and values, e.g. {"journal_mode": "WAL"}.
+    """
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
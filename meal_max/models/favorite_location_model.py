@@ -0,0 +1,158 @@
+import logging
+import os
+from typing import Iterator
+
+from sqlalchemy import bindparam, delete, func, insert, select, union_all
+from sqlalchemy.exc import IntegrityError
+
+from meal_max.db import db
+from meal_max.models.user_model import DB_QUERY_SECONDS, User
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# Favorite locations a single user may keep.
+MAX_FAVORITE_LOCATIONS = int(os.getenv("MAX_FAVORITE_LOCATIONS", "10"))
+
+
+class FavoriteLocation(db.Model):
+    """One of a user's saved locations, such as home, office or a travel destination."""
+
+    __tablename__ = 'favorite_locations'
+    # Also the index that serves "all locations of a user, in order"
+    __table_args__ = (db.UniqueConstraint('user_id', 'position', name='uq_favorite_locations_user_position'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    name = db.Column(db.String(80), nullable=False)
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+
+    @classmethod
+    def _user_id(cls, username: str) -> int:
+        row = db.session.execute(_SELECT_USER_ID, {"username": username}).first()
+        if row is None:
+            logger.info("Username %s not found", username)
+            raise ValueError(f"Username {username} not found")
+        return row[0]
+
+    @classmethod
+    @DB_QUERY_SECONDS.timed("add_location")
+    def add_location(cls, username: str, city_name: str, lat: float, lon: float) -> int:
+        """
+        Appends a location to a user's favorites.
+
+        Args:
+            username (str): The username of the user.
+            city_name (str): The name of the location.
+            lat (float): The latitude of the location.
+            lon (float): The longitude of the location.
+
+        Returns:
+            int: The new location's position, used to remove it later.
+
+        Raises:
+            ValueError: If the user is not found, already has the maximum
+                number of locations, or added another location concurrently.
+            sqlite3.Error: If there is an error with the database connection or query.
+        """
+        user_id = cls._user_id(username)
+        count, last_position = db.session.execute(
+            select(func.count(), func.max(cls.position)).where(cls.user_id == user_id)
+        ).one()
+        if count >= MAX_FAVORITE_LOCATIONS:
+            raise ValueError(f"User {username} already has {MAX_FAVORITE_LOCATIONS} favorite locations")
+        position = (last_position or 0) + 1
+        try:
+            db.session.execute(insert(cls).values(
+                user_id=user_id, name=city_name, latitude=lat, longitude=lon, position=position,
+            ))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            raise ValueError(f"Favorite locations for {username} changed concurrently; try again")
+        logger.info("Favorite location %d added for user %s: %s", position, username, city_name)
+        return position
+
+    @classmethod
+    @DB_QUERY_SECONDS.timed("remove_location")
+    def remove_location(cls, username: str, position: int) -> None:
+        """
+        Removes one of a user's favorite locations. Other positions are not renumbered.
+
+        Args:
+            username (str): The username of the user.
+            position (int): The position returned by add_location.
+
+        Raises:
+            ValueError: If the user or the location is not found.
+            sqlite3.Error: If there is an error with the database connection or query.
+        """
+        user_id = cls._user_id(username)
+        result = db.session.execute(delete(cls).where(cls.user_id == user_id, cls.position == position))
+        if result.rowcount == 0:
+            db.session.rollback()
+            raise ValueError(f"User {username} has no favorite location {position}")
+        db.session.commit()
+        logger.info("Favorite location %d removed for user %s", position, username)
+
+    @classmethod
+    @DB_QUERY_SECONDS.timed("get_locations")
+    def get_locations(cls, username: str) -> list:
+        """
+        Gets all of a user's favorite locations in one query.
+
+        Args:
+            username (str): The username of the user.
+
+        Returns:
+            list: (name, lat, lon, position) tuples in position order; the
+            first three items have the shape of User.get_favorite's result.
+
+        Raises:
+            ValueError: If the username is not found in the database.
+            sqlite3.Error: If there is an error with the database connection or query.
+        """
+        rows = db.session.execute(_SELECT_LOCATIONS, {"username": username}).all()
+        if not rows:
+            logger.info("Username %s not found", username)
+            raise ValueError(f"Username {username} not found")
+        # A user without locations comes back as one row of NULLs from the outer join
+        return [(name, lat, lon, position) for name, lat, lon, position in rows if position is not None]
+
+    @classmethod
+    def all_coordinates(cls, batch_size: int = 1000) -> Iterator[tuple]:
+        """
+        Streams every favorite location of every user, from both the users and favorite_locations tables.
+
+        Coordinates are returned as stored, so callers can group them by the
+        same cache cells that live requests use. Users without a favorite
+        location are skipped.
+
+        Args:
+            batch_size (int): Rows fetched from the database per round trip.
+
+        Returns:
+            Iterator[tuple]: (user id, name, lat, lon) tuples, ordered by user id.
+        """
+        result = db.session.execute(_SELECT_ALL_COORDINATES.execution_options(yield_per=batch_size))
+        for user_id, name, latitude, longitude in result:
+            yield user_id, name, latitude, longitude
+
+
+_SELECT_USER_ID = select(User.id).where(User.username == bindparam("username"))
+_SELECT_LOCATIONS = (
+    select(FavoriteLocation.name, FavoriteLocation.latitude, FavoriteLocation.longitude, FavoriteLocation.position)
+    .select_from(User)
+    .outerjoin(FavoriteLocation, FavoriteLocation.user_id == User.id)
+    .where(User.username == bindparam("username"))
+    .order_by(FavoriteLocation.position)
+)
+_SELECT_ALL_COORDINATES = union_all(
+    select(User.id.label("user_id"), User.location_name, User.latitude, User.longitude)
+    .where(User.latitude.is_not(None), User.longitude.is_not(None)),
+    select(FavoriteLocation.user_id, FavoriteLocation.name, FavoriteLocation.latitude, FavoriteLocation.longitude),
+).order_by("user_id")
@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Iterable, Optional
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class HistoricalStore:
+    """
+    A persistent SQLite store for historical weather payloads.
+
+    Historical weather for a place and day never changes, so payloads are
+    kept on disk indefinitely and survive restarts. Rows are keyed on
+    (endpoint, geohash cell, day), the same cell the upstream call was made
+    for, so every location in a cell shares its rows and single-day and
+    range reads are index lookups.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): The SQLite database file, or ":memory:".
+        """
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "HistoricalStore":
+        """
+        Creates a store at ``HISTORICAL_DB_PATH`` (default db/historical_weather.db).
+
+        Returns:
+            HistoricalStore: The configured store.
+        """
+        return cls(os.getenv("HISTORICAL_DB_PATH", os.path.join("db", "historical_weather.db")))
+
+    def _connection(self) -> sqlite3.Connection:
+        """Opens the database and creates the schema on first use."""
+        if self._conn is None:
+            if self.path != ":memory:":
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS historical_cells (
+                    endpoint TEXT NOT NULL,
+                    cell TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (endpoint, cell, day)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, endpoint: str, cell: str, day: str) -> Optional[Any]:
+        """
+        Reads the stored payload for one day.
+
+        Args:
+            endpoint (str): The upstream endpoint the payload came from.
+            cell (str): The geohash cell the upstream call was made for.
+            day (str): The date in YYYY-MM-DD format.
+
+        Returns:
+            Any: The stored payload, or None if the day has not been stored.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT payload FROM historical_cells WHERE endpoint = ? AND cell = ? AND day = ?",
+                (endpoint, cell, day),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, endpoint: str, cell: str, days: Iterable[str]) -> dict:
+        """
+        Reads the stored payloads for many days in one query.
+
+        Args:
+            endpoint (str): The upstream endpoint the payloads came from.
+            cell (str): The geohash cell the upstream calls were made for.
+            days (Iterable[str]): Dates in YYYY-MM-DD format.
+
+        Returns:
+            dict: Date to payload for every requested day that is stored.
+        """
+        wanted = set(days)
+        if not wanted:
+            return {}
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT day, payload FROM historical_cells "
+                "WHERE endpoint = ? AND cell = ? AND day BETWEEN ? AND ?",
+                (endpoint, cell, min(wanted), max(wanted)),
+            ).fetchall()
+        return {day: json.loads(payload) for day, payload in rows if day in wanted}
+
+    def put(self, endpoint: str, cell: str, day: str, payload: Any) -> None:
+        """
+        Stores the payload for one day, replacing any previous copy.
+
+        Args:
+            endpoint (str): The upstream endpoint the payload came from.
+            cell (str): The geohash cell the upstream call was made for.
+            day (str): The date in YYYY-MM-DD format.
+            payload (Any): The JSON-serializable upstream response.
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO historical_cells (endpoint, cell, day, payload, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (endpoint, cell, day, json.dumps(payload), time.time()),
+            )
+            conn.commit()
+        logger.debug("Stored historical %s for cell %s on %s", endpoint, cell, day)
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
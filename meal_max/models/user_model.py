@@ -1,41 +1,195 @@
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
+import hmac
+import itertools
 import logging
 import os
 
-from typing import Any
+import bcrypt
+from flask import current_app, has_app_context
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from typing import Any, Iterable, Iterator, Optional
+from sqlalchemy import bindparam, insert, select, update
 from sqlalchemy.exc import IntegrityError
 from meal_max.db import db
 
+from meal_max.utils import metrics
+from meal_max.utils.cache import TTLCache, VersionCounter
 from meal_max.utils.logger import configure_logger
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+# username -> (location_name, latitude, longitude), kept current by every write path.
+favorite_cache = TTLCache(maxsize=int(os.getenv("FAVORITE_CACHE_MAXSIZE", "10000")))
+
+# Seconds a cached favorite is served, which bounds how long another worker's
+# change can go unseen when FAVORITE_CACHE_VERSION_DB is not set.
+FAVORITE_CACHE_TTL = float(os.getenv("FAVORITE_CACHE_TTL", "60"))
+
+# Optional cross-process invalidation: every worker sharing this file drops its
+# favorite cache when another worker changes a user.
+favorite_cache_version = (
+    VersionCounter(os.environ["FAVORITE_CACHE_VERSION_DB"],
+                   check_interval=float(os.getenv("FAVORITE_CACHE_VERSION_INTERVAL", "1.0")))
+    if os.getenv("FAVORITE_CACHE_VERSION_DB") else None
+)
+
+# username -> fingerprint of the password hash, checked against each session token.
+credential_cache = TTLCache(maxsize=int(os.getenv("CREDENTIAL_CACHE_MAXSIZE", "10000")))
+
+# Seconds a cached fingerprint is trusted, which bounds how long a token revoked
+# by a password change on another worker still verifies here.
+CREDENTIAL_CACHE_TTL = float(os.getenv("CREDENTIAL_CACHE_TTL", "60"))
+
+DB_QUERY_SECONDS = metrics.registry.histogram(
+    "db_query_duration_seconds", "User table query latency, including commits.", ("query",))
+
+metrics.registry.register_collector(metrics.cache_collector("favorite", favorite_cache.stats))
+
+# Rows per executemany transaction in the bulk import methods.
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+
+# bcrypt releases the GIL, so bulk hashing scales across these threads.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BULK_HASH_WORKERS", str(os.cpu_count() or 4))),
+    thread_name_prefix="password-hash",
+)
+
+
+def _clear_user_caches() -> None:
+    favorite_cache.clear(reset_stats=False)
+    credential_cache.clear(reset_stats=False)
+
+def _publish_user_change() -> None:
+    """Tells other processes that a user changed, dropping our caches if they did too."""
+    if favorite_cache_version is not None and favorite_cache_version.bump():
+        _clear_user_caches()
+
+def _check_user_changes() -> None:
+    """Drops our caches if another process changed a user since the last check."""
+    if favorite_cache_version is not None and favorite_cache_version.changed():
+        _clear_user_caches()
+
+def _credential_fingerprint(hashed_password: str) -> str:
+    """Returns a short digest of a password hash; it changes whenever the password does."""
+    return hashlib.sha256(hashed_password.encode()).hexdigest()[:16]
+
 class User(db.Model):
     __tablename__ = 'users'
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    salt = db.Column(db.String(32), nullable=False)  # 16-byte salt in hex
-    password = db.Column(db.String(64), nullable=False)  # SHA-256 hash in hex
+    salt = db.Column(db.String(32), nullable=False)  # bcrypt salt (legacy: 16-byte salt in hex)
+    password = db.Column(db.String(64), nullable=False)  # bcrypt hash (legacy: SHA-256 hash in hex)
     location_name = db.Column(db.String(80), nullable=True)
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
 
     @classmethod
-    def _generate_salted_hash(cls, password: str) -> tuple[str, str]:
+    def _bcrypt_rounds(cls) -> int:
+        """
+        Returns the configured bcrypt cost factor.
+
+        Returns:
+            int: The log2 number of rounds, from BCRYPT_LOG_ROUNDS.
+        """
+        if has_app_context():
+            return int(current_app.config.get("BCRYPT_LOG_ROUNDS", 12))
+        return int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+
+    @classmethod
+    def _generate_salted_hash(cls, password: str, rounds: Optional[int] = None) -> tuple[str, str]:
         """
-        Generates a salted hash for the given password.
+        Generates a salted bcrypt hash for the given password.
 
         Args:
             password (str): The password to hash.
+            rounds (int, optional): The bcrypt cost; defaults to the configured one.
 
         Returns:
             tuple[str, str]: A tuple containing the salt and hashed password.
         """
-        salt = os.urandom(16).hex()
-        hashed_password = hashlib.sha256((password + salt).encode()).hexdigest()
-        return salt, hashed_password
+        salt = bcrypt.gensalt(rounds=rounds or cls._bcrypt_rounds())
+        hashed_password = bcrypt.hashpw(password.encode(), salt)
+        return salt.decode(), hashed_password.decode()
+
+    @classmethod
+    def _verify_password(cls, password: str, salt: str, hashed_password: str) -> bool:
+        """
+        Checks a password against a stored bcrypt or legacy SHA-256 hash.
+
+        Args:
+            password (str): The password to check.
+            salt (str): The stored salt.
+            hashed_password (str): The stored hash.
+
+        Returns:
+            bool: True if the password matches, False otherwise.
+        """
+        if hashed_password.startswith("$2"):
+            return bcrypt.checkpw(password.encode(), hashed_password.encode())
+        legacy_hash = hashlib.sha256((password + salt).encode()).hexdigest()
+        return hmac.compare_digest(legacy_hash, hashed_password)
+
+    @classmethod
+    def _needs_rehash(cls, hashed_password: str) -> bool:
+        """
+        Checks whether a stored hash is legacy SHA-256 or uses a stale bcrypt cost.
+
+        Args:
+            hashed_password (str): The stored hash.
+
+        Returns:
+            bool: True if the hash should be replaced on the next successful login.
+        """
+        if not hashed_password.startswith("$2"):
+            return True
+        return int(hashed_password.split("$")[2]) != cls._bcrypt_rounds()
+
+    @classmethod
+    @DB_QUERY_SECONDS.timed("get_credentials")
+    def _get_credentials(cls, username: str) -> tuple[str, str]:
+        """
+        Loads only the salt and password hash for a user.
+
+        Args:
+            username (str): The username of the user.
+
+        Returns:
+            tuple[str, str]: The stored salt and password hash.
+
+        Raises:
+            ValueError: If the user does not exist.
+        """
+        row = db.session.execute(_SELECT_CREDENTIALS, {"username": username}).first()
+        if row is None:
+            logger.info("User %s not found", username)
+            raise ValueError(f"User {username} not found")
+        return row.salt, row.password
+
+    @classmethod
+    @DB_QUERY_SECONDS.timed("update_columns")
+    def _update_columns(cls, username: str, **values: Any) -> bool:
+        """
+        Updates columns for one user with a single UPDATE ... WHERE username = ?.
+
+        Args:
+            username (str): The username of the user.
+            **values: Column names and their new values.
+
+        Returns:
+            bool: True if a row was updated, False if the user does not exist.
+        """
+        result = db.session.execute(
+            update(cls).where(cls.username == bindparam("match_username")).values(**values),
+            {"match_username": username},
+        )
+        if result.rowcount == 0:
+            db.session.rollback()
+            return False
+        db.session.commit()
+        return True
 
     @classmethod
     def check_password(cls, username: str, password: str) -> bool:
@@ -52,12 +206,8 @@ class User(db.Model):
         Raises:
             ValueError: If the user does not exist.
         """
-        user = cls.query.filter_by(username=username).first()
-        if not user:
-            logger.info("User %s not found", username)
-            raise ValueError(f"User {username} not found")
-        hashed_password = hashlib.sha256((password + user.salt).encode()).hexdigest()
-        return hashed_password == user.password
+        salt, hashed_password = cls._get_credentials(username)
+        return cls._verify_password(password, salt, hashed_password)
     
     @classmethod
     def create_account(cls, username: str, password: str) -> None:
@@ -79,8 +229,11 @@ class User(db.Model):
         salt, hashed_password = cls._generate_salted_hash(password)
         new_user = cls(username=username, salt=salt, password=hashed_password)
         try:
-            db.session.add(new_user)
-            db.session.commit()
+            with DB_QUERY_SECONDS.time(("create_account",)):
+                db.session.add(new_user)
+                db.session.commit()
+            favorite_cache.delete(username)
+            _publish_user_change()
             logger.info("User successfully added to the database: %s", username)
         except IntegrityError:
             db.session.rollback()
@@ -104,15 +257,13 @@ class User(db.Model):
             ValueError: If the username is not found in the database.
             sqlite3.Error: If there is an error with the database connection or query.
         """
-        user = cls.query.filter_by(username=username).first()
-        if not user:
+        salt, hashed_password = cls._generate_salted_hash(new_password)
+        if not cls._update_columns(username, salt=salt, password=hashed_password):
             logger.info("User %s not found", username)
             raise ValueError(f"User {username} not found")
-
-        salt, hashed_password = cls._generate_salted_hash(new_password)
-        user.salt = salt
-        user.password = hashed_password
-        db.session.commit()
+        favorite_cache.delete(username)
+        credential_cache.delete(username)
+        _publish_user_change()
         logger.info("Password updated successfully for user: %s", username)
         
     @classmethod
@@ -120,6 +271,9 @@ class User(db.Model):
         """
         Validates a user's login credentials.
 
+        A successful login transparently upgrades a legacy SHA-256 hash, or a
+        bcrypt hash made with a different cost factor, to the configured cost.
+
         Args:
             username (str): The username for the account.
             password (str): The password for the account.
@@ -131,12 +285,95 @@ class User(db.Model):
             ValueError: If the username is not found in the database.
             sqlite3.Error: If there is an error with the database connection or query.
         """
-        user = cls.query.filter_by(username=username).first()
-        if not user:
-            logger.info("User %s not found", username)
-            raise ValueError(f"User {username} not found")
-        hashed_password = hashlib.sha256((password + user.salt).encode()).hexdigest()
-        return hashed_password == user.password
+        salt, hashed_password = cls._get_credentials(username)
+        if not cls._verify_password(password, salt, hashed_password):
+            return False
+        if cls._needs_rehash(hashed_password):
+            salt, hashed_password = cls._generate_salted_hash(password)
+            cls._update_columns(username, salt=salt, password=hashed_password)
+            credential_cache.delete(username)
+            logger.info("Password hash upgraded for user: %s", username)
+        return True
+
+    @classmethod
+    def _token_serializer(cls) -> URLSafeTimedSerializer:
+        """Returns the serializer that signs session tokens with the app's SECRET_KEY."""
+        secret_key = current_app.config.get("SECRET_KEY")
+        if not secret_key:
+            raise ValueError("SECRET_KEY must be configured to issue session tokens")
+        return URLSafeTimedSerializer(secret_key, salt="session-token")
+
+    @classmethod
+    def _current_fingerprint(cls, username: str, reload: bool = False) -> str:
+        """Returns the user's credential fingerprint, from the cache unless ``reload`` is set."""
+        fingerprint = None if reload else credential_cache.get(username)
+        if fingerprint is None:
+            _, hashed_password = cls._get_credentials(username)
+            fingerprint = _credential_fingerprint(hashed_password)
+            credential_cache.set(username, fingerprint, ttl=CREDENTIAL_CACHE_TTL)
+        return fingerprint
+
+    @classmethod
+    def issue_session_token(cls, username: str) -> str:
+        """
+        Issues a signed session token for a user who has just logged in.
+
+        The token carries a fingerprint of the user's password hash, so
+        changing the password revokes every token issued before.
+
+        Args:
+            username (str): The username the token identifies.
+
+        Returns:
+            str: The signed, timestamped token.
+
+        Raises:
+            ValueError: If the user does not exist.
+        """
+        fingerprint = cls._current_fingerprint(username, reload=True)
+        return cls._token_serializer().dumps({"username": username, "credential": fingerprint})
+
+    @classmethod
+    def verify_session_token(cls, token: str) -> str:
+        """
+        Verifies a session token without the KDF, and usually without the database.
+
+        The token's credential fingerprint is compared with the user's
+        current one, held in an in-process cache for CREDENTIAL_CACHE_TTL
+        seconds. A mismatch is re-checked against the database before the
+        token is rejected, in case the cache is behind.
+
+        Args:
+            token (str): The token presented by the client.
+
+        Returns:
+            str: The username the token was issued for.
+
+        Raises:
+            ValueError: If the token is expired, tampered with, malformed, or
+                revoked by a password change.
+        """
+        max_age = int(current_app.config.get("SESSION_TOKEN_MAX_AGE", 24 * 60 * 60))
+        try:
+            payload = cls._token_serializer().loads(token, max_age=max_age)
+        except SignatureExpired:
+            raise ValueError("Session token expired")
+        except BadSignature:
+            raise ValueError("Invalid session token")
+        if not isinstance(payload, dict) or not payload.get("username") or not isinstance(payload.get("credential"), str):
+            raise ValueError("Invalid session token")
+        username, credential = payload["username"], payload["credential"]
+        _check_user_changes()
+        try:
+            current = cls._current_fingerprint(username)
+            if not hmac.compare_digest(credential, current):
+                current = cls._current_fingerprint(username, reload=True)
+        except ValueError:
+            # The user no longer exists
+            raise ValueError("Invalid session token")
+        if not hmac.compare_digest(credential, current):
+            raise ValueError("Session token revoked")
+        return username
 
     @classmethod
     def set_favorite(cls, username: str, city_name:str, lat:float, lon:float) -> None:
@@ -153,14 +390,11 @@ class User(db.Model):
             ValueError: If the username is not found in the database.
             sqlite3.Error: If there is an error with the database connection or query.
         """
-        user = cls.query.filter_by(username=username).first()
-        if not user:
+        if not cls._update_columns(username, location_name=city_name, latitude=lat, longitude=lon):
             logger.info("Username %s not found", username)
             raise ValueError(f"Username {username} not found")
-        user.location_name = city_name
-        user.latitude = lat
-        user.longitude = lon
-        db.session.commit()
+        favorite_cache.set(username, (city_name, lat, lon), ttl=FAVORITE_CACHE_TTL)
+        _publish_user_change()
         logger.info("Favorite city set for user %s: %s", username, city_name)
 
     @classmethod
@@ -168,6 +402,11 @@ class User(db.Model):
         """
         Gets the favorite city for a user.
 
+        Results are served from an in-process LRU cache that set_favorite and
+        the other account write paths keep current, so hot users skip the
+        database entirely. Entries expire after FAVORITE_CACHE_TTL seconds
+        so that changes made by other workers are picked up.
+
         Args:
             username (str): The ID of the user.
 
@@ -178,9 +417,216 @@ class User(db.Model):
             ValueError: If the username is not found in the database.
             sqlite3.Error: If there is an error with the database connection or query.
         """
-        user = cls.query.filter_by(username=username).first()
-        if not user:
+        _check_user_changes()
+        favorite = favorite_cache.get(username)
+        if favorite is not None:
+            return favorite
+
+        with DB_QUERY_SECONDS.time(("get_favorite",)):
+            row = db.session.execute(_SELECT_FAVORITE, {"username": username}).first()
+        if row is None:
             logger.info("Username %s not found", username)
             raise ValueError(f"Username {username} not found")
-        return user.location_name, user.latitude, user.longitude
-    
\ No newline at end of file
+        favorite = tuple(row)
+        favorite_cache.set(username, favorite, ttl=FAVORITE_CACHE_TTL)
+        return favorite
+
+    ##########################################################
+    #
+    # Bulk import / export
+    #
+    ##########################################################
+
+    @classmethod
+    @DB_QUERY_SECONDS.timed("existing_usernames")
+    def _existing_usernames(cls, usernames: list) -> set:
+        """Returns which of the given usernames already exist, in one query."""
+        if not usernames:
+            return set()
+        return set(db.session.execute(select(cls.username).where(cls.username.in_(usernames))).scalars())
+
+    @classmethod
+    def bulk_create_accounts(cls, rows: Iterable[Optional[dict]], chunk_size: Optional[int] = None) -> dict:
+        """
+        Creates many accounts in chunked transactions.
+
+        Each chunk is validated, hashed on a worker pool and inserted with a
+        single executemany. Invalid rows (malformed, missing fields, short
+        passwords or duplicate usernames) are reported and skipped without
+        aborting the batch.
+
+        Args:
+            rows (Iterable[Optional[dict]]): Rows with ``username`` and
+                ``password``; None marks a malformed row.
+            chunk_size (int, optional): Rows per transaction.
+
+        Returns:
+            dict: The number of accounts ``created`` and a list of ``errors``,
+            each with the 1-based ``row`` number, ``username`` and ``error``.
+        """
+        chunk_size = chunk_size or BULK_CHUNK_SIZE
+        rounds = cls._bcrypt_rounds()
+        numbered = enumerate(rows, 1)
+        seen = set()
+        created = 0
+        errors = []
+
+        while True:
+            chunk = list(itertools.islice(numbered, chunk_size))
+            if not chunk:
+                break
+            valid = []
+            for row_number, row in chunk:
+                if not isinstance(row, dict):
+                    errors.append({"row": row_number, "username": None, "error": "Malformed row"})
+                    continue
+                username, password = row.get("username"), row.get("password")
+                if not username or not password:
+                    errors.append({"row": row_number, "username": username, "error": "Both username and password are required"})
+                elif len(str(password)) < 8:
+                    errors.append({"row": row_number, "username": username, "error": "Password must be at least 8 characters long"})
+                elif username in seen:
+                    errors.append({"row": row_number, "username": username, "error": f"User with username '{username}' already exists"})
+                else:
+                    seen.add(username)
+                    valid.append((row_number, str(username), str(password)))
+
+            existing = cls._existing_usernames([username for _, username, _ in valid])
+            for row_number, username, _ in valid:
+                if username in existing:
+                    errors.append({"row": row_number, "username": username, "error": f"User with username '{username}' already exists"})
+            valid = [entry for entry in valid if entry[1] not in existing]
+            if not valid:
+                continue
+
+            hashes = _hash_executor.map(lambda password: cls._generate_salted_hash(password, rounds),
+                                        [password for _, _, password in valid])
+            records = [
+                {"username": username, "salt": salt, "password": hashed_password}
+                for (_, username, _), (salt, hashed_password) in zip(valid, hashes)
+            ]
+            try:
+                db.session.execute(insert(cls), records)
+                db.session.commit()
+                created += len(records)
+            except IntegrityError:
+                # A concurrent writer claimed a username; retry the chunk row by row
+                db.session.rollback()
+                for (row_number, username, _), record in zip(valid, records):
+                    try:
+                        db.session.execute(insert(cls), [record])
+                        db.session.commit()
+                        created += 1
+                    except IntegrityError:
+                        db.session.rollback()
+                        errors.append({"row": row_number, "username": username, "error": f"User with username '{username}' already exists"})
+
+        if created:
+            _publish_user_change()
+        errors.sort(key=lambda error: error["row"])
+        logger.info("Bulk account import created %d accounts with %d errors", created, len(errors))
+        return {"created": created, "errors": errors}
+
+    @classmethod
+    def bulk_set_favorites(cls, rows: Iterable[Optional[dict]], chunk_size: Optional[int] = None) -> dict:
+        """
+        Sets favorite locations for many users in chunked transactions.
+
+        Each chunk is applied with a single executemany UPDATE. Rows with
+        missing or non-numeric fields, or naming an unknown user, are reported
+        and skipped without aborting the batch.
+
+        Args:
+            rows (Iterable[Optional[dict]]): Rows with ``username``,
+                ``city_name``, ``latitude`` and ``longitude``; None marks a
+                malformed row.
+            chunk_size (int, optional): Rows per transaction.
+
+        Returns:
+            dict: The number of favorites ``updated`` and a list of ``errors``.
+        """
+        chunk_size = chunk_size or BULK_CHUNK_SIZE
+        statement = (
+            update(cls.__table__)
+            .where(cls.__table__.c.username == bindparam("match_username"))
+            .values(location_name=bindparam("new_location_name"),
+                    latitude=bindparam("new_latitude"),
+                    longitude=bindparam("new_longitude"))
+        )
+        numbered = enumerate(rows, 1)
+        updated = 0
+        errors = []
+
+        while True:
+            chunk = list(itertools.islice(numbered, chunk_size))
+            if not chunk:
+                break
+            valid = {}
+            for row_number, row in chunk:
+                if not isinstance(row, dict):
+                    errors.append({"row": row_number, "username": None, "error": "Malformed row"})
+                    continue
+                username = row.get("username")
+                if not (username and row.get("city_name") and row.get("latitude") not in (None, "")
+                        and row.get("longitude") not in (None, "")):
+                    errors.append({"row": row_number, "username": username, "error": "All fields are required"})
+                    continue
+                try:
+                    lat, lon = float(row["latitude"]), float(row["longitude"])
+                except (TypeError, ValueError):
+                    errors.append({"row": row_number, "username": username, "error": "Latitude and longitude must be numbers"})
+                    continue
+                # A later row for the same user wins, as with repeated set_favorite calls
+                valid[str(username)] = (row_number, str(row["city_name"]), lat, lon)
+
+            existing = cls._existing_usernames(list(valid))
+            params = []
+            for username, (row_number, city_name, lat, lon) in valid.items():
+                if username not in existing:
+                    errors.append({"row": row_number, "username": username, "error": f"Username {username} not found"})
+                    continue
+                params.append({"match_username": username, "new_location_name": city_name,
+                               "new_latitude": lat, "new_longitude": lon})
+            if not params:
+                continue
+            db.session.execute(statement, params)
+            db.session.commit()
+            for entry in params:
+                favorite_cache.set(entry["match_username"],
+                                   (entry["new_location_name"], entry["new_latitude"], entry["new_longitude"]),
+                                   ttl=FAVORITE_CACHE_TTL)
+            updated += len(params)
+
+        if updated:
+            _publish_user_change()
+        errors.sort(key=lambda error: error["row"])
+        logger.info("Bulk favorite import updated %d users with %d errors", updated, len(errors))
+        return {"updated": updated, "errors": errors}
+
+    @classmethod
+    def export_favorites(cls, batch_size: int = 1000) -> Iterator[dict]:
+        """
+        Streams every user's favorite location without loading the table into memory.
+
+        Password hashes are never exported. The rows use the same fields that
+        bulk_set_favorites accepts.
+
+        Args:
+            batch_size (int): Rows fetched from the database per round trip.
+
+        Returns:
+            Iterator[dict]: One row per user, ordered by id.
+        """
+        result = db.session.execute(
+            select(cls.username, cls.location_name, cls.latitude, cls.longitude)
+            .order_by(cls.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for username, location_name, latitude, longitude in result:
+            yield {"username": username, "city_name": location_name, "latitude": latitude, "longitude": longitude}
+
+
+# Column-projected lookups, built once so each call reuses the same statement
+# object and SQLAlchemy's compiled-statement cache skips recompilation.
+_SELECT_CREDENTIALS = select(User.salt, User.password).where(User.username == bindparam("username"))
+_SELECT_FAVORITE = select(User.location_name, User.latitude, User.longitude).where(User.username == bindparam("username"))
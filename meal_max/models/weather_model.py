@@ -1,188 +1,1254 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import logging
 import sqlite3
-from typing import Any
+import threading
+import time
+from typing import Any, Iterator, Optional
+import httpx
 import requests
 from dotenv import load_dotenv
 import os
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 
+from meal_max.models.favorite_location_model import FavoriteLocation
+from meal_max.models.historical_store import HistoricalStore
 from meal_max.models.user_model import User
+from meal_max.utils.cache import TTLCache
+from meal_max.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from meal_max.utils.http_client import AsyncHTTPClient, HTTPClient
+from meal_max.utils import climatology, geo, metrics
 from meal_max.utils.logger import configure_logger
+from meal_max.utils.rate_limit import QuotaExceeded, QuotaGovernor, background_priority
+from meal_max.utils.singleflight import AsyncSingleFlight, SingleFlight
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
-def fetch_current_weather(username: str):
+# Seconds each upstream endpoint's response stays fresh; None never expires.
+CACHE_TTLS = {
+    "weather": 10 * 60,
+    "air_pollution": 10 * 60,
+    "overview": 60 * 60,
+    "onecall": 3 * 60 * 60,
+    "timemachine": None,
+    "day_summary": None,
+}
+
+# Seconds past expiry a cached response is still served while a background
+# refresh runs (stale-while-revalidate).
+STALE_WHILE_REVALIDATE = int(os.getenv("WEATHER_STALE_WHILE_REVALIDATE", "300"))
+
+# Seconds past expiry a cached response is served when the upstream call fails
+# with a 5xx, a 429 or a timeout (stale-if-error).
+STALE_IF_ERROR = int(os.getenv("WEATHER_STALE_IF_ERROR", str(24 * 60 * 60)))
+
+
+def upstream_urls(base_url: str) -> dict:
     """
-    Fetches current weather data for the user's favorite location.
+    Builds the upstream endpoint URLs under an API root.
 
     Args:
-        user_id (int): The ID of the user.
+        base_url (str): The API root, such as ``https://api.openweathermap.org``.
 
     Returns:
-        dict: Current weather data.
+        dict: Upstream endpoint name -> URL.
     """
+    base_url = base_url.rstrip("/")
+    return {
+        "weather": f"{base_url}/data/2.5/weather",
+        "overview": f"{base_url}/data/3.0/onecall/overview",
+        "onecall": f"{base_url}/data/3.0/onecall",
+        "timemachine": f"{base_url}/data/3.0/onecall/timemachine",
+        "day_summary": f"{base_url}/data/3.0/onecall/day_summary",
+        "air_pollution": f"{base_url}/data/2.5/air_pollution",
+    }
 
-    #Error handling for location (What if location returned an empty array etc?)
-    location = User.get_favorite(username)
-    if not location or None in location or len(location) < 3:
-        raise ValueError("Invalid location data provided.")
 
+# Upstream endpoint name -> URL. OPENWEATHER_BASE_URL points every call at
+# another server, such as the local stand-in in benchmarks.fake_openweather.
+UPSTREAM_URLS = upstream_urls(os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org"))
+
+# Fixed query parameters sent to each upstream endpoint.
+UPSTREAM_PARAMS = {
+    "weather": {"units": "metric"},
+    "overview": {},
+    "onecall": {"exclude": "current,minutely,hourly", "units": "metric"},
+    "timemachine": {"units": "metric"},
+    "day_summary": {"units": "metric"},
+    "air_pollution": {},
+}
+
+
+def _cell_precisions(spec: str) -> dict:
+    """Parses per-endpoint geohash precisions such as ``weather=6,onecall=5``."""
+    precisions = {}
+    for item in spec.split(","):
+        if item.strip():
+            endpoint, _, precision = item.partition("=")
+            precisions[endpoint.strip()] = int(precision)
+    return precisions
+
+
+# Geohash characters in each endpoint's cache cell: every location in a cell
+# shares one upstream call made for the cell's center. Current conditions and
+# air quality change over shorter distances than forecasts.
+CELL_PRECISION = {
+    "weather": 6,  # About 1.2 x 0.6 km
+    "air_pollution": 5,  # About 4.9 x 4.9 km
+    "overview": 5,
+    "onecall": 5,
+    "timemachine": 5,
+    "day_summary": 5,
+    **_cell_precisions(os.getenv("WEATHER_CELL_PRECISION", "")),
+}
+
+# Kilometres within which a cached response for a nearby cell stands in when
+# the upstream fails and this cell has nothing cached; 0 disables it.
+NEAREST_FALLBACK_KM = float(os.getenv("WEATHER_NEAREST_FALLBACK_KM", "0"))
+
+http_client = HTTPClient.from_env()
+
+# Endpoint -> index of the cached cells' centers, for nearest-cached lookups.
+# Cells are only indexed while the fallback is enabled, and leave the index with the cache.
+spatial_indexes = {endpoint: geo.SpatialIndex() for endpoint in UPSTREAM_URLS}
+
+weather_cache = TTLCache(maxsize=int(os.getenv("WEATHER_CACHE_MAXSIZE", "4096")),
+                         on_remove=lambda key: spatial_indexes[key[0]].remove(key))
+
+# Persistent store for historical days, which never change once recorded.
+historical_store = HistoricalStore.from_env()
+
+# Coalesces identical upstream requests that are in flight at the same time.
+upstream_flights = SingleFlight()
+
+# Token buckets rationing every upstream call against the OpenWeather quota.
+quota_governor = QuotaGovernor.from_env()
+
+# One circuit breaker per upstream endpoint, shared by the sync and async paths.
+circuit_breakers = {endpoint: CircuitBreaker.from_env(endpoint) for endpoint in UPSTREAM_URLS}
+
+UPSTREAM_SECONDS = metrics.registry.histogram(
+    "upstream_request_duration_seconds", "OpenWeather call latency, including retries.", ("endpoint",))
+UPSTREAM_REQUESTS = metrics.registry.counter(
+    "upstream_requests_total", "OpenWeather calls by endpoint and HTTP status or error type.", ("endpoint", "status"))
+
+# Non-blocking counterparts used by the async (ASGI) serving mode.
+async_http_client = AsyncHTTPClient.from_env()
+async_upstream_flights = AsyncSingleFlight()
+
+# Cache keys with a background revalidation queued or running.
+_revalidating: set = set()
+_revalidating_lock = threading.Lock()
+
+# Shared worker pool used to fan independent upstream calls out concurrently.
+fanout_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("WEATHER_FANOUT_WORKERS", "16")),
+    thread_name_prefix="weather-fanout",
+)
+
+
+def _cache_key(endpoint: str, params: dict) -> tuple:
+    """
+    Builds the cache key for an upstream request.
+
+    Args:
+        endpoint (str): The upstream endpoint name.
+        params (dict): The query parameters sent upstream.
+
+    Returns:
+        tuple: (endpoint, geohash cell, units, day), where day is the
+        historical ``dt`` or ``date`` requested, or None.
+    """
+    return (
+        endpoint,
+        geo.encode(float(params["lat"]), float(params["lon"]), CELL_PRECISION[endpoint]),
+        params.get("units"),
+        params.get("dt", params.get("date")),
+    )
+
+
+def location_cell(endpoint: str, location: tuple) -> str:
+    """
+    Returns the geohash cell a location's upstream calls are made and cached for.
+
+    Args:
+        endpoint (str): The upstream endpoint name.
+        location (tuple): The (name, lat, lon) location.
+
+    Returns:
+        str: The geohash of the location's cell.
+    """
+    return geo.encode(float(location[1]), float(location[2]), CELL_PRECISION[endpoint])
+
+
+def _upstream_request(endpoint: str, location: tuple, **extra_params: Any) -> tuple:
+    """
+    Builds the URL and query parameters for an upstream call.
+
+    The coordinates sent are the center of the location's cell (see
+    CELL_PRECISION), so every location in the cell gets the same response.
+
+    Args:
+        endpoint (str): The upstream endpoint name.
+        location (tuple): The (name, lat, lon) location to query.
+        **extra_params: Additional query parameters, such as ``dt``.
+
+    Returns:
+        tuple: The endpoint name, URL and query parameters.
 
-    #Error checking for the API handling 
+    Raises:
+        ValueError: If the API key is missing.
+    """
     api_key = os.getenv("OPENWEATHER_API_KEY")
     if not api_key:
         raise ValueError("API key is missing or invalid.")
+    _, lat, lon = geo.cell_center(float(location[1]), float(location[2]), CELL_PRECISION[endpoint])
+    params = {"lat": lat, "lon": lon}
+    params.update(UPSTREAM_PARAMS[endpoint])
+    params.update(extra_params)
+    params["appid"] = api_key
+    return endpoint, UPSTREAM_URLS[endpoint], params
+
+
+def _is_upstream_failure(error: Exception) -> bool:
+    """
+    Checks whether an error means the upstream is unavailable rather than the request bad.
+
+    Args:
+        error (Exception): The error raised by an upstream call.
+
+    Returns:
+        bool: True for an exhausted local quota, an open circuit, timeouts,
+        connection errors, 429s and 5xx responses.
+    """
+    if isinstance(error, (QuotaExceeded, CircuitOpenError, requests.Timeout, requests.ConnectionError,
+                          httpx.TransportError)):
+        return True
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def upstream_error_status(error: Exception) -> tuple:
+    """
+    Maps a failed weather fetch to the HTTP status a route should return.
+
+    Args:
+        error (Exception): The error raised by a fetcher.
+
+    Returns:
+        tuple: The status code and the Retry-After seconds, or None. An
+        exhausted quota, locally or at OpenWeather, or an open circuit is a
+        503; a timeout a 504; anything else a 500.
+    """
+    if isinstance(error, (QuotaExceeded, CircuitOpenError)):
+        return 503, max(1, int(error.retry_after + 0.999))
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        retry_after = response.headers.get("Retry-After", "")
+        return 503, int(retry_after) if retry_after.isdigit() else None
+    if isinstance(error, (requests.Timeout, httpx.TimeoutException)):
+        return 504, None
+    return 500, None
+
+
+def _admit(endpoint: str) -> CircuitBreaker:
+    """
+    Checks the endpoint's circuit, then takes an upstream quota token.
+
+    Returns:
+        CircuitBreaker: The endpoint's breaker, to record the call's outcome.
+
+    Raises:
+        CircuitOpenError: If the endpoint's circuit is open.
+        QuotaExceeded: If no quota token is available in time.
+    """
+    breaker = circuit_breakers[endpoint]
+    breaker.before_call()
+    try:
+        quota_governor.acquire(endpoint)
+    except QuotaExceeded:
+        breaker.release()
+        raise
+    return breaker
+
+
+async def _admit_async(endpoint: str) -> CircuitBreaker:
+    """Async variant of _admit."""
+    breaker = circuit_breakers[endpoint]
+    breaker.before_call()
+    try:
+        await quota_governor.acquire_async(endpoint)
+    except QuotaExceeded:
+        breaker.release()
+        raise
+    return breaker
+
+
+def _take_retry_token(endpoint: str) -> bool:
+    """
+    Takes an upstream quota token for a retry, so every attempt is paid for.
+
+    Returns:
+        bool: Whether a token was available in time; if not, the retry is skipped.
+    """
+    try:
+        quota_governor.acquire(endpoint)
+    except QuotaExceeded:
+        return False
+    return True
+
+
+async def _take_retry_token_async(endpoint: str) -> bool:
+    """Async variant of _take_retry_token."""
+    try:
+        await quota_governor.acquire_async(endpoint)
+    except QuotaExceeded:
+        return False
+    return True
+
+
+def _record_outcome(endpoint: str, breaker: CircuitBreaker, started: float,
+                    status: Optional[int] = None, error: Optional[Exception] = None) -> None:
+    """
+    Records an upstream call's latency and status, and its outcome on the circuit.
+
+    Only upstream failures count against the circuit; client errors such
+    as a 401 do not.
 
-    url = "https://api.openweathermap.org/data/2.5/weather"
-    params = {
-        "lat": location[1],
-        "lon": location[2],
-        "units": "metric",
-        "appid": api_key,
+    Args:
+        endpoint (str): The upstream endpoint name.
+        breaker (CircuitBreaker): The endpoint's breaker.
+        started (float): The call's perf_counter start time.
+        status (int, optional): The response status of a successful call.
+        error (Exception, optional): The error the call raised.
+    """
+    UPSTREAM_SECONDS.observe(time.perf_counter() - started, (endpoint,))
+    if error is not None:
+        status = getattr(getattr(error, "response", None), "status_code", None) or type(error).__name__
+    UPSTREAM_REQUESTS.inc((endpoint, str(status)))
+    if error is not None and _is_upstream_failure(error):
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+
+def _set_cached(endpoint: str, key: tuple, data: Any) -> None:
+    """Caches an upstream response, retained past expiry for stale serving."""
+    weather_cache.set(key, data, ttl=CACHE_TTLS[endpoint],
+                      stale_ttl=max(STALE_WHILE_REVALIDATE, STALE_IF_ERROR))
+    # Historical responses are only valid for their own date
+    if NEAREST_FALLBACK_KM > 0 and key[3] is None:
+        spatial_indexes[endpoint].add(key, *geo.decode(key[1]))
+
+
+def nearest_cached(endpoint: str, lat: float, lon: float, max_km: float) -> Optional[tuple]:
+    """
+    Finds the cached response for the nearest cell within a radius.
+
+    Index entries whose response has since left the cache are dropped as
+    they are found.
+
+    Args:
+        endpoint (str): The upstream endpoint name.
+        lat (float): Latitude of the point of interest.
+        lon (float): Longitude of the point of interest.
+        max_km (float): The search radius in kilometres.
+
+    Returns:
+        tuple, optional: (decoded JSON response, age in seconds, whether it
+        is stale, distance in km to the cell's center), or None.
+    """
+    index = spatial_indexes[endpoint]
+    for distance, key in index.nearby(lat, lon, max_km):
+        entry = weather_cache.lookup(key)
+        if entry is None:
+            index.remove(key)
+            continue
+        return (*entry, distance)
+    return None
+
+
+def _nearest_entry(endpoint: str, key: tuple) -> Optional[tuple]:
+    """Returns a nearby cell's cached entry, marked stale, to stand in for a failed call."""
+    if NEAREST_FALLBACK_KM <= 0 or key[3] is not None:
+        return None
+    found = nearest_cached(endpoint, *geo.decode(key[1]), NEAREST_FALLBACK_KM)
+    if found is None:
+        return None
+    logger.warning("Serving cached %s response from %.1f km away for %s", endpoint, found[3], key)
+    return found[0], found[1], True
+
+
+def _serve_stale(endpoint: str, entry: Optional[tuple]) -> bool:
+    """Checks whether a stale entry is young enough to serve while revalidating."""
+    return (entry is not None and entry[2]
+            and entry[1] - CACHE_TTLS[endpoint] <= STALE_WHILE_REVALIDATE)
+
+
+def _claim_revalidation(key: tuple) -> bool:
+    """Marks a key as revalidating, returning False if it already was."""
+    with _revalidating_lock:
+        if key in _revalidating:
+            return False
+        _revalidating.add(key)
+        return True
+
+
+def _release_revalidation(key: tuple) -> None:
+    with _revalidating_lock:
+        _revalidating.discard(key)
+
+
+def _get_json_entry(endpoint: str, url: str, params: dict, refresh: bool = False) -> tuple:
+    """
+    Fetches an upstream JSON document, serving it from the cache when possible.
+
+    A fresh entry is returned as is. An entry that expired less than
+    STALE_WHILE_REVALIDATE seconds ago is returned immediately while a
+    background task refreshes it. Otherwise the upstream is called; if it
+    fails with a 5xx, a 429 or a timeout, an entry that expired less than
+    STALE_IF_ERROR seconds ago is returned instead of the error.
+
+    On a cache miss, concurrent callers asking for the same cache key share
+    a single upstream request and receive its result or exception.
+
+    Args:
+        endpoint (str): The upstream endpoint name, used to pick the TTL.
+        url (str): The upstream URL.
+        params (dict): The query parameters, including the API key.
+        refresh (bool): Whether to skip the cache lookup and re-fetch.
+
+    Returns:
+        tuple: The decoded JSON response, its age in seconds and whether
+        it is stale.
+
+    Raises:
+        requests.RequestException: If the upstream call fails or times out
+            and no stale entry can stand in.
+    """
+    key = _cache_key(endpoint, params)
+
+    def fetch():
+        breaker = _admit(endpoint)
+        started = time.perf_counter()
+        try:
+            response = http_client.get(url, params=params, before_retry=lambda: _take_retry_token(endpoint))
+            response.raise_for_status()
+        except Exception as e:
+            _record_outcome(endpoint, breaker, started, error=e)
+            raise
+        except BaseException:
+            # Cancelled or interrupted: no outcome, but a half-open trial slot must not stay taken
+            breaker.release()
+            raise
+        _record_outcome(endpoint, breaker, started, status=response.status_code)
+        data = response.json()
+        _set_cached(endpoint, key, data)
+        return data
+
+    entry = None if refresh else weather_cache.lookup(key)
+    if entry is not None and not entry[2]:
+        logger.debug("Cache hit for %s", key)
+        return entry
+    if _serve_stale(endpoint, entry):
+        if _claim_revalidation(key):
+            def revalidate():
+                try:
+                    with background_priority():
+                        upstream_flights.do(key, fetch)
+                except Exception as e:
+                    logger.warning("Background refresh for %s failed: %s", key, str(e))
+                finally:
+                    _release_revalidation(key)
+            fanout_executor.submit(revalidate)
+        logger.debug("Serving stale entry for %s while revalidating", key)
+        return entry
+
+    try:
+        return upstream_flights.do(key, fetch), 0.0, False
+    except Exception as e:
+        if not _is_upstream_failure(e):
+            raise
+        if entry is None:
+            entry = _nearest_entry(endpoint, key)
+            if entry is None:
+                raise
+        logger.warning("Upstream failed for %s, serving stale entry: %s", key, str(e))
+        return entry
+
+
+def _get_json(endpoint: str, url: str, params: dict, refresh: bool = False) -> Any:
+    """
+    Fetches an upstream JSON document; see _get_json_entry.
+
+    Returns:
+        Any: The decoded JSON response.
+    """
+    return _get_json_entry(endpoint, url, params, refresh)[0]
+
+
+def _freshness(entry: tuple) -> dict:
+    """Returns the age and stale markers added to a fetcher's result."""
+    return {"age": int(entry[1]), "stale": entry[2]}
+
+
+def refresh_cached(endpoint: str, location: tuple) -> Any:
+    """
+    Re-fetches one upstream document for a location and stores it in the cache.
+
+    Used to pre-warm the cache ahead of user requests; the cache entry's TTL
+    restarts from now.
+
+    Args:
+        endpoint (str): The upstream endpoint name, such as "weather".
+        location (tuple): The (name, lat, lon) location to query.
+
+    Returns:
+        Any: The decoded JSON response.
+
+    Raises:
+        ValueError: If the API key is missing.
+        requests.RequestException: If the upstream call fails or times out.
+    """
+    return _get_json(*_upstream_request(endpoint, location), refresh=True)
+
+
+def upstream_stats() -> dict:
+    """
+    Returns counters for the layers in front of the upstream API.
+
+    Returns:
+        dict: Cache, request-coalescing, remaining-quota and circuit
+        breaker statistics, plus the cells indexed per endpoint.
+    """
+    return {
+        "cache": weather_cache.stats(),
+        "single_flight": upstream_flights.stats(),
+        "async_single_flight": async_upstream_flights.stats(),
+        "quota": quota_governor.stats(),
+        "circuits": {endpoint: breaker.stats() for endpoint, breaker in circuit_breakers.items()},
+        "spatial_index": {endpoint: len(index) for endpoint, index in spatial_indexes.items()},
     }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
+
+
+def _collect_upstream_gauges() -> list:
+    """Reports the remaining quota and circuit states for /metrics."""
+    quota = quota_governor.stats()
+    circuit_values = {"closed": 0, "half_open": 1, "open": 2}
+    return [
+        ("upstream_quota_remaining", "gauge", "Tokens left in each upstream quota bucket.",
+         [({"bucket": name}, bucket["remaining"]) for name, bucket in quota["buckets"].items()]),
+        ("upstream_quota_rejected_total", "counter", "Upstream calls refused for lack of quota.",
+         [({}, quota["rejected"])]),
+        ("upstream_circuit_state", "gauge", "Circuit state per endpoint: 0 closed, 1 half-open, 2 open.",
+         [({"endpoint": endpoint}, circuit_values[breaker.state]) for endpoint, breaker in circuit_breakers.items()]),
+    ]
+
+
+metrics.registry.register_collector(metrics.cache_collector("weather", weather_cache.stats))
+metrics.registry.register_collector(_collect_upstream_gauges)
+
+
+def fetch_current_weather(username: str, location: Optional[tuple] = None):
+    """
+    Fetches current weather data for the user's favorite location.
+
+    Args:
+        user_id (int): The ID of the user.
+        location (tuple, optional): A pre-resolved (name, lat, lon) favorite location.
+
+    Returns:
+        dict: Current weather data.
+    """
+
+    #Error handling for location (What if location returned an empty array etc?)
+    if location is None:
+        location = User.get_favorite(username)
+    if not location or None in location or len(location) < 3:
+        raise ValueError("Invalid location data provided.")
+
+    entry = _get_json_entry(*_upstream_request("weather", location))
     return {
         "location": location[0],
-        "current_weather": response.json()
+        "current_weather": entry[0],
+        **_freshness(entry)
     }
 
-def fetch_weather_overview(username: str):
+def fetch_weather_overview(username: str, location: Optional[tuple] = None):
     """
     Fetches weather overview data for the user's favorite location.
 
     Args:
         username (str): The username of the user.
+        location (tuple, optional): A pre-resolved (name, lat, lon) favorite location.
 
     Returns:
         dict: Weather overview data.
     """
     # Error handling for location
-    location = User.get_favorite(username)
+    if location is None:
+        location = User.get_favorite(username)
     if not location or None in location or len(location) < 3:
         raise ValueError("Invalid location data provided.")
 
-    # Error checking for the API key
-    api_key = os.getenv("OPENWEATHER_API_KEY")
-    if not api_key:
-        raise ValueError("API key is missing or invalid.")
-
-    url = "https://api.openweathermap.org/data/3.0/onecall/overview"
-    params = {
-        "lat": location[1],
-        "lon": location[2],
-        "appid": api_key,
-    }
-    
-    # Sending the GET request to the OpenWeather API
-    response = requests.get(url, params=params)
-    response.raise_for_status()  # This will raise an error if the API call fails
-    
-    # Return the response data along with the location
+    # Return the response data (cached or from the OpenWeather API) along with the location
+    entry = _get_json_entry(*_upstream_request("overview", location))
     return {
         "location": location[0],
-        "weather_overview": response.json()  # JSON response from OpenWeather API
+        "weather_overview": entry[0],
+        **_freshness(entry)
     }
 
 
-def fetch_forecast(username: str):
+def fetch_forecast(username: str, location: Optional[tuple] = None):
     """
     Fetches a 7-day weather forecast for the user's favorite location.
 
     Args:
         user_id (int): The ID of the user.
+        location (tuple, optional): A pre-resolved (name, lat, lon) favorite location.
 
     Returns:
         dict: Weather forecast data.
     """
-    location = User.get_favorite(username)
+    if location is None:
+        location = User.get_favorite(username)
 
-    api_key = os.getenv("OPENWEATHER_API_KEY")
-    if not api_key:
-        raise ValueError("API key is missing or invalid.")
-    
-    url = "https://api.openweathermap.org/data/3.0/onecall"
-    params = {
-        "lat": location[1],
-        "lon": location[2],
-        "exclude": "current,minutely,hourly",
-        "units": "metric",
-        "appid": api_key,
-    }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
+    entry = _get_json_entry(*_upstream_request("onecall", location))
     return {
         "location": location[0],
-        "forecast": response.json().get("daily", [])
+        "forecast": entry[0].get("daily", []),
+        **_freshness(entry)
     }
 
-def fetch_historical_weather(username: str, query_date: str):
+def fetch_historical_weather(username: str, query_date: str, location: Optional[tuple] = None):
     """
     Fetches historical weather data for the user's favorite location.
 
     Args:
         user_id (int): The ID of the user.
         query_date (str): The date in YYYY-MM-DD format.
+        location (tuple, optional): A pre-resolved (name, lat, lon) favorite location.
 
     Returns:
         dict: Historical weather data.
     """
-    location = User.get_favorite(username)
+    if location is None:
+        location = User.get_favorite(username)
     
     unix_timestamp = int(datetime.strptime(query_date, "%Y-%m-%d").timestamp())
     #end_timestamp = int(datetime.now().timestamp())
+    request = _upstream_request("timemachine", location, dt=unix_timestamp)
+
+    # Past days are immutable, so the on-disk store is checked first
+    if not _is_past(query_date):
+        historical_weather = _get_json(*request)
+    else:
+        cell = location_cell("timemachine", location)
+        historical_weather = historical_store.get("timemachine", cell, query_date)
+        if historical_weather is None:
+            historical_weather = _get_json(*request)
+            historical_store.put("timemachine", cell, query_date, historical_weather)
 
-    api_key = os.getenv("OPENWEATHER_API_KEY")
-    if not api_key:
-        raise ValueError("API key is missing or invalid.")
-    
-    url = "https://api.openweathermap.org/data/3.0/onecall/timemachine"
-    params = {
-        "lat": location[1],
-        "lon": location[2],
-        "dt": unix_timestamp,
-        "units": "metric",
-        "appid": api_key,
-    }
-    
-    response = requests.get(url, params=params)
-    response.raise_for_status()
     return {
         "location": location[0],
         "date": query_date,
-        "historical_weather": response.json()
+        "historical_weather": historical_weather
     }
 
-def fetch_air_quality(username: str):
+# Upper bound on the number of days a single historical range request may cover.
+MAX_HISTORICAL_RANGE_DAYS = int(os.getenv("MAX_HISTORICAL_RANGE_DAYS", "366"))
+
+# Maximum number of per-day timemachine calls a range request keeps in flight.
+HISTORICAL_RANGE_CONCURRENCY = int(os.getenv("HISTORICAL_RANGE_CONCURRENCY", "8"))
+
+
+def _is_past(query_date: str) -> bool:
+    """
+    Returns whether a day ended before today in UTC.
+
+    Only such days are final, so only they are kept in the historical
+    store; today and later dates are fetched and cached like live data.
+
+    Args:
+        query_date (str): The date in YYYY-MM-DD format.
+
+    Returns:
+        bool: True if the date is before today's UTC date.
+    """
+    return query_date < datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+def _date_range(start_date: str, end_date: str) -> list:
+    """
+    Lists every date from start_date to end_date inclusive.
+
+    Args:
+        start_date (str): The first date in YYYY-MM-DD format.
+        end_date (str): The last date in YYYY-MM-DD format.
+
+    Returns:
+        list: The dates in YYYY-MM-DD format, in order.
+
+    Raises:
+        ValueError: If a date is malformed, the range is reversed or too long.
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    if end < start:
+        raise ValueError("End date must not be before start date.")
+    days = (end - start).days + 1
+    if days > MAX_HISTORICAL_RANGE_DAYS:
+        raise ValueError(f"Date range must not exceed {MAX_HISTORICAL_RANGE_DAYS} days.")
+    return [(start + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(days)]
+
+def fetch_historical_weather_range(username: str, start_date: str, end_date: str,
+                                   max_concurrency: Optional[int] = None) -> Iterator[dict]:
+    """
+    Fetches historical weather for every day in a date range.
+
+    The dates and the favorite location are validated up front, and every
+    day already in the historical store is read in a single query. The
+    remaining per-day timemachine calls then run concurrently, with at most ``max_concurrency``
+    in flight, and results are yielded in date order as they become
+    available. A day that fails is yielded with an ``error`` entry instead
+    of stopping the stream.
+
+    Args:
+        username (str): The username of the user.
+        start_date (str): The first date in YYYY-MM-DD format.
+        end_date (str): The last date in YYYY-MM-DD format.
+        max_concurrency (int, optional): Maximum concurrent upstream calls.
+            Defaults to HISTORICAL_RANGE_CONCURRENCY.
+
+    Returns:
+        Iterator[dict]: One historical weather entry per day, in date order.
+
+    Raises:
+        ValueError: If the dates, location or API key are invalid.
+    """
+    dates = _date_range(start_date, end_date)
+    location = User.get_favorite(username)
+    if not location or None in location or len(location) < 3:
+        raise ValueError("Invalid location data provided.")
+    if not os.getenv("OPENWEATHER_API_KEY"):
+        raise ValueError("API key is missing or invalid.")
+    window = max(1, max_concurrency or HISTORICAL_RANGE_CONCURRENCY)
+
+    stored = historical_store.get_many("timemachine", location_cell("timemachine", location),
+                                       [query_date for query_date in dates if _is_past(query_date)])
+
+    def fetch_day(query_date):
+        return fetch_historical_weather(username, query_date, location)["historical_weather"]
+
+    def stream():
+        for query_date, historical_weather in _fetch_days(dates, stored, fetch_day, window):
+            if isinstance(historical_weather, Exception):
+                logger.error("Historical weather for %s on %s failed: %s", username, query_date, str(historical_weather))
+                yield {"location": location[0], "date": query_date, "error": str(historical_weather)}
+            else:
+                yield {"location": location[0], "date": query_date, "historical_weather": historical_weather}
+
+    return stream()
+
+def _fetch_days(dates: list, stored: dict, fetch_day, window: int) -> Iterator[tuple]:
+    """
+    Fetches the days missing from ``stored`` concurrently, in date order.
+
+    Days are submitted to the fan-out pool in order with at most ``window``
+    in flight, and each is yielded once it and every earlier day are done.
+
+    Args:
+        dates (list): The dates in YYYY-MM-DD format, in order.
+        stored (dict): Date -> payload for days already in the historical store.
+        fetch_day (Callable[[str], Any]): Fetches one day's payload.
+        window (int): Maximum concurrent fetches.
+
+    Returns:
+        Iterator[tuple]: (date, payload) pairs, with the exception in place
+        of the payload for a day whose fetch failed.
+    """
+    remaining = iter(dates)
+    pending = deque()
+    in_flight = 0
+
+    def fill():
+        # Queue days in order until `window` upstream calls are in flight
+        nonlocal in_flight
+        while in_flight < window:
+            query_date = next(remaining, None)
+            if query_date is None:
+                return
+            if query_date in stored:
+                pending.append((query_date, None))
+                continue
+            pending.append((query_date, fanout_executor.submit(fetch_day, query_date)))
+            in_flight += 1
+
+    fill()
+    while pending:
+        query_date, future = pending.popleft()
+        if future is None:
+            yield query_date, stored[query_date]
+            continue
+        try:
+            result = future.result()
+        except Exception as e:
+            result = e
+        # Only a finished call frees a slot, so at most `window` are ever in flight
+        in_flight -= 1
+        fill()
+        yield query_date, result
+
+def _fetch_day_summary(location: tuple, query_date: str) -> dict:
+    """
+    Fetches OpenWeather's daily aggregates for one day, from the historical store if present.
+
+    Only days before today in UTC are read from or written to the store;
+    see _is_past.
+
+    Args:
+        location (tuple): The (name, lat, lon) location.
+        query_date (str): The date in YYYY-MM-DD format.
+
+    Returns:
+        dict: The ``onecall/day_summary`` payload.
+    """
+    request = _upstream_request("day_summary", location, date=query_date)
+    if not _is_past(query_date):
+        return _get_json(*request)
+    cell = location_cell("day_summary", location)
+    summary = historical_store.get("day_summary", cell, query_date)
+    if summary is None:
+        summary = _get_json(*request)
+        historical_store.put("day_summary", cell, query_date, summary)
+    return summary
+
+def fetch_historical_statistics(username: str, start_date: str, end_date: str,
+                                percentiles: Optional[list] = None, window: Optional[int] = None,
+                                base_temperature: Optional[float] = None) -> dict:
+    """
+    Summarizes historical weather over a date range on the server.
+
+    Each day's minimum and maximum temperature and total precipitation come
+    from OpenWeather's ``onecall/day_summary`` aggregates, read from the
+    historical store or fetched concurrently like a historical range. The
+    days are loaded into NumPy arrays and only the summary is returned; see
+    climatology.summarize for the statistics.
+
+    Args:
+        username (str): The username of the user.
+        start_date (str): The first date in YYYY-MM-DD format.
+        end_date (str): The last date in YYYY-MM-DD format.
+        percentiles (list, optional): Percentiles of daily mean temperature, from 0 to 100.
+        window (int, optional): Days in the rolling windows.
+        base_temperature (float, optional): Base for degree-days, in degrees Celsius.
+
+    Returns:
+        dict: The location, the range, the statistics and an ``errors``
+        mapping of each date that could not be fetched to its error.
+
+    Raises:
+        ValueError: If the dates, location, API key or statistics parameters are invalid.
+    """
+    percentiles = list(climatology.DEFAULT_PERCENTILES if percentiles is None else percentiles)
+    if any(not 0 <= percentile <= 100 for percentile in percentiles):
+        raise ValueError("Percentiles must be between 0 and 100.")
+    window = climatology.DEFAULT_WINDOW if window is None else window
+    if window < 1:
+        raise ValueError("Window must be at least 1 day.")
+    if base_temperature is None:
+        base_temperature = climatology.DEFAULT_BASE_TEMPERATURE
+
+    dates = _date_range(start_date, end_date)
+    location = User.get_favorite(username)
+    if not location or None in location or len(location) < 3:
+        raise ValueError("Invalid location data provided.")
+    if not os.getenv("OPENWEATHER_API_KEY"):
+        raise ValueError("API key is missing or invalid.")
+
+    stored = historical_store.get_many("day_summary", location_cell("day_summary", location),
+                                       [query_date for query_date in dates if _is_past(query_date)])
+    summaries = []
+    errors = {}
+    days = _fetch_days(dates, stored, lambda query_date: _fetch_day_summary(location, query_date),
+                       max(1, HISTORICAL_RANGE_CONCURRENCY))
+    for index, (query_date, summary) in enumerate(days):
+        if isinstance(summary, Exception):
+            logger.error("Day summary for %s on %s failed: %s", username, query_date, str(summary))
+            errors[query_date] = str(summary)
+        else:
+            summaries.append((index, summary))
+
+    statistics = climatology.summarize(dates, *climatology.daily_arrays(len(dates), summaries),
+                                       percentiles=percentiles, window=window,
+                                       base_temperature=base_temperature)
+    return {
+        "location": location[0],
+        "start": start_date,
+        "end": end_date,
+        "days": len(dates),
+        **statistics,
+        "errors": errors,
+    }
+
+def fetch_air_quality(username: str, location: Optional[tuple] = None):
     """
     Fetches air quality data for the user's favorite location.
 
     Args:
         user_id (int): The ID of the user.
+        location (tuple, optional): A pre-resolved (name, lat, lon) favorite location.
 
     Returns:
         dict: Air quality data.
     """
+    if location is None:
+        location = User.get_favorite(username)
+    entry = _get_json_entry(*_upstream_request("air_pollution", location))
+    return {
+        "location": location[0],
+        "air_quality": entry[0],
+        **_freshness(entry)
+    }
+
+
+
+# Dashboard section name -> fetcher; each fetcher returns the section under the same key.
+DASHBOARD_SECTIONS = {
+    "current_weather": fetch_current_weather,
+    "forecast": fetch_forecast,
+    "air_quality": fetch_air_quality,
+    "weather_overview": fetch_weather_overview,
+}
+
+DEFAULT_DASHBOARD_SECTIONS = ("current_weather", "forecast", "air_quality")
+
+
+def fetch_dashboard(username: str, sections: Optional[list] = None):
+    """
+    Fetches several weather sections for the user's favorite location at once.
+
+    The favorite location is looked up once and the upstream calls for every
+    section run concurrently, so the total time is close to the slowest
+    single call. A failing section is reported under ``errors`` instead of
+    failing the whole request.
+
+    Args:
+        username (str): The username of the user.
+        sections (list, optional): Names from DASHBOARD_SECTIONS to include.
+            Defaults to current weather, forecast and air quality.
+
+    Returns:
+        dict: The location, one entry per successful section, an
+        ``errors`` mapping of section name to error message and the
+        ``stale`` sections served from an expired cache entry.
+
+    Raises:
+        ValueError: If a section name is unknown or the location is invalid.
+    """
+    sections = list(sections or DEFAULT_DASHBOARD_SECTIONS)
+    unknown = [name for name in sections if name not in DASHBOARD_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown dashboard sections: {', '.join(unknown)}")
+
     location = User.get_favorite(username)
-    api_key = os.getenv("OPENWEATHER_API_KEY")
-    if not api_key:
-        raise ValueError("API key is missing or invalid.")
-    
-    url = "https://api.openweathermap.org/data/2.5/air_pollution"
-    params = {
-        "lat": location[1],
-        "lon": location[2],
-        "appid": api_key,
+    if not location or None in location or len(location) < 3:
+        raise ValueError("Invalid location data provided.")
+
+    futures = {
+        name: fanout_executor.submit(DASHBOARD_SECTIONS[name], username, location)
+        for name in sections
     }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
+    dashboard = {"location": location[0], "errors": {}, "stale": []}
+    for name, future in futures.items():
+        try:
+            result = future.result()
+            dashboard[name] = result[name]
+            if result.get("stale"):
+                dashboard["stale"].append(name)
+        except Exception as e:
+            logger.error("Dashboard section %s failed for %s: %s", name, username, str(e))
+            dashboard["errors"][name] = str(e)
+    return dashboard
+
+
+def _locations_weather_entry(location: tuple, result: Any) -> dict:
+    """Builds one location's entry in a multi-location weather response."""
+    entry = {"position": location[3], "location": location[0], "latitude": location[1], "longitude": location[2]}
+    if isinstance(result, Exception):
+        entry["error"] = str(result)
+    else:
+        entry["current_weather"] = result["current_weather"]
+        entry["age"] = result["age"]
+        entry["stale"] = result["stale"]
+    return entry
+
+
+def fetch_locations_weather(username: str):
+    """
+    Fetches current weather for every one of the user's favorite locations.
+
+    The locations are read in one query. Locations in the same cache cell
+    (see CELL_PRECISION) share one upstream call, and
+    the distinct calls run concurrently. A failing location carries an
+    ``error`` instead of failing the whole request.
+
+    Args:
+        username (str): The username of the user.
+
+    Returns:
+        dict: ``locations``, one entry per favorite location in position
+        order with its current weather or error, and ``upstream_calls``,
+        the number of distinct cells fetched.
+
+    Raises:
+        ValueError: If the user does not exist.
+    """
+    locations = FavoriteLocation.get_locations(username)
+    futures = {}
+    for location in locations:
+        key = location_cell("weather", location)
+        if key not in futures:
+            futures[key] = fanout_executor.submit(fetch_current_weather, username, location)
+    results = []
+    for location in locations:
+        try:
+            result = futures[location_cell("weather", location)].result()
+        except Exception as e:
+            logger.error("Weather for location %s failed for %s: %s", location[3], username, str(e))
+            result = e
+        results.append(_locations_weather_entry(location, result))
+    return {"locations": results, "upstream_calls": len(futures)}
+
+
+##########################################################
+#
+# Async variants for the ASGI serving mode
+#
+##########################################################
+
+async def _get_json_entry_async(endpoint: str, url: str, params: dict) -> tuple:
+    """
+    Async variant of _get_json_entry that never blocks the event loop on I/O.
+
+    Shares the response cache and the stale-while-revalidate and
+    stale-if-error rules with the sync path; background refreshes run as
+    tasks on the event loop. Identical concurrent misses within the event
+    loop are coalesced into one upstream request.
+
+    Args:
+        endpoint (str): The upstream endpoint name, used to pick the TTL.
+        url (str): The upstream URL.
+        params (dict): The query parameters, including the API key.
+
+    Returns:
+        tuple: The decoded JSON response, its age in seconds and whether
+        it is stale.
+
+    Raises:
+        httpx.HTTPError: If the upstream call fails or times out and no
+            stale entry can stand in.
+    """
+    key = _cache_key(endpoint, params)
+
+    async def fetch():
+        breaker = await _admit_async(endpoint)
+        started = time.perf_counter()
+        try:
+            response = await async_http_client.get(
+                url, params=params, before_retry=lambda: _take_retry_token_async(endpoint))
+            response.raise_for_status()
+        except Exception as e:
+            _record_outcome(endpoint, breaker, started, error=e)
+            raise
+        except BaseException:
+            # Cancelled or interrupted: no outcome, but a half-open trial slot must not stay taken
+            breaker.release()
+            raise
+        _record_outcome(endpoint, breaker, started, status=response.status_code)
+        data = response.json()
+        _set_cached(endpoint, key, data)
+        return data
+
+    entry = weather_cache.lookup(key)
+    if entry is not None and not entry[2]:
+        return entry
+    if _serve_stale(endpoint, entry):
+        if _claim_revalidation(key):
+            async def revalidate():
+                try:
+                    with background_priority():
+                        await async_upstream_flights.do(key, fetch)
+                except Exception as e:
+                    logger.warning("Background refresh for %s failed: %s", key, str(e))
+                finally:
+                    _release_revalidation(key)
+            task = asyncio.ensure_future(revalidate())
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        return entry
+
+    try:
+        return await async_upstream_flights.do(key, fetch), 0.0, False
+    except Exception as e:
+        if not _is_upstream_failure(e):
+            raise
+        if entry is None:
+            entry = _nearest_entry(endpoint, key)
+            if entry is None:
+                raise
+        logger.warning("Upstream failed for %s, serving stale entry: %s", key, str(e))
+        return entry
+
+
+async def _get_json_async(endpoint: str, url: str, params: dict) -> Any:
+    """Async variant of _get_json."""
+    return (await _get_json_entry_async(endpoint, url, params))[0]
+
+
+# Strong references to background refresh tasks so they are not garbage collected.
+_background_tasks: set = set()
+
+
+async def _resolve_location_async(username: str, location: Optional[tuple], validate: bool = False) -> tuple:
+    """
+    Resolves the favorite location off the event loop.
+
+    The database lookup runs in a worker thread that inherits the caller's
+    context, so the caller must have pushed a Flask app context.
+
+    Args:
+        username (str): The username of the user.
+        location (tuple, optional): A pre-resolved location, returned as is.
+        validate (bool): Whether to reject incomplete locations.
+
+    Returns:
+        tuple: The (name, lat, lon) favorite location.
+
+    Raises:
+        ValueError: If the user does not exist or the location is invalid.
+    """
+    if location is None:
+        location = await asyncio.to_thread(User.get_favorite, username)
+    if validate and (not location or None in location or len(location) < 3):
+        raise ValueError("Invalid location data provided.")
+    return location
+
+
+async def fetch_current_weather_async(username: str, location: Optional[tuple] = None):
+    """Async variant of fetch_current_weather."""
+    location = await _resolve_location_async(username, location, validate=True)
+    entry = await _get_json_entry_async(*_upstream_request("weather", location))
     return {
         "location": location[0],
-        "air_quality": response.json()
+        "current_weather": entry[0],
+        **_freshness(entry)
     }
 
+async def fetch_weather_overview_async(username: str, location: Optional[tuple] = None):
+    """Async variant of fetch_weather_overview."""
+    location = await _resolve_location_async(username, location, validate=True)
+    entry = await _get_json_entry_async(*_upstream_request("overview", location))
+    return {
+        "location": location[0],
+        "weather_overview": entry[0],
+        **_freshness(entry)
+    }
+
+async def fetch_forecast_async(username: str, location: Optional[tuple] = None):
+    """Async variant of fetch_forecast."""
+    location = await _resolve_location_async(username, location)
+    entry = await _get_json_entry_async(*_upstream_request("onecall", location))
+    return {
+        "location": location[0],
+        "forecast": entry[0].get("daily", []),
+        **_freshness(entry)
+    }
+
+async def fetch_air_quality_async(username: str, location: Optional[tuple] = None):
+    """Async variant of fetch_air_quality."""
+    location = await _resolve_location_async(username, location)
+    entry = await _get_json_entry_async(*_upstream_request("air_pollution", location))
+    return {
+        "location": location[0],
+        "air_quality": entry[0],
+        **_freshness(entry)
+    }
+
+async def fetch_historical_weather_async(username: str, query_date: str, location: Optional[tuple] = None):
+    """Async variant of fetch_historical_weather, sharing its on-disk store."""
+    location = await _resolve_location_async(username, location)
+    unix_timestamp = int(datetime.strptime(query_date, "%Y-%m-%d").timestamp())
+    request = _upstream_request("timemachine", location, dt=unix_timestamp)
+
+    # The store's SQLite calls block, so they run off the event loop
+    if not _is_past(query_date):
+        historical_weather = await _get_json_async(*request)
+    else:
+        cell = location_cell("timemachine", location)
+        historical_weather = await asyncio.to_thread(historical_store.get, "timemachine", cell, query_date)
+        if historical_weather is None:
+            historical_weather = await _get_json_async(*request)
+            await asyncio.to_thread(historical_store.put, "timemachine", cell, query_date, historical_weather)
+    return {
+        "location": location[0],
+        "date": query_date,
+        "historical_weather": historical_weather
+    }
+
+ASYNC_DASHBOARD_SECTIONS = {
+    "current_weather": fetch_current_weather_async,
+    "forecast": fetch_forecast_async,
+    "air_quality": fetch_air_quality_async,
+    "weather_overview": fetch_weather_overview_async,
+}
+
+async def fetch_dashboard_async(username: str, sections: Optional[list] = None):
+    """Async variant of fetch_dashboard; sections are gathered on the event loop."""
+    sections = list(sections or DEFAULT_DASHBOARD_SECTIONS)
+    unknown = [name for name in sections if name not in ASYNC_DASHBOARD_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown dashboard sections: {', '.join(unknown)}")
+    location = await _resolve_location_async(username, None, validate=True)
+
+    results = await asyncio.gather(
+        *(ASYNC_DASHBOARD_SECTIONS[name](username, location) for name in sections),
+        return_exceptions=True,
+    )
+    dashboard = {"location": location[0], "errors": {}, "stale": []}
+    for name, result in zip(sections, results):
+        if isinstance(result, Exception):
+            logger.error("Dashboard section %s failed for %s: %s", name, username, str(result))
+            dashboard["errors"][name] = str(result)
+        else:
+            dashboard[name] = result[name]
+            if result.get("stale"):
+                dashboard["stale"].append(name)
+    return dashboard
+
+
+async def fetch_locations_weather_async(username: str):
+    """Async variant of fetch_locations_weather; distinct cells are gathered on the event loop."""
+    locations = await asyncio.to_thread(FavoriteLocation.get_locations, username)
+    distinct = {}
+    for location in locations:
+        distinct.setdefault(location_cell("weather", location), location)
+    fetched = await asyncio.gather(
+        *(fetch_current_weather_async(username, location) for location in distinct.values()),
+        return_exceptions=True,
+    )
+    by_key = dict(zip(distinct, fetched))
+    results = []
+    for location in locations:
+        result = by_key[location_cell("weather", location)]
+        if isinstance(result, Exception):
+            logger.error("Weather for location %s failed for %s: %s", location[3], username, str(result))
+        results.append(_locations_weather_entry(location, result))
+    return {"locations": results, "upstream_calls": len(distinct)}
@@ -0,0 +1,205 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import time
+from typing import Iterable, Optional
+
+from meal_max.models import weather_model
+from meal_max.models.favorite_location_model import FavoriteLocation
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.rate_limit import background_priority
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# Upstream endpoints refreshed for every distinct favorite location.
+REFRESH_ENDPOINTS = ("weather", "air_pollution")
+
+
+class WeatherRefresher:
+    """
+    Keeps the weather cache warm for every user's favorite location.
+
+    Each run streams every favorite location from the users and
+    favorite_locations tables, groups them by the cache cell each endpoint's
+    live requests use, and re-fetches current weather and air quality once
+    per cell, so upstream calls scale with the number of distinct places
+    rather than the number of users. Cells are refreshed most popular
+    first, at most ``max_concurrency`` calls at a time and at most ``budget``
+    calls per run.
+    """
+
+    def __init__(self, app, interval: float = 300.0, max_concurrency: int = 4,
+                 budget: Optional[int] = None, endpoints: tuple = REFRESH_ENDPOINTS):
+        """
+        Args:
+            app: The Flask app whose database holds the users.
+            interval (float): Seconds between the start of consecutive runs.
+            max_concurrency (int): Maximum upstream calls in flight.
+            budget (int, optional): Maximum upstream calls per run, or None
+                for no limit.
+            endpoints (tuple): Upstream endpoint names to refresh.
+        """
+        self.app = app
+        self.interval = interval
+        self.max_concurrency = max(1, max_concurrency)
+        self.budget = budget
+        self.endpoints = tuple(endpoints)
+        self.runs = 0
+        self.last_run: dict = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, app) -> "WeatherRefresher":
+        """
+        Creates a refresher configured from the app's ``WEATHER_REFRESH_*`` settings.
+
+        Args:
+            app: The Flask app whose database holds the users.
+
+        Returns:
+            WeatherRefresher: The configured refresher.
+        """
+        return cls(
+            app,
+            interval=app.config.get("WEATHER_REFRESH_INTERVAL") or 300,
+            max_concurrency=app.config.get("WEATHER_REFRESH_CONCURRENCY", 4),
+            budget=app.config.get("WEATHER_REFRESH_BUDGET"),
+        )
+
+    def _schedule(self, favorites: Iterable[tuple]) -> tuple:
+        """
+        Plans one refresh per distinct cache cell of each refreshed endpoint.
+
+        Cells are grouped per endpoint, since a coarse endpoint's cell can
+        cover locations that a finer endpoint keeps apart.
+
+        Args:
+            favorites (Iterable[tuple]): (user id, name, lat, lon) favorite
+                locations, ordered by user id.
+
+        Returns:
+            tuple: (endpoint, (name, lat, lon), location_count) refreshes,
+            the most popular cells first, then the number of favorite
+            locations and of distinct users read.
+        """
+        cells = {}
+        locations = users = 0
+        last_user = None
+        for user_id, name, lat, lon in favorites:
+            locations += 1
+            if user_id != last_user:
+                users += 1
+                last_user = user_id
+            for endpoint in self.endpoints:
+                key = (endpoint, weather_model.location_cell(endpoint, (name, lat, lon)))
+                entry = cells.get(key)
+                if entry is None:
+                    cells[key] = [endpoint, (name, lat, lon), 1]
+                else:
+                    entry[2] += 1
+        refreshes = sorted((tuple(entry) for entry in cells.values()), key=lambda refresh: -refresh[2])
+        return refreshes, locations, users
+
+    def run_once(self) -> dict:
+        """
+        Refreshes the cache for every distinct cell of each endpoint once.
+
+        A failed upstream call is logged and counted without stopping the
+        run. Cells that do not fit in the budget are skipped until the next
+        run.
+
+        Returns:
+            dict: Counts of favorite locations, users covered, cells,
+            upstream calls made, errors and skipped cells, plus the run time.
+        """
+        started = time.monotonic()
+        with self.app.app_context():
+            refreshes, locations, users = self._schedule(FavoriteLocation.all_coordinates())
+
+        limit = len(refreshes) if self.budget is None else min(len(refreshes), self.budget)
+        scheduled, skipped = refreshes[:limit], refreshes[limit:]
+
+        def refresh(scheduled_refresh):
+            endpoint, location, _ = scheduled_refresh
+            # Refresh calls yield upstream quota to user requests
+            with background_priority():
+                try:
+                    weather_model.refresh_cached(endpoint, location)
+                except Exception as e:
+                    logger.error("Refreshing %s for %s failed: %s", endpoint, location[0], str(e))
+                    return 1
+            return 0
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                thread_name_prefix="weather-refresh") as executor:
+            errors = sum(executor.map(refresh, scheduled))
+
+        summary = {
+            "locations": locations,
+            "users": users,
+            "cells": len(refreshes),
+            "calls": len(scheduled),
+            "errors": errors,
+            "skipped": len(skipped),
+            "duration": time.monotonic() - started,
+        }
+        if skipped:
+            logger.warning("Refresh budget of %d calls reached; skipped %d cells", self.budget, len(skipped))
+        logger.info("Refreshed %d of %d cells covering %d users",
+                    len(scheduled), summary["cells"], summary["users"])
+        with self._lock:
+            self.runs += 1
+            self.last_run = summary
+        return summary
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error("Weather refresh run failed: %s", str(e))
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self) -> None:
+        """Starts refreshing on a daemon thread; a no-op if already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="weather-refresher", daemon=True)
+            self._thread.start()
+        logger.info("Weather refresher started with a %.0f second interval", self.interval)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stops the refresher after the current run finishes.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the thread to exit.
+        """
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        """
+        Returns the refresher's state and the summary of its last run.
+
+        Returns:
+            dict: Whether it is running, its settings, the run count and the
+            last run's summary.
+        """
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "interval": self.interval,
+                "budget": self.budget,
+                "runs": self.runs,
+                "last_run": dict(self.last_run),
+            }
@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+from typing import IO, Iterable, Iterator, Optional
+
+
+FORMATS = ("ndjson", "csv")
+
+
+def detect_format(content_type: Optional[str], requested: Optional[str] = None) -> str:
+    """
+    Picks the row format for a bulk upload or export.
+
+    Args:
+        content_type (str, optional): The request's Content-Type header.
+        requested (str, optional): An explicit ``format`` parameter.
+
+    Returns:
+        str: "csv" or "ndjson".
+
+    Raises:
+        ValueError: If the requested format is not supported.
+    """
+    if requested:
+        requested = requested.lower()
+        if requested not in FORMATS:
+            raise ValueError(f"Unsupported format '{requested}', expected one of: {', '.join(FORMATS)}")
+        return requested
+    if content_type and "csv" in content_type.lower():
+        return "csv"
+    return "ndjson"
+
+
+def read_rows(stream: IO[bytes], fmt: str) -> Iterator[Optional[dict]]:
+    """
+    Lazily parses uploaded rows from a binary stream.
+
+    Blank JSON lines are skipped. A line that is not a JSON object yields
+    None, so row numbers stay aligned with the input and the caller can
+    report it without aborting the batch.
+
+    Args:
+        stream (IO[bytes]): The request body.
+        fmt (str): "csv" (with a header row) or "ndjson".
+
+    Returns:
+        Iterator[Optional[dict]]: One dict per row, or None for a malformed row.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if fmt == "csv":
+        for row in csv.DictReader(text):
+            yield {key.strip(): value.strip() if isinstance(value, str) else value
+                   for key, value in row.items() if key}
+        return
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield row if isinstance(row, dict) else None
+
+
+def write_rows(rows: Iterable[dict], fmt: str, fieldnames: list) -> Iterator[str]:
+    """
+    Serializes rows lazily so large exports can be streamed.
+
+    Args:
+        rows (Iterable[dict]): The rows to serialize.
+        fmt (str): "csv" or "ndjson".
+        fieldnames (list): Column order for CSV output.
+
+    Returns:
+        Iterator[str]: Text chunks, one per row (plus the CSV header).
+    """
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, lineterminator="\n")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+        return
+    for row in rows:
+        yield json.dumps(row) + "\n"
@@ -0,0 +1,253 @@
+from collections import OrderedDict
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    A thread-safe, size-bounded LRU cache whose entries expire after a TTL.
+
+    Entries are evicted in least-recently-used order once ``maxsize`` is
+    reached. A TTL of ``None`` means the entry never expires and is only
+    dropped by LRU eviction. An entry stored with a ``stale_ttl`` is kept
+    that many seconds past its expiry; ``get`` no longer returns it, but
+    ``lookup`` does, flagged as stale.
+
+    An ``on_remove`` callback, if given, is called with each key that
+    leaves the cache through eviction, expiry past retention, ``delete`` or
+    ``clear``, after the cache's lock is released.
+    """
+
+    def __init__(self, maxsize: int = 1024, on_remove: Optional[Callable[[Hashable], None]] = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be a positive integer")
+        self.maxsize = maxsize
+        self.on_remove = on_remove
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> (value, stored_at, expires_at, retain_until)
+        self._data: "OrderedDict[Hashable, tuple[Any, float, Optional[float], Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, key: Hashable, now: float) -> tuple:
+        # Must be called with the lock held; drops the entry once past retention.
+        # Returns the entry, or None, and whether it was dropped.
+        entry = self._data.get(key)
+        if entry is not None and entry[3] is not None and entry[3] <= now:
+            del self._data[key]
+            return None, True
+        return entry, False
+
+    def _removed(self, keys) -> None:
+        # Must be called without the lock held
+        if self.on_remove is not None:
+            for key in keys:
+                self.on_remove(key)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Looks up a key, counting the lookup as a hit or a miss.
+
+        Args:
+            key (Hashable): The cache key.
+            default (Any): Value returned when the key is missing or expired.
+
+        Returns:
+            Any: The cached value, or ``default``.
+        """
+        with self._lock:
+            now = time.monotonic()
+            entry, dropped = self._entry(key, now)
+            if entry is not None and (entry[2] is None or entry[2] > now):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        if dropped:
+            self._removed((key,))
+        return default
+
+    def lookup(self, key: Hashable) -> Optional[tuple]:
+        """
+        Looks up a key, also returning entries that expired but are retained.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            tuple, optional: (value, age in seconds, stale flag), or None if
+            the key is missing or past its retention.
+        """
+        with self._lock:
+            now = time.monotonic()
+            entry, dropped = self._entry(key, now)
+            if entry is not None:
+                value, stored_at, expires_at, _ = entry
+                self._data.move_to_end(key)
+                stale = expires_at is not None and expires_at <= now
+                if stale:
+                    self.stale_hits += 1
+                else:
+                    self.hits += 1
+                return value, now - stored_at, stale
+            self.misses += 1
+        if dropped:
+            self._removed((key,))
+        return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None,
+            stale_ttl: Optional[float] = None) -> None:
+        """
+        Stores a value, evicting the least recently used entry if full.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+            ttl (float, optional): Lifetime in seconds, or None to never expire.
+            stale_ttl (float, optional): Seconds to retain the entry past its
+                expiry for ``lookup``.
+        """
+        now = time.monotonic()
+        expires_at = None if ttl is None else now + ttl
+        retain_until = expires_at if expires_at is None or not stale_ttl else expires_at + stale_ttl
+        evicted = []
+        with self._lock:
+            self._data[key] = (value, now, expires_at, retain_until)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                evicted.append(self._data.popitem(last=False)[0])
+                self.evictions += 1
+        self._removed(evicted)
+
+    def delete(self, key: Hashable) -> None:
+        """Removes a key from the cache if present."""
+        with self._lock:
+            removed = self._data.pop(key, None) is not None
+        if removed:
+            self._removed((key,))
+
+    def clear(self, reset_stats: bool = True) -> None:
+        """
+        Removes every entry.
+
+        Args:
+            reset_stats (bool): Whether to also reset the hit/miss counters.
+        """
+        with self._lock:
+            keys = list(self._data)
+            self._data.clear()
+            if reset_stats:
+                self.hits = 0
+                self.stale_hits = 0
+                self.misses = 0
+                self.evictions = 0
+        self._removed(keys)
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the cache counters.
+
+        Returns:
+            dict: Size, capacity, hits, stale hits, misses, evictions and
+            the fresh hit ratio.
+        """
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class VersionCounter:
+    """
+    A cross-process invalidation counter kept in a SQLite file.
+
+    Each process that writes bumps the shared version; readers poll it at
+    most once every ``check_interval`` seconds and drop their local cache
+    when another process has bumped it since their last look.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        """
+        Args:
+            path (str): The SQLite file shared by every process.
+            check_interval (float): Minimum seconds between version reads.
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._seen: Optional[int] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO cache_version (id, version) VALUES (1, 0)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def _read(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT version FROM cache_version WHERE id = 1").fetchone()[0]
+
+    def changed(self) -> bool:
+        """
+        Checks whether another process has bumped the version.
+
+        Returns:
+            bool: True if the local cache should be dropped.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return False
+            self._checked_at = now
+            conn = self._connect()
+            try:
+                version = self._read(conn)
+            finally:
+                conn.close()
+            changed = self._seen is not None and version != self._seen
+            self._seen = version
+            return changed
+
+    def bump(self) -> bool:
+        """
+        Increments the shared version after a local write.
+
+        Returns:
+            bool: True if another process had also bumped the version since
+            the last check, so the local cache should be dropped.
+        """
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                version = self._read(conn)
+                conn.execute("UPDATE cache_version SET version = ? WHERE id = 1", (version + 1,))
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+            changed = self._seen is not None and version != self._seen
+            self._seen = version + 1
+            self._checked_at = time.monotonic()
+            return changed
@@ -0,0 +1,160 @@
+import logging
+import os
+import threading
+import time
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Upstream {name} is unavailable; retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    A closed/open/half-open circuit breaker for one upstream endpoint.
+
+    While closed, calls go through and consecutive failures are counted.
+    Reaching ``failure_threshold`` opens the circuit: calls fail
+    immediately with CircuitOpenError for ``reset_timeout`` seconds. After
+    that the circuit is half-open and lets ``half_open_max_calls`` trial
+    calls through; a success closes it again and a failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        """
+        Args:
+            name (str): The endpoint the breaker guards, used in errors and logs.
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_timeout (float): Seconds the circuit stays open before a trial call.
+            half_open_max_calls (int): Trial calls allowed at once while half-open.
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name: str) -> "CircuitBreaker":
+        """
+        Creates a breaker configured from ``CIRCUIT_*`` environment variables.
+
+        Args:
+            name (str): The endpoint the breaker guards.
+
+        Returns:
+            CircuitBreaker: The configured breaker.
+        """
+        return cls(
+            name,
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30")),
+            half_open_max_calls=int(os.getenv("CIRCUIT_HALF_OPEN_CALLS", "1")),
+        )
+
+    def before_call(self) -> None:
+        """
+        Admits a call, or rejects it while the circuit is open.
+
+        Every admitted call must be followed by record_success,
+        record_failure or, if it never reached the upstream or was
+        interrupted, release.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with every
+                trial slot taken.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self.state = HALF_OPEN
+                self._trials = 0
+                logger.info("Circuit for %s is half-open", self.name)
+            if self.state == HALF_OPEN:
+                if self._trials >= self.half_open_max_calls:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self.reset_timeout)
+                self._trials += 1
+
+    def release(self) -> None:
+        """Releases an admitted call that never reached the upstream."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._trials:
+                self._trials -= 1
+
+    def record_success(self) -> None:
+        """
+        Records a call that reached the upstream; closes a half-open circuit.
+
+        A success while the circuit is open came from a call admitted before
+        it opened, so it is ignored rather than cutting the cool-down short.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                return
+            if self.state == HALF_OPEN:
+                logger.info("Circuit for %s closed", self.name)
+            self.state = CLOSED
+            self.failures = 0
+            self._trials = 0
+
+    def record_failure(self) -> None:
+        """Records a failed call; opens the circuit at the threshold or after a failed trial."""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.state = OPEN
+                self.opened += 1
+                self._opened_at = time.monotonic()
+                logger.warning("Circuit for %s opened after %d consecutive failures", self.name, self.failures)
+
+    def stats(self) -> dict:
+        """
+        Returns the breaker's state and counters.
+
+        Returns:
+            dict: The state, consecutive failures, times opened, calls
+            rejected, and seconds until a trial call while open.
+        """
+        with self._lock:
+            retry_in = max(0.0, self._opened_at + self.reset_timeout - time.monotonic()) if self.state == OPEN else 0.0
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "retry_in": round(retry_in, 1),
+            }
+
+    def reset(self) -> None:
+        """Closes the circuit and resets the counters."""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened = 0
+            self.rejected = 0
+            self._trials = 0
@@ -0,0 +1,152 @@
+import math
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+# Percentiles of daily mean temperature reported by default.
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+
+# Base temperature in degrees Celsius for heating and cooling degree-days.
+DEFAULT_BASE_TEMPERATURE = 18.0
+
+# Days in the default rolling window.
+DEFAULT_WINDOW = 7
+
+# Daily precipitation in mm from which a day counts as wet.
+WET_DAY_MM = 1.0
+
+
+def _value(section: Optional[dict], key: str) -> float:
+    """Reads one number from a day summary section, NaN if it is missing."""
+    value = (section or {}).get(key)
+    return math.nan if value is None else value
+
+
+def daily_arrays(n_days: int, days: Iterable[tuple]) -> tuple:
+    """
+    Loads day summaries into parallel daily arrays.
+
+    Args:
+        n_days (int): Days in the range.
+        days (Iterable[tuple]): (day index, day summary payload) pairs. Each
+            payload is an OpenWeather ``onecall/day_summary`` response, with
+            ``temperature.min``/``max`` and ``precipitation.total`` for the day.
+
+    Returns:
+        tuple: float64 daily minimum temperatures, maximum temperatures and
+        precipitation totals in mm, one entry per day in the range. A day
+        without a summary, or a summary without a value, has NaN.
+    """
+    daily_min = np.full(n_days, np.nan)
+    daily_max = np.full(n_days, np.nan)
+    daily_precip = np.full(n_days, np.nan)
+    for index, payload in days:
+        daily_min[index] = _value(payload.get("temperature"), "min")
+        daily_max[index] = _value(payload.get("temperature"), "max")
+        daily_precip[index] = _value(payload.get("precipitation"), "total")
+    return daily_min, daily_max, daily_precip
+
+
+def _number(value) -> Optional[float]:
+    """Rounds a NumPy scalar for JSON, mapping NaN to None."""
+    value = float(value)
+    return None if math.isnan(value) else round(value, 2)
+
+
+def _rolling(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Returns the mean of each full window of days, NaN where any day is missing.
+
+    Element ``i`` covers days ``i - window + 1`` to ``i``; the first
+    ``window - 1`` elements are NaN.
+    """
+    result = np.full(values.shape, np.nan)
+    if window > len(values):
+        return result
+    present = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    window_sums = sums[window:] - sums[:-window]
+    full = (counts[window:] - counts[:-window]) == window
+    result[window - 1:] = np.where(full, window_sums / window, np.nan)
+    return result
+
+
+def _extreme(values: np.ndarray, dates: list, pick, date_key: str = "date") -> Optional[dict]:
+    """Returns the value and date picked by np.nanargmax or np.nanargmin, if any."""
+    if np.isnan(values).all():
+        return None
+    index = int(pick(values))
+    return {"value": _number(values[index]), date_key: dates[index]}
+
+
+def summarize(dates: list, daily_min: np.ndarray, daily_max: np.ndarray, daily_precip: np.ndarray,
+              percentiles: Iterable[float] = DEFAULT_PERCENTILES, window: int = DEFAULT_WINDOW,
+              base_temperature: float = DEFAULT_BASE_TEMPERATURE) -> dict:
+    """
+    Computes climatology statistics over daily arrays.
+
+    Each day's mean temperature is the midpoint of its minimum and maximum,
+    the usual basis for degree-days. Days without data are left out of the
+    aggregates and break any rolling window they fall in.
+
+    Args:
+        dates (list): Every date in the range, in YYYY-MM-DD format.
+        daily_min (np.ndarray): Each day's minimum temperature in degrees Celsius.
+        daily_max (np.ndarray): Each day's maximum temperature in degrees Celsius.
+        daily_precip (np.ndarray): Each day's precipitation in mm.
+        percentiles (Iterable[float]): Percentiles of daily mean temperature to report.
+        window (int): Days in the rolling windows.
+        base_temperature (float): Base for heating and cooling degree-days.
+
+    Returns:
+        dict: ``days_with_data``, and the ``temperature``,
+        ``precipitation``, ``degree_days`` and ``rolling`` summaries.
+    """
+    percentiles = list(percentiles)
+    daily_mean = (daily_min + daily_max) / 2
+    has_data = ~(np.isnan(daily_min) & np.isnan(daily_max) & np.isnan(daily_precip))
+
+    means = daily_mean[~np.isnan(daily_mean)]
+    if means.size:
+        temperature = {
+            "min": _number(np.nanmin(daily_min)),
+            "max": _number(np.nanmax(daily_max)),
+            "mean": _number(means.mean()),
+            "std": _number(means.std()),
+            "percentiles": {
+                f"p{percentile:g}": _number(value)
+                for percentile, value in zip(percentiles, np.percentile(means, percentiles))
+            },
+            "mean_daily_min": _number(np.nanmean(daily_min)),
+            "mean_daily_max": _number(np.nanmean(daily_max)),
+        }
+    else:
+        temperature = {"min": None, "max": None, "mean": None, "std": None,
+                       "percentiles": {f"p{percentile:g}": None for percentile in percentiles},
+                       "mean_daily_min": None, "mean_daily_max": None}
+
+    precip = daily_precip[~np.isnan(daily_precip)]
+    rolling_temp = _rolling(daily_mean, window)
+    rolling_precip = _rolling(daily_precip, window) * window  # Window totals rather than means
+    return {
+        "days_with_data": int(np.count_nonzero(has_data)),
+        "temperature": temperature,
+        "precipitation": {
+            "total": _number(precip.sum()),
+            "max_daily": _extreme(daily_precip, dates, np.nanargmax),
+            "wet_days": int(np.count_nonzero(precip >= WET_DAY_MM)),
+        },
+        "degree_days": {
+            "base": base_temperature,
+            "heating": _number(np.nansum(np.clip(base_temperature - daily_mean, 0, None))),
+            "cooling": _number(np.nansum(np.clip(daily_mean - base_temperature, 0, None))),
+        },
+        "rolling": {
+            "window": window,
+            "warmest_mean_temperature": _extreme(rolling_temp, dates, np.nanargmax, "end_date"),
+            "coldest_mean_temperature": _extreme(rolling_temp, dates, np.nanargmin, "end_date"),
+            "wettest_total_precipitation": _extreme(rolling_precip, dates, np.nanargmax, "end_date"),
+        },
+    }
@@ -0,0 +1,153 @@
+import gzip
+import json
+from typing import Any, Optional
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional encoding
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+
+MSGPACK_MIMETYPE = "application/msgpack"
+
+# Response bodies smaller than this are sent uncompressed.
+MIN_COMPRESS_SIZE = 512
+
+# Mimetypes worth compressing.
+COMPRESSIBLE_MIMETYPES = ("application/json", "application/x-ndjson", "text/csv", MSGPACK_MIMETYPE)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask's JSON provider, serializing with orjson when it is installed.
+
+    Output matches the default provider: keys stay sorted when
+    ``sort_keys`` is set, and dates, decimals and UUIDs go through the
+    default provider's conversions.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode()
+        except TypeError:
+            # Values orjson cannot represent, such as integers wider than 64 bits
+            return super().dumps(obj)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serializes a JSON-compatible value to UTF-8 JSON outside a Flask app.
+
+    Args:
+        obj (Any): The value to serialize.
+
+    Returns:
+        bytes: The encoded JSON, produced by orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _accepts(header: Optional[str], token: str) -> float:
+    """Returns the quality a comma-separated Accept-style header gives a token."""
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() != token:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        return quality
+    return 0.0
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """
+    Checks whether a client prefers MessagePack over JSON.
+
+    Args:
+        accept (str, optional): The request's Accept header.
+
+    Returns:
+        bool: True if msgpack is installed and the client ranks it above JSON.
+    """
+    if msgpack is None:
+        return False
+    preferred = _accepts(accept, MSGPACK_MIMETYPE)
+    return preferred > 0 and preferred >= _accepts(accept, "application/json")
+
+
+def pack(obj: Any) -> bytes:
+    """
+    Serializes a JSON-compatible value with MessagePack.
+
+    Args:
+        obj (Any): The value to serialize.
+
+    Returns:
+        bytes: The packed value.
+    """
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Picks the content coding for a response body.
+
+    Brotli is preferred when it is installed and accepted, then gzip.
+
+    Args:
+        accept_encoding (str, optional): The request's Accept-Encoding header.
+
+    Returns:
+        str, optional: "br", "gzip", or None to send the body as is.
+    """
+    if brotli is not None and _accepts(accept_encoding, "br") > 0:
+        return "br"
+    if _accepts(accept_encoding, "gzip") > 0:
+        return "gzip"
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    Compresses a response body.
+
+    Args:
+        data (bytes): The body to compress.
+        encoding (str): "br" or "gzip".
+
+    Returns:
+        bytes: The compressed body.
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
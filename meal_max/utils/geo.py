@@ -0,0 +1,226 @@
+import math
+import threading
+from typing import Any, Optional
+
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Mean Earth radius used for great-circle distances.
+EARTH_RADIUS_KM = 6371.0088
+
+# Kilometres per degree of latitude.
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode(lat: float, lon: float, precision: int) -> str:
+    """
+    Encodes coordinates as a geohash.
+
+    Each extra character shrinks the cell about 32-fold: 5 characters is
+    roughly 4.9 x 4.9 km, 6 is 1.2 x 0.6 km and 7 is 153 x 153 m.
+
+    Args:
+        lat (float): Latitude in degrees.
+        lon (float): Longitude in degrees.
+        precision (int): Characters in the geohash.
+
+    Returns:
+        str: The geohash of the cell containing the point.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # Bits alternate longitude, latitude, starting with longitude
+    while len(chars) < precision:
+        span, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (span[0] + span[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            span[0] = middle
+        else:
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def bounds(geohash: str) -> tuple:
+    """
+    Returns the bounding box of a geohash cell.
+
+    Args:
+        geohash (str): The cell's geohash.
+
+    Returns:
+        tuple: (min lat, max lat, min lon, max lon).
+
+    Raises:
+        ValueError: If the geohash has characters outside its alphabet.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        index = _BASE32.find(char)
+        if index < 0:
+            raise ValueError(f"Invalid geohash '{geohash}'")
+        for shift in range(4, -1, -1):
+            span = lon_range if even else lat_range
+            middle = (span[0] + span[1]) / 2
+            if (index >> shift) & 1:
+                span[0] = middle
+            else:
+                span[1] = middle
+            even = not even
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def decode(geohash: str) -> tuple:
+    """
+    Returns the center of a geohash cell.
+
+    Args:
+        geohash (str): The cell's geohash.
+
+    Returns:
+        tuple: (lat, lon) rounded to 5 decimal places (about a metre).
+    """
+    min_lat, max_lat, min_lon, max_lon = bounds(geohash)
+    return round((min_lat + max_lat) / 2, 5), round((min_lon + max_lon) / 2, 5)
+
+
+def cell_center(lat: float, lon: float, precision: int) -> tuple:
+    """
+    Maps coordinates to the canonical point of their geohash cell.
+
+    Every point in a cell maps to the same center, so upstream calls made
+    for it can be shared by everyone in the cell.
+
+    Args:
+        lat (float): Latitude in degrees.
+        lon (float): Longitude in degrees.
+        precision (int): Characters in the geohash.
+
+    Returns:
+        tuple: (geohash, center lat, center lon).
+    """
+    geohash = encode(lat, lon, precision)
+    return (geohash, *decode(geohash))
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Returns the great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialIndex:
+    """
+    A thread-safe grid index of points for nearest-neighbour lookups.
+
+    Points are bucketed into cells of ``cell_degrees`` on each side, so a
+    lookup only measures the points in the few cells that overlap the
+    search radius rather than every point.
+    """
+
+    def __init__(self, cell_degrees: float = 0.1):
+        """
+        Args:
+            cell_degrees (float): Grid cell size in degrees (0.1 is about 11 km).
+        """
+        self.cell_degrees = cell_degrees
+        self._cells: dict = {}
+        self._points: dict = {}
+        self._lock = threading.Lock()
+
+    def _cell(self, lat: float, lon: float) -> tuple:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def add(self, key: Any, lat: float, lon: float) -> None:
+        """
+        Adds a point, or moves it if the key is already indexed.
+
+        Args:
+            key (Any): A hashable identifier for the point.
+            lat (float): Latitude in degrees.
+            lon (float): Longitude in degrees.
+        """
+        with self._lock:
+            self._discard(key)
+            cell = self._cell(lat, lon)
+            self._cells.setdefault(cell, {})[key] = (lat, lon)
+            self._points[key] = cell
+
+    def _discard(self, key: Any) -> None:
+        cell = self._points.pop(key, None)
+        if cell is not None:
+            points = self._cells[cell]
+            del points[key]
+            if not points:
+                del self._cells[cell]
+
+    def remove(self, key: Any) -> None:
+        """Removes a point; a no-op if the key is not indexed."""
+        with self._lock:
+            self._discard(key)
+
+    def nearby(self, lat: float, lon: float, max_km: float) -> list:
+        """
+        Finds the points within a radius, nearest first.
+
+        Args:
+            lat (float): Latitude of the search center.
+            lon (float): Longitude of the search center.
+            max_km (float): The search radius in kilometres.
+
+        Returns:
+            list: (distance in km, key) pairs sorted by distance.
+        """
+        lat_cells = math.ceil(max_km / KM_PER_DEGREE / self.cell_degrees)
+        # Longitude degrees shrink toward the poles
+        cos_lat = max(math.cos(math.radians(min(89.0, abs(lat) + lat_cells * self.cell_degrees))), 1e-6)
+        columns = round(360 / self.cell_degrees)
+        lon_cells = min(math.ceil(max_km / (KM_PER_DEGREE * cos_lat) / self.cell_degrees), columns // 2)
+        row, column = self._cell(lat, lon)
+        found = []
+        with self._lock:
+            for cell_row in range(row - lat_cells, row + lat_cells + 1):
+                for offset in range(-lon_cells, lon_cells + 1):
+                    # Wraps around the antimeridian
+                    cell_column = (column + offset + columns // 2) % columns - columns // 2
+                    for key, (point_lat, point_lon) in self._cells.get((cell_row, cell_column), {}).items():
+                        distance = haversine_km(lat, lon, point_lat, point_lon)
+                        if distance <= max_km:
+                            found.append((distance, key))
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def nearest(self, lat: float, lon: float, max_km: float) -> Optional[tuple]:
+        """
+        Finds the nearest point within a radius.
+
+        Returns:
+            tuple, optional: (distance in km, key), or None if no point is
+            close enough.
+        """
+        found = self.nearby(lat, lon, max_km)
+        return found[0] if found else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._points)
+
+    def clear(self) -> None:
+        """Removes every point."""
+        with self._lock:
+            self._cells.clear()
+            self._points.clear()
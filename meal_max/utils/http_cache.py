@@ -0,0 +1,89 @@
+from email.utils import formatdate
+import hashlib
+import json
+import time
+from typing import Any, Optional
+
+
+def payload_etag(location: Any, payload: Any) -> str:
+    """
+    Derives an entity tag from an upstream payload and the location it describes.
+
+    The upstream payloads carry their own observation timestamps (``dt``),
+    so the tag changes exactly when OpenWeather reports new data.
+
+    Args:
+        location (Any): The location name the payload belongs to.
+        payload (Any): The JSON-serializable upstream data.
+
+    Returns:
+        str: An opaque tag, without quotes.
+    """
+    encoded = json.dumps([location, payload], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(encoded.encode()).hexdigest()
+
+
+def cache_control(ttl: Optional[float], age: float, stale: bool, private: bool = False,
+                  stale_while_revalidate: int = 0, stale_if_error: int = 0) -> str:
+    """
+    Builds a Cache-Control value matching the remaining freshness of cached data.
+
+    Args:
+        ttl (float, optional): The data's cache lifetime in seconds, or None
+            if it never expires.
+        age (float): Seconds since the data was fetched upstream.
+        stale (bool): Whether the data is already past its lifetime.
+        private (bool): Whether only the client, not shared caches, may store it.
+        stale_while_revalidate (int): Seconds caches may serve it stale while refreshing.
+        stale_if_error (int): Seconds caches may serve it stale when we fail.
+
+    Returns:
+        str: The Cache-Control header value.
+    """
+    if ttl is None:
+        max_age = 365 * 24 * 60 * 60
+    else:
+        max_age = 0 if stale else max(0, int(ttl - age))
+    directives = ["private" if private else "public", f"max-age={max_age}"]
+    if stale_while_revalidate:
+        directives.append(f"stale-while-revalidate={stale_while_revalidate}")
+    if stale_if_error:
+        directives.append(f"stale-if-error={stale_if_error}")
+    return ", ".join(directives)
+
+
+def last_modified(age: float) -> str:
+    """
+    Formats the time the data was fetched upstream as an HTTP date.
+
+    Args:
+        age (float): Seconds since the data was fetched.
+
+    Returns:
+        str: The Last-Modified header value.
+    """
+    return formatdate(time.time() - age, usegmt=True)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Checks an If-None-Match header against a tag using weak comparison.
+
+    Args:
+        if_none_match (str, optional): The request's If-None-Match header.
+        etag (str): The current tag, without quotes.
+
+    Returns:
+        bool: True if the client already holds this representation.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == etag:
+            return True
+    return False
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class HTTPClient:
+    """
+    A pooled, keep-alive HTTP client for upstream API calls.
+
+    Connections are kept alive in a per-host pool so repeated calls to the
+    same host skip the TCP and TLS handshakes. Every request carries a
+    connect/read timeout, and GETs that fail with a connection error or a
+    retryable status are retried with exponential backoff. Retries are made
+    here rather than by urllib3 so a caller's ``before_retry`` hook sees
+    every extra attempt.
+    """
+
+    # A 429 is not retried: another attempt would only spend more of the quota.
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 16,
+                 connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 max_retries: int = 2, backoff_factor: float = 0.3):
+        """
+        Args:
+            pool_connections (int): Number of distinct hosts to keep pools for.
+            pool_maxsize (int): Maximum kept-alive connections per host.
+            connect_timeout (float): Seconds to wait for a connection.
+            read_timeout (float): Seconds to wait between bytes of the response.
+            max_retries (int): Retries for failed requests.
+            backoff_factor (float): Base delay in seconds for exponential backoff.
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "HTTPClient":
+        """
+        Creates a client configured from ``UPSTREAM_*`` environment variables.
+
+        Returns:
+            HTTPClient: The configured client.
+        """
+        return cls(
+            pool_connections=int(os.getenv("UPSTREAM_POOL_CONNECTIONS", "4")),
+            pool_maxsize=int(os.getenv("UPSTREAM_POOL_MAXSIZE", "16")),
+            connect_timeout=float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "3.05")),
+            read_timeout=float(os.getenv("UPSTREAM_READ_TIMEOUT", "10")),
+            max_retries=int(os.getenv("UPSTREAM_MAX_RETRIES", "2")),
+            backoff_factor=float(os.getenv("UPSTREAM_BACKOFF_FACTOR", "0.3")),
+        )
+
+    @property
+    def session(self) -> requests.Session:
+        """The underlying session, created on first use."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=self.pool_connections,
+                        pool_maxsize=self.pool_maxsize,
+                    )
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def _retry(self, attempt: int, before_retry: Optional[Callable[[], bool]]) -> bool:
+        """Waits out the backoff before another attempt; False if none is left or allowed."""
+        if attempt >= self.max_retries:
+            return False
+        time.sleep(self.backoff_factor * (2 ** attempt))
+        return before_retry is None or before_retry()
+
+    def get(self, url: str, params: Optional[dict] = None,
+            before_retry: Optional[Callable[[], bool]] = None) -> requests.Response:
+        """
+        Sends a GET request through the pooled session.
+
+        Args:
+            url (str): The URL to fetch.
+            params (dict, optional): Query parameters.
+            before_retry (Callable[[], bool], optional): Called before each
+                retry; returning False gives up and surfaces the last
+                response or error instead.
+
+        Returns:
+            requests.Response: The upstream response. The final response is
+            returned even if its status was retryable.
+
+        Raises:
+            requests.RequestException: If the request fails after all retries.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if not self._retry(attempt, before_retry):
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUSES or not self._retry(attempt, before_retry):
+                    return response
+            attempt += 1
+
+    def close(self) -> None:
+        """Closes every pooled connection."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+class AsyncHTTPClient:
+    """
+    A non-blocking, pooled HTTP client for upstream calls from async code.
+
+    It mirrors HTTPClient: connections are kept alive per host, every request
+    carries connect/read timeouts, and GETs that fail with a transport error
+    or a retryable status are retried with exponential backoff. The
+    underlying httpx.AsyncClient is bound to the event loop it was created
+    on and is recreated if used from a different loop; the previous client
+    is then closed on its own loop.
+    """
+
+    RETRY_STATUSES = HTTPClient.RETRY_STATUSES
+
+    def __init__(self, max_connections: int = 100, max_keepalive: int = 20,
+                 connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 max_retries: int = 2, backoff_factor: float = 0.3):
+        """
+        Args:
+            max_connections (int): Maximum concurrent connections across hosts.
+            max_keepalive (int): Maximum idle connections kept alive.
+            connect_timeout (float): Seconds to wait for a connection.
+            read_timeout (float): Seconds to wait between bytes of the response.
+            max_retries (int): Retries for failed requests.
+            backoff_factor (float): Base delay in seconds for exponential backoff.
+        """
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_env(cls) -> "AsyncHTTPClient":
+        """
+        Creates a client configured from ``UPSTREAM_*`` environment variables.
+
+        Returns:
+            AsyncHTTPClient: The configured client.
+        """
+        return cls(
+            max_connections=int(os.getenv("UPSTREAM_ASYNC_MAX_CONNECTIONS", "100")),
+            max_keepalive=int(os.getenv("UPSTREAM_POOL_MAXSIZE", "16")),
+            connect_timeout=float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "3.05")),
+            read_timeout=float(os.getenv("UPSTREAM_READ_TIMEOUT", "10")),
+            max_retries=int(os.getenv("UPSTREAM_MAX_RETRIES", "2")),
+            backoff_factor=float(os.getenv("UPSTREAM_BACKOFF_FACTOR", "0.3")),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The underlying client for the running event loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            if self._client is not None:
+                self._retire(self._client, self._loop)
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            self._loop = loop
+        return self._client
+
+    @staticmethod
+    def _retire(client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Closes a client left behind on another event loop.
+
+        Its connections belong to that loop, so the close is scheduled there;
+        it runs at once if the loop is running, or when the loop next runs.
+        A closed loop can no longer close them, which close() avoids.
+        """
+        if loop.is_closed():
+            logger.warning("HTTP client's event loop closed before close(); dropping its connections")
+            return
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    async def _retry(self, attempt: int, before_retry: Optional[Callable[[], Awaitable[bool]]]) -> bool:
+        """Waits out the backoff before another attempt; False if none is left or allowed."""
+        if attempt >= self.max_retries:
+            return False
+        await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+        return before_retry is None or await before_retry()
+
+    async def get(self, url: str, params: Optional[dict] = None,
+                  before_retry: Optional[Callable[[], Awaitable[bool]]] = None) -> httpx.Response:
+        """
+        Sends a GET request without blocking the event loop.
+
+        Args:
+            url (str): The URL to fetch.
+            params (dict, optional): Query parameters.
+            before_retry (Callable[[], Awaitable[bool]], optional): Awaited
+                before each retry; returning False gives up and surfaces the
+                last response or error instead.
+
+        Returns:
+            httpx.Response: The upstream response. The final response is
+            returned even if its status was retryable.
+
+        Raises:
+            httpx.TransportError: If the request fails after all retries.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.get(url, params=params)
+            except httpx.TransportError:
+                if not await self._retry(attempt, before_retry):
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUSES or not await self._retry(attempt, before_retry):
+                    return response
+            attempt += 1
+
+    async def close(self) -> None:
+        """Closes every pooled connection."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
@@ -1,26 +1,185 @@
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
 import sys
+import threading
+from typing import Optional
 
-from flask import current_app, has_request_context
+from meal_max.utils import metrics
 
 
-def configure_logger(logger):
-    logger.setLevel(logging.DEBUG)  # Set the desired logging level here
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; any others were passed through ``extra``.
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line, including ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of DEBUG and INFO records; warnings and errors always pass."""
+
+    def __init__(self, rate: float):
+        """
+        Args:
+            rate (float): Fraction of DEBUG and INFO records kept, from 0 to 1.
+        """
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.INFO or random.random() < self.rate
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Waits for room, where the stock listener fails on a full queue
+        self.queue.put(self._sentinel)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a background listener thread that does the formatting and I/O.
+
+    The calling thread only resolves the message and enqueues it. When the
+    queue is full the record is dropped and counted rather than making the
+    caller wait.
+    """
+
+    def __init__(self, target: logging.Handler, queue_size: int = 10000):
+        """
+        Args:
+            target (logging.Handler): The handler the listener writes to.
+            queue_size (int): Records held before new ones are dropped.
+        """
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.dropped = 0
+        self.listener = _QueueListener(self.queue, target)
+        self.listener.start()
+        self._listening = True
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike QueueHandler.prepare, leaves formatting to the target's formatter
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
-    # Create a console handler that logs to stderr
-    handler = logging.StreamHandler(sys.stderr)
-    handler.setLevel(logging.DEBUG)
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
-    # Create a formatter with a timestamp
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    def close(self) -> None:
+        # Drains the queue; logging.shutdown calls this at exit
+        if self._listening:
+            self._listening = False
+            self.listener.stop()
+        super().close()
 
-    # Add the formatter to the handler
-    handler.setFormatter(formatter)
 
-    # Add the handler to the logger
-    logger.addHandler(handler)
+def build_handler(stream=None, json_format: bool = False, queued: bool = False,
+                  queue_size: int = 10000, sample_rate: float = 1.0,
+                  level: int = logging.DEBUG) -> logging.Handler:
+    """
+    Builds a log handler writing to a stream.
+
+    Args:
+        stream: The stream to write to; stderr when omitted.
+        json_format (bool): Write JSON lines instead of plain text.
+        queued (bool): Write from a background thread through a bounded queue.
+        queue_size (int): Records the queue holds before dropping new ones.
+        sample_rate (float): Fraction of DEBUG and INFO records kept.
+        level (int): The lowest level handled.
+
+    Returns:
+        logging.Handler: The handler to attach to loggers.
+    """
+    target = logging.StreamHandler(stream or sys.stderr)
+    target.setFormatter(JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT))
+    handler = NonBlockingQueueHandler(target, queue_size) if queued else target
+    handler.setLevel(level)
+    if sample_rate < 1:
+        # Sampled out before enqueueing, so dropped records cost the caller almost nothing
+        handler.addFilter(SamplingFilter(sample_rate))
+    return handler
+
+
+_handler: Optional[logging.Handler] = None
+_handler_lock = threading.Lock()
+
+
+def get_handler() -> logging.Handler:
+    """
+    Returns the process-wide handler, building it from the environment on first use.
+
+    LOG_LEVEL sets the level (default DEBUG), LOG_FORMAT=json switches to
+    JSON lines, LOG_ASYNC=true moves formatting and writes to a background
+    thread behind a queue of LOG_QUEUE_SIZE records, and LOG_SAMPLE_RATE
+    keeps that fraction of DEBUG and INFO records.
+
+    Returns:
+        logging.Handler: The shared handler.
+    """
+    global _handler
+    with _handler_lock:
+        if _handler is None:
+            _handler = build_handler(
+                json_format=os.getenv('LOG_FORMAT', 'text').lower() == 'json',
+                queued=os.getenv('LOG_ASYNC', 'false').lower() in ('1', 'true', 'yes'),
+                queue_size=int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+                sample_rate=float(os.getenv('LOG_SAMPLE_RATE', '1.0')),
+                level=logging.getLevelName(os.getenv('LOG_LEVEL', 'DEBUG').upper()),
+            )
+        return _handler
+
+
+def _collect_dropped() -> list:
+    dropped = getattr(_handler, 'dropped', 0)
+    return [('log_records_dropped_total', 'counter', 'Log records dropped because the log queue was full.',
+             [({}, dropped)])]
+
+
+metrics.registry.register_collector(_collect_dropped)
+
+
+def configure_logger(logger):
+    """
+    Routes a logger to the shared handler.
+
+    Safe to call any number of times: the handler is attached once, so no
+    line is ever written twice.
 
-    if has_request_context():
-        app_logger = current_app.logger
-        for handler in app_logger.handlers:
-            logger.addHandler(handler)
\ No newline at end of file
+    Args:
+        logger (logging.Logger): The logger to configure.
+    """
+    handler = get_handler()
+    logger.setLevel(handler.level)
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
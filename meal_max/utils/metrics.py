@@ -0,0 +1,323 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+import functools
+import itertools
+import math
+import threading
+import time
+from typing import Any, Callable, Iterator
+import weakref
+
+
+# Latency buckets in seconds, from a cache hit to a slow upstream call.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _ThreadToken:
+    """A weak-referenceable marker kept in a thread's local storage until the thread ends."""
+
+    __slots__ = ("__weakref__",)
+
+
+class _ShardedMetric:
+    """
+    Base for metrics whose hot path takes no lock.
+
+    Each thread updates its own shard, created (under a lock, once per
+    thread) on first use; collection merges every shard. When a thread
+    ends, its shard is merged into a shared total and dropped, so the
+    number of shards stays bounded by the live threads.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: dict = {}  # Shard id -> shard of a live thread
+        self._retired: dict = {}  # Totals of finished threads
+        self._ids = itertools.count()
+        # Reentrant because a thread's shard may be retired by garbage collection on any thread
+        self._lock = threading.RLock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            shard_id = next(self._ids)
+            with self._lock:
+                self._shards[shard_id] = shard
+            # The token is freed with the thread's local storage, which retires the shard
+            token = self._local.token = _ThreadToken()
+            weakref.finalize(token, self._retire, shard_id).atexit = False
+        return shard
+
+    def _retire(self, shard_id: int) -> None:
+        with self._lock:
+            shard = self._shards.pop(shard_id, None)
+            if shard:
+                self._merge(self._retired, shard)
+
+    def _merge(self, totals: dict, shard: dict) -> None:
+        """Adds a shard's values to ``totals``, replacing rather than mutating its entries."""
+        raise NotImplementedError
+
+    def _snapshot(self) -> list:
+        with self._lock:
+            shards = [self._retired, *self._shards.values()]
+            # Copy each shard so a concurrent first write to a key cannot break iteration
+            return [dict(shard) for shard in shards]
+
+    def _totals(self) -> dict:
+        totals: dict = {}
+        for shard in self._snapshot():
+            self._merge(totals, shard)
+        return totals
+
+    def reset(self) -> None:
+        """Clears every recorded value."""
+        with self._lock:
+            self._retired.clear()
+            for shard in self._shards.values():
+                shard.clear()
+
+
+class Counter(_ShardedMetric):
+    """A monotonically increasing count, optionally split by labels."""
+
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        """
+        Adds to the count for a label combination.
+
+        Args:
+            labels (tuple): Values for the counter's label names, in order.
+            amount (float): The amount to add.
+        """
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> dict:
+        """
+        Returns the totals across every thread.
+
+        Returns:
+            dict: Label values tuple -> count.
+        """
+        return self._totals()
+
+    def _merge(self, totals: dict, shard: dict) -> None:
+        for labels, value in shard.items():
+            totals[labels] = totals.get(labels, 0) + value
+
+    def render(self) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(self.values().items())]
+
+
+class Histogram(_ShardedMetric):
+    """A distribution of observed values, such as latencies, in fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        """
+        Records one observation.
+
+        Args:
+            value (float): The observed value, such as seconds elapsed.
+            labels (tuple): Values for the histogram's label names, in order.
+        """
+        shard = self._shard()
+        entry = shard.get(labels)
+        if entry is None:
+            # Per-bucket counts (plus +Inf), sum, count
+            entry = shard[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    @contextmanager
+    def time(self, labels: tuple = ()) -> Iterator[None]:
+        """Observes the seconds spent inside the block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, labels)
+
+    def timed(self, *labels: Any) -> Callable:
+        """Returns a decorator that observes each call's duration under ``labels``."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.time(labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def values(self) -> dict:
+        """
+        Returns the distribution across every thread.
+
+        Returns:
+            dict: Label values tuple -> (per-bucket counts, sum, count),
+            with bucket counts not yet cumulative.
+        """
+        return {labels: tuple(value) for labels, value in self._totals().items()}
+
+    def _merge(self, totals: dict, shard: dict) -> None:
+        for labels, (counts, total, count) in shard.items():
+            merged = totals.get(labels)
+            if merged is None:
+                totals[labels] = [list(counts), total, count]
+            else:
+                totals[labels] = [[a + b for a, b in zip(merged[0], counts)], merged[1] + total, merged[2] + count]
+
+    def render(self) -> list:
+        lines = []
+        for labels, (counts, total, count) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    """
+    A set of metrics rendered together in the Prometheus text format.
+
+    Besides counters and histograms updated in place, collectors are called
+    at render time to report values owned elsewhere, such as cache sizes.
+    """
+
+    def __init__(self):
+        self._metrics: "dict[str, _ShardedMetric]" = {}
+        self._collectors: list = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _ShardedMetric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered with a different shape")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        """Creates, or returns the already registered, counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        """Creates, or returns the already registered, histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], list]) -> None:
+        """
+        Adds a function called on every render.
+
+        Args:
+            collector (Callable[[], list]): Returns (name, type, help,
+                samples) tuples, where samples is a list of (labels dict,
+                value) pairs.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics page.
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        # Several collectors may report samples of the same family, e.g. one per cache
+        families: dict = {}
+        for collector in collectors:
+            for name, kind, documentation, samples in collector():
+                families.setdefault(name, (kind, documentation, []))[2].extend(samples)
+        for name, (kind, documentation, samples) in families.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clears every counter and histogram; collectors are unaffected."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+# The process-wide registry served on /metrics.
+registry = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def cache_collector(name: str, stats: Callable[[], dict]) -> Callable[[], list]:
+    """
+    Builds a collector reporting a TTLCache's counters.
+
+    Args:
+        name (str): The cache's label value.
+        stats (Callable[[], dict]): Returns the cache's stats() snapshot.
+
+    Returns:
+        Callable[[], list]: A collector for Registry.register_collector.
+    """
+    def collect() -> list:
+        snapshot = stats()
+        labels = {"cache": name}
+        return [
+            ("cache_hits_total", "counter", "Fresh cache hits.", [(labels, snapshot["hits"])]),
+            ("cache_stale_hits_total", "counter", "Cache hits on expired, retained entries.",
+             [(labels, snapshot.get("stale_hits", 0))]),
+            ("cache_misses_total", "counter", "Cache misses.", [(labels, snapshot["misses"])]),
+            ("cache_evictions_total", "counter", "Entries evicted to stay within maxsize.", [(labels, snapshot["evictions"])]),
+            ("cache_entries", "gauge", "Entries currently cached.", [(labels, snapshot["size"])]),
+            ("cache_hit_ratio", "gauge", "Fresh hits over all lookups.", [(labels, snapshot["hit_ratio"])]),
+        ]
+    return collect
@@ -0,0 +1,64 @@
+from typing import Any, Optional
+
+
+def parse_fields(fields: Optional[str]) -> Optional[dict]:
+    """
+    Parses a ``fields`` query parameter into a projection tree.
+
+    Fields are comma-separated dotted paths, such as
+    ``main.temp,weather.description``. A path that is a prefix of another
+    keeps the whole subtree.
+
+    Args:
+        fields (str, optional): The raw parameter value.
+
+    Returns:
+        dict, optional: Nested dicts keyed by field name, where None keeps
+        the whole value, or None when no projection was requested.
+
+    Raises:
+        ValueError: If a path has an empty segment.
+    """
+    if not fields:
+        return None
+    tree: dict = {}
+    for path in fields.split(","):
+        path = path.strip()
+        if not path:
+            continue
+        parts = path.split(".")
+        if not all(parts):
+            raise ValueError(f"Invalid field path '{path}'")
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                break  # An ancestor is already kept whole
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree or None
+
+
+def project(payload: Any, tree: Optional[dict]) -> Any:
+    """
+    Keeps only the projected fields of a JSON payload.
+
+    Lists are projected element by element, so ``weather.description``
+    selects the description of every entry in ``weather``. Fields missing
+    from the payload are omitted.
+
+    Args:
+        payload (Any): The decoded JSON value.
+        tree (dict, optional): A projection tree from parse_fields; None
+            keeps the whole value.
+
+    Returns:
+        Any: The pruned value.
+    """
+    if tree is None:
+        return payload
+    if isinstance(payload, list):
+        return [project(item, tree) for item in payload]
+    if not isinstance(payload, dict):
+        return payload
+    return {key: project(payload[key], subtree) for key, subtree in tree.items() if key in payload}
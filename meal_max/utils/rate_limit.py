@@ -0,0 +1,386 @@
+import asyncio
+from contextlib import contextmanager
+import contextvars
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Priority of upstream calls made from the current thread or task.
+_priority: contextvars.ContextVar = contextvars.ContextVar("upstream_priority", default=INTERACTIVE)
+
+# Seconds in each period accepted by parse_rate.
+PERIODS = {"s": 1, "sec": 1, "min": 60, "hour": 60 * 60, "day": 24 * 60 * 60}
+
+# Name of the bucket shared by every endpoint.
+GLOBAL = "*"
+
+# Seconds a background call waits before checking again while interactive calls queue.
+BACKGROUND_POLL_INTERVAL = 0.05
+
+
+class QuotaExceeded(Exception):
+    """Raised when an upstream call cannot get a token within the maximum wait."""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Upstream quota for {endpoint} exhausted; retry in {retry_after:.1f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """Marks upstream calls made inside the block as background work."""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def parse_rate(spec: str) -> tuple:
+    """
+    Parses a rate such as ``60/min``, ``1000/day`` or ``1000/day:50``.
+
+    Args:
+        spec (str): Calls per period, where the period is one of PERIODS,
+            optionally followed by ``:<burst>``, the bucket capacity.
+
+    Returns:
+        tuple: (tokens per second, bucket capacity). Without an explicit
+        burst the capacity is the per-period allowance, capped at one
+        minute's worth for periods longer than a minute so a day's quota
+        cannot be spent in a single burst; ``1000/day`` therefore holds a
+        single token, refilled about every 86 seconds.
+
+    Raises:
+        ValueError: If the rate is malformed.
+    """
+    rate_spec, _, burst = spec.strip().partition(":")
+    count, _, period = rate_spec.partition("/")
+    try:
+        calls = float(count)
+        seconds = PERIODS[period.strip() or "min"]
+        capacity = float(burst) if burst.strip() else None
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate '{spec}', expected <calls>/<{'|'.join(PERIODS)}>[:<burst>]")
+    if calls <= 0:
+        raise ValueError(f"Invalid rate '{spec}', calls must be positive")
+    if capacity is not None and capacity < 1:
+        raise ValueError(f"Invalid rate '{spec}', burst must be at least 1")
+    rate = calls / seconds
+    if capacity is None:
+        capacity = max(1.0, min(calls, rate * 60) if seconds > 60 else calls)
+    return rate, capacity
+
+
+class TokenBucket:
+    """
+    An in-process token bucket.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``;
+    each upstream call takes one.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Maximum tokens held, i.e. the largest burst.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self, reserve: float = 0.0) -> float:
+        """
+        Takes a token if one is available above the reserve.
+
+        Args:
+            reserve (float): Tokens that must remain afterwards.
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one will be.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens - 1 >= reserve:
+                self._tokens -= 1
+                return 0.0
+            return (1 + reserve - self._tokens) / self.rate
+
+    def give_back(self) -> None:
+        """Returns a token taken by a call that did not go ahead."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+    def remaining(self) -> float:
+        """Returns the tokens currently available."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def reset(self) -> None:
+        """Refills the bucket."""
+        with self._lock:
+            self._tokens = self.capacity
+            self._updated = time.monotonic()
+
+
+class SQLiteTokenBucket(TokenBucket):
+    """
+    A token bucket shared by every process that opens the same SQLite file.
+
+    The bucket's state lives in one row that each take updates inside an
+    immediate transaction, so workers on one host draw from one quota.
+    """
+
+    def __init__(self, path: str, name: str, rate: float, capacity: float):
+        """
+        Args:
+            path (str): The SQLite file shared by every process.
+            name (str): The bucket's row key.
+            rate (float): Tokens added per second.
+            capacity (float): Maximum tokens held.
+        """
+        super().__init__(rate, capacity)
+        self.path = path
+        self.name = name
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS token_buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    def _update(self, change) -> Any:
+        # Runs change(tokens) -> (new tokens, result) atomically across processes
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = conn.execute("SELECT tokens, updated_at FROM token_buckets WHERE name = ?", (self.name,)).fetchone()
+                tokens = self.capacity if row is None else min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+                tokens, result = change(tokens)
+                conn.execute("INSERT OR REPLACE INTO token_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                             (self.name, tokens, now))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return result
+
+    def try_take(self, reserve: float = 0.0) -> float:
+        def take(tokens):
+            if tokens - 1 >= reserve:
+                return tokens - 1, 0.0
+            return tokens, (1 + reserve - tokens) / self.rate
+        return self._update(take)
+
+    def give_back(self) -> None:
+        self._update(lambda tokens: (min(self.capacity, tokens + 1), None))
+
+    def remaining(self) -> float:
+        return self._update(lambda tokens: (tokens, tokens))
+
+    def reset(self) -> None:
+        self._update(lambda tokens: (self.capacity, None))
+
+
+class QuotaGovernor:
+    """
+    Rations upstream calls with a global token bucket and per-endpoint buckets.
+
+    A call that finds no token waits for one for at most ``max_wait``
+    seconds, and fails with QuotaExceeded immediately if no token can
+    arrive in time. Background calls (see background_priority) leave a
+    reserve of each bucket to interactive calls and yield while any
+    interactive call in this process is waiting.
+    """
+
+    def __init__(self, buckets: dict, max_wait: float = 2.0, background_reserve: float = 0.2):
+        """
+        Args:
+            buckets (dict): Endpoint name, or GLOBAL, -> TokenBucket.
+            max_wait (float): Maximum seconds a call queues for a token.
+            background_reserve (float): Fraction of each bucket background
+                calls may not use.
+        """
+        self.buckets = buckets
+        self.max_wait = max_wait
+        self.background_reserve = background_reserve
+        self.granted = 0
+        self.rejected = 0
+        self._interactive_waiting = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "QuotaGovernor":
+        """
+        Creates a governor configured from ``UPSTREAM_QUOTA*`` environment variables.
+
+        UPSTREAM_QUOTA is the global rate (default 60/min, OpenWeather's free
+        tier), and UPSTREAM_ENDPOINT_QUOTAS a comma-separated list such as
+        ``onecall=1000/day,timemachine=1000/day:50``; see parse_rate for
+        the rate syntax and burst. Setting UPSTREAM_QUOTA_DB
+        shares the buckets with every process using the same SQLite file.
+
+        Returns:
+            QuotaGovernor: The configured governor.
+        """
+        rates = {GLOBAL: os.getenv("UPSTREAM_QUOTA", "60/min")}
+        for item in os.getenv("UPSTREAM_ENDPOINT_QUOTAS", "").split(","):
+            if item.strip():
+                endpoint, _, spec = item.partition("=")
+                rates[endpoint.strip()] = spec
+        path = os.getenv("UPSTREAM_QUOTA_DB")
+        buckets = {}
+        for name, spec in rates.items():
+            rate, capacity = parse_rate(spec)
+            buckets[name] = SQLiteTokenBucket(path, name, rate, capacity) if path else TokenBucket(rate, capacity)
+        return cls(
+            buckets,
+            max_wait=float(os.getenv("UPSTREAM_QUOTA_MAX_WAIT", "2")),
+            background_reserve=float(os.getenv("UPSTREAM_BACKGROUND_RESERVE", "0.2")),
+        )
+
+    def _try_acquire(self, endpoint: str, background: bool) -> float:
+        """Takes a token from every applicable bucket, or none; returns the wait otherwise."""
+        buckets = [bucket for bucket in (self.buckets.get(GLOBAL), self.buckets.get(endpoint)) if bucket]
+        with self._lock:
+            if background and self._interactive_waiting:
+                return BACKGROUND_POLL_INTERVAL
+            taken = []
+            for bucket in buckets:
+                reserve = min(bucket.capacity * self.background_reserve, bucket.capacity - 1) if background else 0.0
+                wait = bucket.try_take(reserve)
+                if wait:
+                    for other in taken:
+                        other.give_back()
+                    return wait
+                taken.append(bucket)
+            self.granted += 1
+            return 0.0
+
+    def _reject(self, endpoint: str, wait: float) -> QuotaExceeded:
+        with self._lock:
+            self.rejected += 1
+        logger.warning("Upstream quota for %s exhausted", endpoint)
+        return QuotaExceeded(endpoint, wait)
+
+    def _waiting(self, delta: int) -> None:
+        with self._lock:
+            self._interactive_waiting += delta
+
+    def acquire(self, endpoint: str, max_wait: Optional[float] = None) -> None:
+        """
+        Takes a token for one upstream call, queueing up to the maximum wait.
+
+        Args:
+            endpoint (str): The upstream endpoint about to be called.
+            max_wait (float, optional): Overrides the governor's maximum wait.
+
+        Raises:
+            QuotaExceeded: If no token can be had in time.
+        """
+        background = _priority.get() == BACKGROUND
+        deadline = time.monotonic() + (self.max_wait if max_wait is None else max_wait)
+        registered = False
+        try:
+            while True:
+                wait = self._try_acquire(endpoint, background)
+                if not wait:
+                    return
+                remaining = deadline - time.monotonic()
+                if wait > remaining:
+                    raise self._reject(endpoint, wait)
+                if not background and not registered:
+                    self._waiting(1)
+                    registered = True
+                time.sleep(wait)
+        finally:
+            if registered:
+                self._waiting(-1)
+
+    async def acquire_async(self, endpoint: str, max_wait: Optional[float] = None) -> None:
+        """
+        Async variant of acquire that waits without blocking the event loop.
+
+        Each attempt runs in a worker thread, since a shared SQLite bucket
+        may block on another process's transaction.
+        """
+        background = _priority.get() == BACKGROUND
+        deadline = time.monotonic() + (self.max_wait if max_wait is None else max_wait)
+        registered = False
+        try:
+            while True:
+                wait = await asyncio.to_thread(self._try_acquire, endpoint, background)
+                if not wait:
+                    return
+                remaining = deadline - time.monotonic()
+                if wait > remaining:
+                    raise self._reject(endpoint, wait)
+                if not background and not registered:
+                    self._waiting(1)
+                    registered = True
+                await asyncio.sleep(wait)
+        finally:
+            if registered:
+                self._waiting(-1)
+
+    def stats(self) -> dict:
+        """
+        Returns gauges of the remaining quota.
+
+        Returns:
+            dict: Granted and rejected call counts, calls waiting, and per
+            bucket the tokens remaining, capacity and refill rate per minute.
+        """
+        buckets = {
+            name: {
+                "remaining": round(bucket.remaining(), 2),
+                "capacity": bucket.capacity,
+                "per_minute": round(bucket.rate * 60, 3),
+            }
+            for name, bucket in self.buckets.items()
+        }
+        with self._lock:
+            return {
+                "granted": self.granted,
+                "rejected": self.rejected,
+                "waiting": self._interactive_waiting,
+                "buckets": buckets,
+            }
+
+    def reset(self) -> None:
+        """Refills every bucket and resets the counters."""
+        for bucket in self.buckets.values():
+            bucket.reset()
+        with self._lock:
+            self.granted = 0
+            self.rejected = 0
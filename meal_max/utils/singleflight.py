@@ -0,0 +1,136 @@
+import asyncio
+from concurrent.futures import Future
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers that arrive while
+    it is still in flight wait on the same future and receive its result or
+    its exception. Once the call finishes the key is forgotten, so later
+    callers trigger a fresh execution.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: "dict[Hashable, Future]" = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Runs ``fn`` unless a call for ``key`` is already in flight.
+
+        Args:
+            key (Hashable): Identifies calls that can share a result.
+            fn (Callable[[], Any]): The function to run.
+
+        Returns:
+            Any: The result of ``fn``, possibly from another caller's execution.
+
+        Raises:
+            Exception: Whatever ``fn`` raised, re-raised in every waiting caller.
+        """
+        with self._lock:
+            self.calls += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._in_flight[key] = future
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the coalescing counters.
+
+        Returns:
+            dict: Total calls, coalesced calls and calls currently in flight.
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+            }
+
+    def reset(self) -> None:
+        """Resets the counters. Calls in flight are left untouched."""
+        with self._lock:
+            self.calls = 0
+            self.coalesced = 0
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent coroutine calls that share a key into one execution.
+
+    The asyncio counterpart of SingleFlight, for use from a single event
+    loop: waiters await the leader's task instead of blocking a thread.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: "dict[Hashable, asyncio.Future]" = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Awaits ``fn()`` unless a call for ``key`` is already in flight.
+
+        Args:
+            key (Hashable): Identifies calls that can share a result.
+            fn (Callable[[], Awaitable[Any]]): The coroutine function to run.
+
+        Returns:
+            Any: The result of ``fn``, possibly from another caller's execution.
+
+        Raises:
+            Exception: Whatever ``fn`` raised, re-raised in every waiting caller.
+        """
+        self.calls += 1
+        future = self._in_flight.get(key)
+        if future is not None and future.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(fn())
+        self._in_flight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the coalescing counters.
+
+        Returns:
+            dict: Total calls, coalesced calls and calls currently in flight.
+        """
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
@@ -0,0 +1,254 @@
+"""
+Benchmark harness for the model hot paths.
+
+The suite is skipped unless pytest runs with ``--benchmark``. Each test
+times one call path with the ``benchmark`` fixture, which reports the
+median and fastest seconds per call over several rounds. Comparisons use
+the fastest round, the one least disturbed by other load, normalized by a
+fixed pure-Python workload timed right before it. Baselines recorded on
+one machine so stay comparable on another, and a CPU that slows down or
+gets busy partway through a run shifts both timings alike.
+
+    pytest tests/benchmarks --benchmark                      # measure and report
+    pytest tests/benchmarks --benchmark-compare              # fail on regressions
+    pytest tests/benchmarks --benchmark-save                 # update baselines.json
+    pytest tests/benchmarks --benchmark --benchmark-rows 1000000
+"""
+import json
+import os
+import statistics
+import time
+from typing import Callable, Optional
+
+import pytest
+from sqlalchemy import insert
+
+from app import create_app
+from config import TestConfig
+from meal_max.db import db
+from meal_max.models.user_model import User
+
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+# Password shared by every user in the benchmark tables.
+PASSWORD = "benchmark-password"
+
+# Rounds timed per benchmark.
+ROUNDS = 5
+
+# Each round repeats the call until it takes at least this many seconds.
+MIN_ROUND_SECONDS = 0.02
+
+# Upper bound on calls per round, for paths fast enough to need many.
+MAX_ROUND_CALLS = 1000
+
+_RECORDER = pytest.StashKey()
+
+
+def _enabled(config) -> bool:
+    return any(config.getoption(name) for name in ("benchmark", "benchmark_compare", "benchmark_save"))
+
+
+def pytest_collection_modifyitems(config, items):
+    if _enabled(config):
+        return
+    skip = pytest.mark.skip(reason="benchmarks run with --benchmark")
+    here = os.path.dirname(__file__)
+    for item in items:
+        if str(item.path).startswith(here + os.sep):
+            item.add_marker(skip)
+
+
+def pytest_generate_tests(metafunc):
+    if "table_rows" in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption("benchmark_rows").split(",") if size.strip()]
+        metafunc.parametrize("table_rows", sizes, scope="module", ids=lambda size: f"rows={size}")
+
+
+def measure(func: Callable[[], object], setup: Optional[Callable[[], object]] = None) -> dict:
+    """
+    Times a call path.
+
+    Without ``setup`` each round times a loop of calls. With it, ``setup``
+    runs untimed before every call and each call is timed on its own.
+
+    Args:
+        func (Callable): The call to time.
+        setup (Callable, optional): Prepares state for the next call.
+
+    Returns:
+        dict: ``median_s`` and ``min_s`` seconds per call over the rounds,
+        and the ``calls`` made per round.
+    """
+    def run_round(calls: int) -> float:
+        if setup is None:
+            started = time.perf_counter()
+            for _ in range(calls):
+                func()
+            return time.perf_counter() - started
+        elapsed = 0.0
+        for _ in range(calls):
+            setup()
+            started = time.perf_counter()
+            func()
+            elapsed += time.perf_counter() - started
+        return elapsed
+
+    run_round(1)  # Warm-up: statement compilation, pools and caches
+    calls = 1
+    while calls < MAX_ROUND_CALLS:
+        elapsed = run_round(calls)
+        if elapsed >= MIN_ROUND_SECONDS:
+            break
+        calls = min(MAX_ROUND_CALLS, calls * 2 if elapsed <= 0 else
+                    max(calls + 1, int(calls * MIN_ROUND_SECONDS / elapsed)))
+    per_call = [run_round(calls) / calls for _ in range(ROUNDS)]
+    return {"median_s": statistics.median(per_call), "min_s": min(per_call), "calls": calls}
+
+
+def _calibration_workload() -> None:
+    rows = [{"id": i, "name": f"user{i}", "score": i * 0.5} for i in range(200)]
+    json.loads(json.dumps(sorted(rows, key=lambda row: -row["score"])))
+
+
+class BenchmarkRecorder:
+    """Collects a session's results and checks them against the baselines."""
+
+    def __init__(self, compare: bool, threshold: float):
+        """
+        Args:
+            compare (bool): Whether regressions past the threshold fail.
+            threshold (float): Allowed slowdown as a fraction of the baseline.
+        """
+        self.compare = compare
+        self.threshold = threshold
+        self.results: dict = {}
+        self.baselines = self.load_baselines()
+
+    @staticmethod
+    def load_baselines() -> dict:
+        """Returns the recorded baselines, or an empty set if there are none."""
+        if not os.path.exists(BASELINES_PATH):
+            return {"benchmarks": {}}
+        with open(BASELINES_PATH) as f:
+            return json.load(f)
+
+    def record(self, name: str, result: dict, calibration_s: float) -> None:
+        """
+        Records one benchmark, failing it if compare mode is on and it regressed.
+
+        Args:
+            name (str): The benchmark's name.
+            result (dict): Its timings from measure().
+            calibration_s (float): The calibration workload's time, measured alongside.
+        """
+        result = dict(result, relative=result["min_s"] / calibration_s)
+        baseline = self.baselines["benchmarks"].get(name)
+        if baseline is not None:
+            result["change"] = result["relative"] / baseline["relative"] - 1
+        self.results[name] = result
+        if self.compare and result.get("change", 0.0) > self.threshold:
+            pytest.fail(
+                f"{name} regressed {result['change']:+.0%} against its baseline "
+                f"(threshold {self.threshold:+.0%}): {result['min_s'] * 1e6:.1f} us per call at best",
+                pytrace=False,
+            )
+
+    def save(self) -> None:
+        """Merges this session's results into baselines.json."""
+        benchmarks = dict(self.baselines["benchmarks"])
+        for name, result in self.results.items():
+            benchmarks[name] = {
+                "median_us": round(result["median_s"] * 1e6, 2),
+                "min_us": round(result["min_s"] * 1e6, 2),
+                "relative": round(result["relative"], 4),
+            }
+        with open(BASELINES_PATH, "w") as f:
+            json.dump({"benchmarks": dict(sorted(benchmarks.items()))}, f, indent=2)
+            f.write("\n")
+
+    def report(self) -> list:
+        """Returns the results as table lines."""
+        lines = [f"{'benchmark':<56}{'median us':>12}{'min us':>12}{'vs baseline':>13}"]
+        for name, result in sorted(self.results.items()):
+            change = f"{result['change']:+.0%}" if "change" in result else "new"
+            lines.append(f"{name:<56}{result['median_s'] * 1e6:>12.1f}{result['min_s'] * 1e6:>12.1f}{change:>13}")
+        return lines
+
+
+@pytest.fixture(scope="session")
+def benchmark_recorder(pytestconfig):
+    recorder = BenchmarkRecorder(pytestconfig.getoption("benchmark_compare"),
+                                 pytestconfig.getoption("benchmark_threshold"))
+    pytestconfig.stash[_RECORDER] = recorder
+    yield recorder
+    if pytestconfig.getoption("benchmark_save"):
+        recorder.save()
+
+
+@pytest.fixture
+def benchmark(request, benchmark_recorder):
+    """
+    Times a call path under the test's name.
+
+    Call it with the function to time and, optionally, an untimed ``setup``
+    run before every call. Returns the timings from measure().
+    """
+    def run(func: Callable[[], object], setup: Optional[Callable[[], object]] = None) -> dict:
+        calibration_s = measure(_calibration_workload)["min_s"]
+        result = measure(func, setup)
+        benchmark_recorder.record(request.node.name, result, calibration_s)
+        return result
+    return run
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    recorder = config.stash.get(_RECORDER, None)
+    if recorder is None or not recorder.results:
+        return
+    terminalreporter.section("benchmarks")
+    for line in recorder.report():
+        terminalreporter.write_line(line)
+
+
+def populate_users(size: int) -> None:
+    """
+    Fills the users table with ``size`` rows sharing one bcrypt hash of PASSWORD.
+
+    Every user has a favorite location spread over a few degrees, as in the
+    production table.
+    """
+    salt, hashed_password = User._generate_salted_hash(PASSWORD)
+    rows = (
+        {
+            "username": f"user{i}",
+            "salt": salt,
+            "password": hashed_password,
+            "location_name": f"City{i % 500}",
+            "latitude": 40.0 + i % 1000 / 250,
+            "longitude": -75.0 + i % 997 / 250,
+        }
+        for i in range(size)
+    )
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == 10000:
+            db.session.execute(insert(User), chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(insert(User), chunk)
+    db.session.commit()
+
+
+@pytest.fixture(scope="module")
+def users_table(table_rows):
+    """An app whose users table holds ``table_rows`` users, shared by a module's benchmarks."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        populate_users(table_rows)
+        yield table_rows
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,91 @@
+"""
+Realistically sized OpenWeather bodies and app responses for the benchmarks.
+
+The shapes and field sets follow OpenWeather's documented responses, so
+decoding and serialization costs match production payloads.
+"""
+
+
+def _conditions(hour: int) -> list:
+    return [{"id": 800 + hour % 4, "main": "Clouds" if hour % 4 else "Clear",
+             "description": "scattered clouds" if hour % 4 else "clear sky", "icon": f"0{hour % 4 + 1}d"}]
+
+
+def _hourly(dt: int, hour: int) -> dict:
+    return {
+        "dt": dt + hour * 3600, "temp": 280.3 + hour / 4, "feels_like": 278.1 + hour / 4, "pressure": 1016,
+        "humidity": 62 - hour % 10, "dew_point": 273.4, "uvi": max(0.0, 3.1 - abs(12 - hour) / 4),
+        "clouds": 40, "visibility": 10000, "wind_speed": 4.6, "wind_deg": 310, "wind_gust": 7.2,
+        "weather": _conditions(hour),
+    }
+
+
+def _daily(dt: int, day: int) -> dict:
+    return {
+        "dt": dt + day * 86400, "sunrise": dt + day * 86400 - 21600, "sunset": dt + day * 86400 + 16200,
+        "moonrise": dt + day * 86400 - 3600, "moonset": dt + day * 86400 + 40000, "moon_phase": 0.25,
+        "summary": "Expect a day of partly cloudy with rain",
+        "temp": {"day": 281.2 + day, "min": 275.1 + day, "max": 283.9 + day, "night": 276.4,
+                 "eve": 279.8, "morn": 275.6},
+        "feels_like": {"day": 279.0, "night": 273.9, "eve": 277.4, "morn": 272.8},
+        "pressure": 1014, "humidity": 58, "dew_point": 272.9, "wind_speed": 6.1, "wind_deg": 290,
+        "wind_gust": 11.4, "weather": _conditions(day), "clouds": 55, "pop": 0.42, "rain": 1.37, "uvi": 2.8,
+    }
+
+
+DT = 1700000000
+
+UPSTREAM = {
+    "weather": {
+        "coord": {"lon": -71.0589, "lat": 42.3601}, "weather": _conditions(0), "base": "stations",
+        "main": {"temp": 281.5, "feels_like": 279.3, "temp_min": 280.1, "temp_max": 282.9, "pressure": 1016,
+                 "humidity": 62, "sea_level": 1016, "grnd_level": 1013},
+        "visibility": 10000, "wind": {"speed": 4.6, "deg": 310, "gust": 7.2}, "clouds": {"all": 40},
+        "dt": DT, "sys": {"type": 2, "id": 2013408, "country": "US", "sunrise": DT - 21600, "sunset": DT + 16200},
+        "timezone": -18000, "id": 4930956, "name": "Boston", "cod": 200,
+    },
+    "overview": {
+        "lat": 42.3601, "lon": -71.0589, "tz": "-05:00", "date": "2023-11-14", "units": "metric",
+        "weather_overview": "The current weather is partly cloudy with a temperature of 8 degrees. "
+                            "Winds from the northwest at 5 metres per second keep it feeling cooler, "
+                            "around 6 degrees. Expect clouds to thicken through the afternoon with a "
+                            "chance of light rain in the evening and overnight lows near 2 degrees.",
+    },
+    "onecall": {
+        "lat": 42.3601, "lon": -71.0589, "timezone": "America/New_York", "timezone_offset": -18000,
+        "current": _hourly(DT, 0),
+        "hourly": [_hourly(DT, hour) for hour in range(48)],
+        "daily": [_daily(DT, day) for day in range(8)],
+    },
+    "timemachine": {
+        "lat": 42.3601, "lon": -71.0589, "timezone": "America/New_York", "timezone_offset": -18000,
+        "data": [_hourly(DT, hour) for hour in range(24)],
+    },
+    "day_summary": {
+        "lat": 42.3601, "lon": -71.0589, "tz": "-05:00", "date": "2023-11-14", "units": "metric",
+        "cloud_cover": {"afternoon": 40}, "humidity": {"afternoon": 62}, "precipitation": {"total": 1.4},
+        "temperature": {"min": 2.1, "max": 9.8, "afternoon": 9.2, "night": 3.3, "evening": 6.7, "morning": 2.5},
+        "pressure": {"afternoon": 1016}, "wind": {"max": {"speed": 7.2, "direction": 310}},
+    },
+    "air_pollution": {
+        "coord": {"lon": -71.0589, "lat": 42.3601},
+        "list": [{"main": {"aqi": 2}, "dt": DT,
+                  "components": {"co": 230.31, "no": 0.02, "no2": 8.91, "o3": 61.51, "so2": 1.12,
+                                 "pm2_5": 4.17, "pm10": 6.33, "nh3": 0.51}}],
+    },
+}
+
+RESPONSES = {
+    "current_weather": {"location": "Boston", "current_weather": UPSTREAM["weather"], "age": 12, "stale": False},
+    "forecast": {"location": "Boston", "forecast": UPSTREAM["onecall"]["daily"], "age": 12, "stale": False},
+    "dashboard": {
+        "location": "Boston", "errors": {}, "stale": [],
+        "current_weather": UPSTREAM["weather"],
+        "forecast": UPSTREAM["onecall"]["daily"],
+        "air_quality": UPSTREAM["air_pollution"],
+    },
+    "historical_month": {
+        "location": "Boston",
+        "days": [{"date": f"2023-11-{day:02d}", "historical_weather": UPSTREAM["timemachine"]} for day in range(1, 31)],
+    },
+}
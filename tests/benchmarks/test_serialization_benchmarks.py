@@ -0,0 +1,20 @@
+from flask import jsonify
+import pytest
+
+from app import create_app
+from config import TestConfig
+from tests.benchmarks import payloads
+
+
+@pytest.fixture(scope="module")
+def app_context():
+    app = create_app(TestConfig)
+    with app.app_context():
+        yield app
+
+
+@pytest.mark.parametrize("response", sorted(payloads.RESPONSES))
+def test_jsonify(benchmark, app_context, response):
+    """Serializing a typical route response through the app's JSON provider."""
+    data = payloads.RESPONSES[response]
+    benchmark(lambda: jsonify(data).get_data())
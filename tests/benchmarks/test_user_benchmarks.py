@@ -0,0 +1,46 @@
+import itertools
+import random
+
+from meal_max.models.user_model import User, favorite_cache
+from tests.benchmarks.conftest import PASSWORD
+
+
+def _usernames(table_rows: int) -> itertools.cycle:
+    rng = random.Random(table_rows)
+    return itertools.cycle([f"user{rng.randrange(table_rows)}" for _ in range(1000)])
+
+
+def test_login(benchmark, users_table):
+    """Credentials lookup plus bcrypt verification at the test cost factor."""
+    usernames = _usernames(users_table)
+    benchmark(lambda: User.login(next(usernames), PASSWORD))
+
+def test_get_favorite(benchmark, users_table):
+    """A favorite-cache miss, answered by the database."""
+    usernames = _usernames(users_table)
+    username = None
+
+    def evict():
+        nonlocal username
+        username = next(usernames)
+        favorite_cache.delete(username)
+
+    benchmark(lambda: User.get_favorite(username), setup=evict)
+
+def test_get_favorite_cached(benchmark, users_table):
+    """A favorite-cache hit."""
+    usernames = [f"user{i}" for i in range(min(users_table, 100))]
+    for username in usernames:
+        User.get_favorite(username)
+    cycle = itertools.cycle(usernames)
+    benchmark(lambda: User.get_favorite(next(cycle)))
+
+def test_set_favorite(benchmark, users_table):
+    """A single-row UPDATE and commit."""
+    usernames = _usernames(users_table)
+    benchmark(lambda: User.set_favorite(next(usernames), "Boston", 42.36, -71.06))
+
+def test_create_account(benchmark, users_table):
+    """Hashing a new password and inserting the row."""
+    counter = itertools.count()
+    benchmark(lambda: User.create_account(f"new{users_table}-{next(counter)}", PASSWORD))
@@ -0,0 +1,105 @@
+from datetime import date, timedelta
+import itertools
+import json
+
+import pytest
+
+from app import create_app
+from config import TestConfig
+from meal_max.db import db
+from meal_max.models import weather_model
+from meal_max.models.favorite_location_model import FavoriteLocation
+from meal_max.models.user_model import User
+from meal_max.utils.rate_limit import GLOBAL, QuotaGovernor, TokenBucket
+from tests.benchmarks import payloads
+
+
+class _StubResponse:
+    status_code = 200
+
+    def __init__(self, body: bytes):
+        self._body = body
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self):
+        return json.loads(self._body)
+
+
+class StubTransport:
+    """Answers upstream GETs with canned OpenWeather bodies, decoded on every call like a real response."""
+
+    def __init__(self):
+        endpoints = {url: endpoint for endpoint, url in weather_model.UPSTREAM_URLS.items()}
+        self._bodies = {url: json.dumps(payloads.UPSTREAM[endpoint]).encode() for url, endpoint in endpoints.items()}
+        self.calls = 0
+
+    def get(self, url, params=None, before_retry=None):
+        self.calls += 1
+        return _StubResponse(self._bodies[url])
+
+
+@pytest.fixture(scope="module")
+def weather_app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        User.create_account("bench", "benchmark-password")
+        User.set_favorite("bench", "Boston", 42.3601, -71.0589)
+        for name, lat, lon in (("Boston", 42.3601, -71.0589), ("Cambridge", 42.3736, -71.1097),
+                               ("New York", 40.7128, -74.0060), ("Chicago", 41.8781, -87.6298)):
+            FavoriteLocation.add_location("bench", name, lat, lon)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def transport(weather_app, monkeypatch):
+    """Routes upstream calls to the stub with no quota in the way."""
+    stub = StubTransport()
+    monkeypatch.setattr(weather_model.http_client, "get", stub.get)
+    monkeypatch.setattr(weather_model, "quota_governor", QuotaGovernor({GLOBAL: TokenBucket(1e9, 1e9)}))
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "benchmark-key")
+    return stub
+
+
+def _cold():
+    weather_model.weather_cache.clear()
+    for index in weather_model.spatial_indexes.values():
+        index.clear()
+
+
+@pytest.mark.parametrize("fetcher", ["fetch_current_weather", "fetch_weather_overview", "fetch_forecast",
+                                     "fetch_air_quality", "fetch_dashboard", "fetch_locations_weather"])
+def test_fetcher_cache_miss(benchmark, transport, fetcher):
+    """A fetcher whose upstream calls all miss the cache."""
+    fetch = getattr(weather_model, fetcher)
+    benchmark(lambda: fetch("bench"), setup=_cold)
+    assert transport.calls > 0
+
+def test_fetch_current_weather_cache_hit(benchmark, transport):
+    weather_model.fetch_current_weather("bench")
+    benchmark(lambda: weather_model.fetch_current_weather("bench"))
+    assert transport.calls == 1
+
+def test_fetch_historical_weather_miss(benchmark, transport):
+    """A day missing from the historical store: one upstream call and a store write."""
+    days = (date(2020, 1, 1) - timedelta(days=offset) for offset in itertools.count())
+    benchmark(lambda: weather_model.fetch_historical_weather("bench", next(days).isoformat()))
+
+def test_fetch_historical_weather_stored(benchmark, transport):
+    weather_model.fetch_historical_weather("bench", "2020-01-01")
+    benchmark(lambda: weather_model.fetch_historical_weather("bench", "2020-01-01"))
+
+def test_fetch_historical_weather_range_stored(benchmark, transport):
+    """A month read back from the historical store in one query."""
+    list(weather_model.fetch_historical_weather_range("bench", "2020-01-01", "2020-01-30"))
+    benchmark(lambda: list(weather_model.fetch_historical_weather_range("bench", "2020-01-01", "2020-01-30")))
+
+def test_fetch_historical_statistics_stored(benchmark, transport):
+    """Climatology statistics over a month of day summaries read back from the historical store."""
+    weather_model.fetch_historical_statistics("bench", "2020-01-01", "2020-01-30")
+    benchmark(lambda: weather_model.fetch_historical_statistics("bench", "2020-01-01", "2020-01-30"))
+    assert transport.calls == 30
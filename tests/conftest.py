@@ -3,6 +3,23 @@ import pytest
 from app import create_app
 from config import TestConfig
 from meal_max.db import db
+from meal_max.models import weather_model
+from meal_max.models.historical_store import HistoricalStore
+from meal_max.models.user_model import credential_cache, favorite_cache
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark", "model hot path benchmarks (tests/benchmarks)")
+    group.addoption("--benchmark", action="store_true",
+                    help="Run the benchmark suite, which is skipped otherwise.")
+    group.addoption("--benchmark-compare", action="store_true",
+                    help="Fail benchmarks slower than their baseline by more than --benchmark-threshold.")
+    group.addoption("--benchmark-save", action="store_true",
+                    help="Record the results as the new baselines.")
+    group.addoption("--benchmark-threshold", type=float, default=1.0,
+                    help="Allowed slowdown against the baseline, as a fraction (default 1.0, twice as slow).")
+    group.addoption("--benchmark-rows", default="1000,100000",
+                    help="Comma-separated users table sizes (default 1000,100000).")
 
 @pytest.fixture
 def app():
@@ -20,4 +37,43 @@ def client(app):
 @pytest.fixture
 def session(app):
     with app.app_context():
-        yield db.session
\ No newline at end of file
+        yield db.session
+
+@pytest.fixture(autouse=True)
+def clear_weather_cache():
+    """Start every test with an empty upstream response cache."""
+    weather_model.weather_cache.clear()
+    for index in weather_model.spatial_indexes.values():
+        index.clear()
+    yield
+    weather_model.weather_cache.clear()
+
+@pytest.fixture(autouse=True)
+def clear_favorite_cache():
+    """Start every test with empty favorite-location and credential caches."""
+    favorite_cache.clear()
+    credential_cache.clear()
+    yield
+    favorite_cache.clear()
+    credential_cache.clear()
+
+@pytest.fixture(autouse=True)
+def historical_store(tmp_path, monkeypatch):
+    """Point the historical weather store at a per-test database file."""
+    store = HistoricalStore(str(tmp_path / "historical_weather.db"))
+    monkeypatch.setattr(weather_model, "historical_store", store)
+    yield store
+    store.close()
+
+@pytest.fixture(autouse=True)
+def reset_quota():
+    """Start every test with full upstream quota buckets."""
+    weather_model.quota_governor.reset()
+    yield
+
+@pytest.fixture(autouse=True)
+def reset_circuits():
+    """Start every test with every upstream circuit closed."""
+    for breaker in weather_model.circuit_breakers.values():
+        breaker.reset()
+    yield
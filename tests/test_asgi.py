@@ -0,0 +1,128 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+
+from asgi import create_asgi_app
+from config import TestConfig
+
+
+def _request(asgi_app, method, url, **kwargs):
+    """Send one request to the ASGI app and return the response."""
+    async def send():
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            return await client.request(method, url, **kwargs)
+    return asyncio.run(send())
+
+def _setup_user(asgi_app):
+    """Create a user with a favorite location through the Flask fallback routes."""
+    _request(asgi_app, "POST", "/api/create-account", json={"username": "test_user", "password": "password123"})
+    _request(asgi_app, "POST", "/api/set-favorite", json={"username": "test_user", "city_name": "Boston", "latitude": 42.3601, "longitude": -71.0589})
+
+def test_async_current_weather(mocker):
+    mocker.patch("os.getenv", side_effect=lambda key, default=None: "mock_api_key" if key == "OPENWEATHER_API_KEY" else default)
+    asgi_app = create_asgi_app(TestConfig)
+    _setup_user(asgi_app)
+
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"main": {"temp": 10}}
+    mock_get = mocker.patch("meal_max.models.weather_model.async_http_client.get", new=AsyncMock(return_value=mock_response))
+
+    response = _request(asgi_app, "GET", "/api/current-weather", params={"username": "test_user"})
+
+    assert response.status_code == 200
+    assert response.json() == {"location": "Boston", "current_weather": {"main": {"temp": 10}}, "age": 0, "stale": False}
+    mock_get.assert_awaited_once()
+
+def test_async_dashboard_with_session_token(mocker):
+    mocker.patch("os.getenv", side_effect=lambda key, default=None: "mock_api_key" if key == "OPENWEATHER_API_KEY" else default)
+    asgi_app = create_asgi_app(TestConfig)
+    _setup_user(asgi_app)
+    token = _request(asgi_app, "POST", "/api/login", json={"username": "test_user", "password": "password123"}).json()["token"]
+
+    async def fake_get(url, params=None, before_retry=None):
+        if url.endswith("air_pollution"):
+            raise httpx.ConnectError("upstream unavailable")
+        response = MagicMock()
+        response.json.return_value = {"daily": [{"temp": {"day": 12}}]}
+        return response
+    mocker.patch("meal_max.models.weather_model.async_http_client.get", new=fake_get)
+
+    response = _request(asgi_app, "GET", "/api/dashboard", params={"sections": "forecast,air_quality"},
+                        headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert response.json()["forecast"] == [{"temp": {"day": 12}}]
+    assert response.json()["errors"] == {"air_quality": "upstream unavailable"}
+
+def test_async_locations_weather(mocker):
+    mocker.patch("os.getenv", side_effect=lambda key, default=None: "mock_api_key" if key == "OPENWEATHER_API_KEY" else default)
+    asgi_app = create_asgi_app(TestConfig)
+    _setup_user(asgi_app)
+    for name, lat, lon in (("Home", 42.3601, -71.0589), ("Gym", 42.3602, -71.0588), ("Paris", 48.8566, 2.3522)):
+        _request(asgi_app, "POST", "/api/favorite-locations",
+                 json={"username": "test_user", "city_name": name, "latitude": lat, "longitude": lon})
+
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"main": {"temp": 10}}
+    mock_get = mocker.patch("meal_max.models.weather_model.async_http_client.get", new=AsyncMock(return_value=mock_response))
+
+    response = _request(asgi_app, "GET", "/api/favorite-locations/weather", params={"username": "test_user"})
+
+    assert response.status_code == 200
+    assert [entry["location"] for entry in response.json()["locations"]] == ["Home", "Gym", "Paris"]
+    assert response.json()["upstream_calls"] == 2
+    assert mock_get.await_count == 2
+
+def test_async_invalid_token():
+    asgi_app = create_asgi_app(TestConfig)
+    response = _request(asgi_app, "GET", "/api/forecast", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+    assert response.json() == {"error": "Invalid session token"}
+
+def test_async_historical_requires_date():
+    asgi_app = create_asgi_app(TestConfig)
+    response = _request(asgi_app, "GET", "/api/historical-weather", params={"username": "test_user"})
+    assert response.status_code == 400
+
+def test_async_historical_store_runs_off_the_loop(mocker, historical_store):
+    """Test that the async historical fetcher reads and writes the store in worker threads."""
+    mocker.patch("os.getenv", side_effect=lambda key, default=None: "mock_api_key" if key == "OPENWEATHER_API_KEY" else default)
+    asgi_app = create_asgi_app(TestConfig)
+    _setup_user(asgi_app)
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"data": [{"temp": 3}]}
+    mocker.patch("meal_max.models.weather_model.async_http_client.get", new=AsyncMock(return_value=mock_response))
+    to_thread = mocker.spy(asyncio, "to_thread")
+
+    response = _request(asgi_app, "GET", "/api/historical-weather", params={"username": "test_user", "date": "2023-12-01"})
+
+    assert response.status_code == 200
+    assert response.json()["historical_weather"] == {"data": [{"temp": 3}]}
+    store_calls = [call.args[0] for call in to_thread.call_args_list if call.args[0] in (historical_store.get, historical_store.put)]
+    assert store_calls == [historical_store.get, historical_store.put]
+
+def test_non_weather_routes_fall_back_to_flask():
+    asgi_app = create_asgi_app(TestConfig)
+    response = _request(asgi_app, "GET", "/api/health")
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+
+def test_async_weather_conditional_request(mocker):
+    mocker.patch("os.getenv", side_effect=lambda key, default=None: "mock_api_key" if key == "OPENWEATHER_API_KEY" else default)
+    asgi_app = create_asgi_app(TestConfig)
+    _setup_user(asgi_app)
+
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"list": [{"main": {"aqi": 2}}]}
+    mocker.patch("meal_max.models.weather_model.async_http_client.get", new=AsyncMock(return_value=mock_response))
+
+    response = _request(asgi_app, "GET", "/api/air-quality", params={"username": "test_user"})
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"].startswith("public, max-age=600")
+
+    response = _request(asgi_app, "GET", "/api/air-quality", params={"username": "test_user"},
+                        headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
@@ -0,0 +1,76 @@
+import io
+
+import pytest
+
+from app import create_app
+from config import TestConfig
+from meal_max.utils.bulk_io import detect_format, read_rows, write_rows
+
+
+def test_detect_format():
+    """Test picking the format from the parameter or the content type."""
+    assert detect_format("text/csv; charset=utf-8") == "csv"
+    assert detect_format("application/x-ndjson") == "ndjson"
+    assert detect_format(None) == "ndjson"
+    assert detect_format("text/csv", "ndjson") == "ndjson"
+    with pytest.raises(ValueError, match="Unsupported format 'xml'"):
+        detect_format(None, "xml")
+
+def test_read_ndjson_rows():
+    """Test that malformed lines yield None and blank lines are skipped."""
+    body = b'{"username": "alice"}\n\nnot json\n[1, 2]\n{"username": "bob"}\n'
+    assert list(read_rows(io.BytesIO(body), "ndjson")) == [{"username": "alice"}, None, None, {"username": "bob"}]
+
+def test_read_csv_rows():
+    """Test parsing a CSV upload with a header row."""
+    body = b"username,password\nalice, password123\nbob,password456\n"
+    assert list(read_rows(io.BytesIO(body), "csv")) == [
+        {"username": "alice", "password": "password123"},
+        {"username": "bob", "password": "password456"},
+    ]
+
+def test_write_rows_round_trip():
+    """Test that written rows parse back to the same values."""
+    rows = [{"username": "alice", "city_name": "Boston"}, {"username": "bob", "city_name": "Seattle"}]
+    for fmt in ("csv", "ndjson"):
+        body = "".join(write_rows(iter(rows), fmt, ["username", "city_name"])).encode()
+        assert list(read_rows(io.BytesIO(body), fmt)) == rows
+
+ADMIN = {"X-Admin-Token": TestConfig.BULK_ADMIN_TOKEN}
+
+
+def test_bulk_routes_round_trip(client):
+    """Test importing accounts and favorites, then exporting them as CSV."""
+    response = client.post("/api/bulk/create-accounts", data=b"username,password\nalice,password123\nbob,short\n",
+                           content_type="text/csv", headers=ADMIN)
+    assert response.status_code == 200
+    assert response.json["created"] == 1
+    assert response.json["errors"][0]["row"] == 2
+
+    favorites = b'{"username": "alice", "city_name": "Boston", "latitude": 42.36, "longitude": -71.06}\n'
+    response = client.post("/api/bulk/set-favorites", data=favorites, content_type="application/x-ndjson", headers=ADMIN)
+    assert response.json["updated"] == 1
+
+    response = client.get("/api/bulk/export-favorites?format=csv", headers=ADMIN)
+    assert response.mimetype == "text/csv"
+    assert response.get_data(as_text=True) == "username,city_name,latitude,longitude\nalice,Boston,42.36,-71.06\n"
+
+@pytest.mark.parametrize("headers", [{}, {"X-Admin-Token": "wrong"}])
+def test_bulk_routes_require_admin_token(client, headers):
+    """Test that the bulk routes reject a missing or wrong admin token before touching the data."""
+    response = client.post("/api/bulk/create-accounts", data=b"username,password\nalice,password123\n",
+                           content_type="text/csv", headers=headers)
+    assert response.status_code == 401
+    assert client.post("/api/bulk/set-favorites", data=b"", headers=headers).status_code == 401
+    assert client.get("/api/bulk/export-favorites", headers=headers).status_code == 401
+    assert client.get("/api/bulk/export-favorites", headers=ADMIN).get_data() == b""  # No account was created
+
+def test_bulk_routes_disabled_without_admin_token():
+    """Test that the bulk routes are off when no admin token is configured."""
+    class NoAdminConfig(TestConfig):
+        BULK_ADMIN_TOKEN = None
+
+    client = create_app(NoAdminConfig).test_client()
+    response = client.get("/api/bulk/export-favorites", headers={"X-Admin-Token": ""})
+    assert response.status_code == 403
+    assert "BULK_ADMIN_TOKEN" in response.json["error"]
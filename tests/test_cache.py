@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+from meal_max.utils.cache import TTLCache, VersionCounter
+
+
+def test_cache_set_and_get():
+    """Test storing and retrieving a value."""
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats()["hits"] == 1
+
+def test_cache_miss_returns_default():
+    """Test that a missing key returns the default and counts a miss."""
+    cache = TTLCache(maxsize=2)
+    assert cache.get("missing", "default") == "default"
+    assert cache.stats()["misses"] == 1
+
+def test_cache_entry_expires(mocker):
+    """Test that an entry is not returned once its TTL has elapsed."""
+    clock = mocker.patch("meal_max.utils.cache.time.monotonic", return_value=100.0)
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=10)
+    clock.return_value = 109.0
+    assert cache.get("a") == 1
+    clock.return_value = 111.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_cache_evicts_least_recently_used():
+    """Test that the least recently used entry is evicted when full."""
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_cache_invalid_maxsize():
+    """Test that a non-positive maxsize is rejected."""
+    with pytest.raises(ValueError, match="maxsize must be a positive integer"):
+        TTLCache(maxsize=0)
+
+def test_version_counter_detects_other_writers(tmp_path):
+    """Test that a bump from another counter is reported exactly once."""
+    path = str(tmp_path / "version.db")
+    reader = VersionCounter(path, check_interval=0)
+    writer = VersionCounter(path, check_interval=0)
+    assert reader.changed() is False
+    writer.bump()
+    assert reader.changed() is True
+    assert reader.changed() is False
+
+def test_version_counter_own_bump_is_not_a_change(tmp_path):
+    """Test that a process does not invalidate itself with its own writes."""
+    counter = VersionCounter(str(tmp_path / "version.db"), check_interval=0)
+    counter.changed()
+    assert counter.bump() is False
+    assert counter.changed() is False
+
+def test_version_counter_check_interval(tmp_path):
+    """Test that reads are throttled to the check interval."""
+    path = str(tmp_path / "version.db")
+    reader = VersionCounter(path, check_interval=60)
+    reader.changed()
+    VersionCounter(path).bump()
+    assert reader.changed() is False
+
+def test_clear_can_keep_stats():
+    """Test that clearing with reset_stats=False keeps the counters."""
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.clear(reset_stats=False)
+    assert len(cache) == 0
+    assert cache.stats()["hits"] == 1
+
+def test_cache_lookup_returns_stale_entries(mocker):
+    """Test that lookup keeps serving an expired entry until its stale window ends."""
+    clock = mocker.patch("meal_max.utils.cache.time.monotonic", return_value=100.0)
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=10, stale_ttl=20)
+    clock.return_value = 105.0
+    assert cache.lookup("a") == (1, 5.0, False)
+    clock.return_value = 115.0
+    assert cache.get("a") is None
+    assert cache.lookup("a") == (1, 15.0, True)
+    clock.return_value = 131.0
+    assert cache.lookup("a") is None
+    assert len(cache) == 0
+    assert cache.stats()["stale_hits"] == 1
+
+def test_cache_reports_removed_keys(mocker):
+    """Test that eviction, expiry, delete and clear each report the key removed."""
+    removed = []
+    cache = TTLCache(maxsize=2, on_remove=removed.append)
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert removed == ["a"]
+    cache.delete("b")
+    cache.delete("missing")
+    assert removed == ["a", "b"]
+    clock = mocker.patch("meal_max.utils.cache.time.monotonic", return_value=time.monotonic() + 5)
+    cache.set("d", 4, ttl=1)
+    clock.return_value += 2
+    assert cache.lookup("d") is None
+    assert removed == ["a", "b", "d"]
+    cache.clear()
+    assert removed == ["a", "b", "d", "c"]
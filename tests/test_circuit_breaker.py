@@ -0,0 +1,104 @@
+import pytest
+import requests
+from unittest.mock import MagicMock
+
+from meal_max.models import weather_model
+from meal_max.models.weather_model import fetch_current_weather
+from meal_max.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def _fail(breaker, times):
+    for _ in range(times):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_breaker_opens_at_threshold():
+    """Test that consecutive failures open the circuit and calls then fail fast."""
+    breaker = CircuitBreaker("weather", failure_threshold=3, reset_timeout=30)
+    _fail(breaker, 2)
+    assert breaker.state == CLOSED
+    _fail(breaker, 1)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError, match="Upstream weather is unavailable"):
+        breaker.before_call()
+    assert breaker.stats()["rejected"] == 1
+
+def test_breaker_success_resets_failures():
+    """Test that only consecutive failures count toward the threshold."""
+    breaker = CircuitBreaker("weather", failure_threshold=2)
+    _fail(breaker, 1)
+    breaker.before_call()
+    breaker.record_success()
+    _fail(breaker, 1)
+    assert breaker.state == CLOSED
+
+def test_breaker_half_open_trial(mocker):
+    """Test that one trial call is let through after the cool-down."""
+    clock = mocker.patch("meal_max.utils.circuit_breaker.time.monotonic", return_value=0.0)
+    breaker = CircuitBreaker("onecall", failure_threshold=1, reset_timeout=10)
+    _fail(breaker, 1)
+    clock.return_value = 11.0
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.return_value = 22.0
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+def test_open_circuit_skips_upstream(mocker):
+    """Test that an open circuit fails fast without calling OpenWeather."""
+    location = ("Boston", 42.3601, -71.0589)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    mocker.patch.object(weather_model, "circuit_breakers", {"weather": CircuitBreaker("weather", failure_threshold=2)})
+    mock_get = mocker.patch("meal_max.models.weather_model.http_client.get", side_effect=requests.ConnectionError("down"))
+
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            fetch_current_weather("test_user", location)
+    with pytest.raises(CircuitOpenError):
+        fetch_current_weather("test_user", location)
+    assert mock_get.call_count == 2
+    assert weather_model.upstream_stats()["circuits"]["weather"]["state"] == OPEN
+
+def test_client_errors_do_not_open_circuit(mocker):
+    """Test that a 401 from OpenWeather does not count as an outage."""
+    location = ("Boston", 42.3601, -71.0589)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    mocker.patch.object(weather_model, "circuit_breakers", {"weather": CircuitBreaker("weather", failure_threshold=1)})
+    error = requests.HTTPError("401", response=MagicMock(status_code=401))
+    mocker.patch("meal_max.models.weather_model.http_client.get").return_value.raise_for_status.side_effect = error
+
+    with pytest.raises(requests.HTTPError):
+        fetch_current_weather("test_user", location)
+    assert weather_model.circuit_breakers["weather"].state == CLOSED
+
+def test_late_success_does_not_close_open_circuit():
+    """Test that a slow success admitted before the circuit opened leaves it open."""
+    breaker = CircuitBreaker("weather", failure_threshold=1, reset_timeout=30)
+    breaker.before_call()  # The slow call
+    _fail(breaker, 1)
+    breaker.record_success()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_interrupted_trial_releases_slot(mocker):
+    """Test that a trial call interrupted by a BaseException frees the half-open slot."""
+    location = ("Boston", 42.3601, -71.0589)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    breaker = CircuitBreaker("weather", failure_threshold=1, reset_timeout=0)
+    mocker.patch.object(weather_model, "circuit_breakers", {"weather": breaker})
+    _fail(breaker, 1)
+    mocker.patch("meal_max.models.weather_model.http_client.get", side_effect=KeyboardInterrupt)
+
+    with pytest.raises(KeyboardInterrupt):
+        fetch_current_weather("test_user", location)
+
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()  # The slot is free for the next trial
@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+import requests
+from unittest.mock import MagicMock
+
+from meal_max.models import weather_model
+from meal_max.models.weather_model import fetch_historical_statistics, location_cell
+from meal_max.utils import climatology
+
+
+DATES = ["2023-12-01", "2023-12-02", "2023-12-03", "2023-12-04"]
+
+
+def _summary(low, high, precipitation=0.0):
+    """Builds a day_summary payload with the fields the statistics read."""
+    return {"temperature": {"min": low, "max": high, "afternoon": high - 1},
+            "precipitation": {"total": precipitation}}
+
+
+def test_daily_arrays():
+    """Test loading summaries, including missing days and missing values."""
+    daily_min, daily_max, daily_precip = climatology.daily_arrays(4, [
+        (0, _summary(10, 14, 0.5)),
+        (2, {"temperature": {"min": 3}}),
+    ])
+    assert daily_min[[0, 2]].tolist() == [10, 3] and np.isnan(daily_min[[1, 3]]).all()
+    assert daily_max[0] == 14 and np.isnan(daily_max[2])
+    assert daily_precip[0] == 0.5 and np.isnan(daily_precip[2])
+
+def test_summarize():
+    """Test the statistics against values worked out by hand."""
+    arrays = climatology.daily_arrays(4, [
+        (0, _summary(10, 14, 2.0)),
+        (1, _summary(20, 22, 0.5)),
+        (2, _summary(14, 18)),
+        (3, _summary(16, 20, 3.0)),
+    ])
+
+    stats = climatology.summarize(DATES, *arrays, percentiles=[50], window=2, base_temperature=18)
+
+    # Daily means 12, 21, 16, 18 against a base of 18
+    assert stats["days_with_data"] == 4
+    assert stats["temperature"] == {
+        "min": 10.0, "max": 22.0, "mean": 16.75, "std": 3.27, "percentiles": {"p50": 17.0},
+        "mean_daily_min": 15.0, "mean_daily_max": 18.5}
+    assert stats["precipitation"] == {
+        "total": 5.5, "max_daily": {"value": 3.0, "date": "2023-12-04"}, "wet_days": 2}
+    assert stats["degree_days"] == {"base": 18, "heating": 8.0, "cooling": 3.0}
+    assert stats["rolling"]["warmest_mean_temperature"] == {"value": 18.5, "end_date": "2023-12-03"}
+    assert stats["rolling"]["coldest_mean_temperature"] == {"value": 16.5, "end_date": "2023-12-02"}
+    assert stats["rolling"]["wettest_total_precipitation"] == {"value": 3.0, "end_date": "2023-12-04"}
+
+def test_summarize_missing_days():
+    """Test that a day without data breaks rolling windows and is left out of the aggregates."""
+    arrays = climatology.daily_arrays(3, [(0, _summary(8, 12)), (2, _summary(18, 22))])
+
+    stats = climatology.summarize(DATES[:3], *arrays, window=2, base_temperature=18)
+
+    assert stats["days_with_data"] == 2
+    assert stats["degree_days"]["heating"] == 8.0
+    assert stats["rolling"]["warmest_mean_temperature"] is None
+
+def test_summarize_no_data():
+    stats = climatology.summarize(DATES, *climatology.daily_arrays(4, []), percentiles=[90])
+    assert stats["days_with_data"] == 0
+    assert stats["temperature"]["mean"] is None
+    assert stats["temperature"]["percentiles"] == {"p90": None}
+    assert stats["precipitation"]["total"] == 0.0
+    assert stats["precipitation"]["max_daily"] is None
+
+def test_fetch_historical_statistics(mocker):
+    """Test statistics over day summaries fetched per date, with one failing day."""
+    mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=("San Francisco", 37.7749, -122.4194))
+    mocker.patch("os.getenv", return_value="mock_api_key")
+
+    def fake_get(url, params=None, before_retry=None):
+        assert url == weather_model.UPSTREAM_URLS["day_summary"]
+        if params["date"] == "2023-12-02":
+            raise requests.ConnectionError("upstream unavailable")
+        response = MagicMock()
+        response.json.return_value = _summary(5, 15, 1.5)
+        return response
+    mock_get = mocker.patch("meal_max.models.weather_model.http_client.get", side_effect=fake_get)
+
+    result = fetch_historical_statistics("test_user", "2023-12-01", "2023-12-03", base_temperature=15)
+
+    assert result["location"] == "San Francisco"
+    assert result["days"] == 3
+    assert result["days_with_data"] == 2
+    assert result["errors"] == {"2023-12-02": "upstream unavailable"}
+    assert result["degree_days"]["heating"] == 10.0
+    assert result["precipitation"]["total"] == 3.0
+    assert set(result["temperature"]["percentiles"]) == {"p10", "p25", "p50", "p75", "p90"}
+    assert sorted(call.kwargs["params"]["date"] for call in mock_get.call_args_list) == DATES[:3]
+
+def test_fetch_historical_statistics_uses_store(mocker, historical_store):
+    """Test that stored day summaries are not fetched again."""
+    location = ("San Francisco", 37.7749, -122.4194)
+    mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=location)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    historical_store.put("day_summary", location_cell("day_summary", location), "2023-12-01", _summary(0, 10))
+    mock_get = mocker.patch("meal_max.models.weather_model.http_client.get")
+    mock_get.return_value.json.return_value = _summary(10, 20)
+
+    result = fetch_historical_statistics("test_user", "2023-12-01", "2023-12-02")
+    fetch_historical_statistics("test_user", "2023-12-01", "2023-12-02")
+
+    assert result["temperature"]["mean_daily_min"] == 5.0
+    mock_get.assert_called_once()
+
+def test_fetch_historical_statistics_does_not_store_today(mocker, historical_store):
+    """Test that only summaries of days before today (UTC) are persisted."""
+    location = ("San Francisco", 37.7749, -122.4194)
+    mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=location)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    mocker.patch("meal_max.models.weather_model.http_client.get").return_value.json.return_value = _summary(10, 20)
+    today = datetime.now(timezone.utc).date()
+    dates = [str(today - timedelta(days=1)), str(today), str(today + timedelta(days=1))]
+
+    result = fetch_historical_statistics("test_user", dates[0], dates[2])
+
+    assert result["days_with_data"] == 3
+    cell = location_cell("day_summary", location)
+    assert set(historical_store.get_many("day_summary", cell, dates)) == {dates[0]}
+
+def test_fetch_historical_statistics_invalid_parameters():
+    with pytest.raises(ValueError, match="Percentiles must be between 0 and 100."):
+        fetch_historical_statistics("test_user", "2023-12-01", "2023-12-03", percentiles=[101])
+    with pytest.raises(ValueError, match="Window must be at least 1 day."):
+        fetch_historical_statistics("test_user", "2023-12-01", "2023-12-03", window=0)
+
+def test_historical_statistics_route(client, mocker):
+    mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=("Boston", 42.36, -71.06))
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    mock_get = mocker.patch("meal_max.models.weather_model.http_client.get")
+    mock_get.return_value.json.return_value = _summary(3, 7, 1.0)
+
+    response = client.get("/api/historical-weather/statistics", query_string={
+        "username": "jdoe", "start": "2023-12-01", "end": "2023-12-07", "percentiles": "50,95", "window": "3"})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["temperature"]["percentiles"] == {"p50": 5.0, "p95": 5.0}
+    assert body["precipitation"]["wet_days"] == 7
+    assert body["rolling"]["wettest_total_precipitation"] == {"value": 3.0, "end_date": "2023-12-03"}
+
+    assert client.get("/api/historical-weather/statistics", query_string={
+        "username": "jdoe", "start": "2023-12-01"}).status_code == 400
+    assert client.get("/api/historical-weather/statistics", query_string={
+        "username": "jdoe", "start": "2023-12-01", "end": "2023-12-07", "window": "x"}).status_code == 400
@@ -0,0 +1,61 @@
+import datetime
+import gzip
+from unittest.mock import MagicMock
+
+import brotli
+import msgpack
+
+from meal_max.utils import encoding
+
+
+def test_fast_json_provider_matches_default(app):
+    """Test that the orjson-backed provider produces the same documents as Flask's default."""
+    value = {"b": 1, "a": [1.5, None, "é"], "when": datetime.date(2024, 1, 2)}
+    assert app.json.loads(app.json.dumps(value)) == {"a": [1.5, None, "é"], "b": 1, "when": "Tue, 02 Jan 2024 00:00:00 GMT"}
+    assert list(app.json.loads(app.json.dumps(value))) == ["a", "b", "when"]
+
+def test_choose_encoding():
+    """Test content-coding negotiation, honoring q=0."""
+    assert encoding.choose_encoding("gzip, deflate") == "gzip"
+    assert encoding.choose_encoding("gzip;q=0") is None
+    assert encoding.choose_encoding(None) is None
+
+def test_wants_msgpack_requires_preference():
+    """Test that JSON stays the default unless msgpack is ranked at least as high."""
+    assert not encoding.wants_msgpack("*/*")
+    assert not encoding.wants_msgpack("application/json, application/msgpack;q=0.5")
+
+def _setup_weather(client, mocker, payload):
+    mocker.patch("os.getenv", side_effect=lambda key, default=None: "mock_api_key" if key == "OPENWEATHER_API_KEY" else default)
+    client.post("/api/create-account", json={"username": "alice", "password": "password123"})
+    client.post("/api/set-favorite", json={"username": "alice", "city_name": "Boston", "latitude": 42.36, "longitude": -71.06})
+    mocker.patch("meal_max.models.weather_model.http_client.get").return_value = MagicMock(**{"json.return_value": payload})
+
+def test_weather_route_fields_projection(client, mocker):
+    """Test that the fields parameter prunes the upstream payload."""
+    _setup_weather(client, mocker, {"dt": 1, "main": {"temp": 10, "humidity": 80}, "weather": [{"id": 800, "description": "clear"}]})
+    response = client.get("/api/current-weather?username=alice&fields=main.temp,weather.description")
+    assert response.json["current_weather"] == {"main": {"temp": 10}, "weather": [{"description": "clear"}]}
+    assert client.get("/api/current-weather?username=alice&fields=main.").status_code == 400
+
+def test_weather_route_gzip(client, mocker):
+    """Test that large JSON responses are gzipped when the client accepts it."""
+    _setup_weather(client, mocker, {"daily": [{"temp": {"day": day}, "summary": "mild"} for day in range(50)]})
+    response = client.get("/api/forecast?username=alice", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert len(client.application.json.loads(gzip.decompress(response.data))["forecast"]) == 50
+
+def test_weather_route_brotli(client, mocker):
+    """Test that Brotli is preferred over gzip when the client accepts both."""
+    _setup_weather(client, mocker, {"daily": [{"temp": {"day": day}, "summary": "mild"} for day in range(50)]})
+    response = client.get("/api/forecast?username=alice", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert len(client.application.json.loads(brotli.decompress(response.data))["forecast"]) == 50
+
+def test_weather_route_msgpack(client, mocker):
+    """Test MessagePack negotiation through the Accept header."""
+    _setup_weather(client, mocker, {"dt": 1, "main": {"temp": 10}})
+    response = client.get("/api/current-weather?username=alice", headers={"Accept": "application/msgpack"})
+    assert response.mimetype == "application/msgpack"
+    assert msgpack.unpackb(response.data)["current_weather"] == {"dt": 1, "main": {"temp": 10}}
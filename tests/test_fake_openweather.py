@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+from benchmarks.fake_openweather import ENDPOINT_PATHS, FakeOpenWeather, parse_latency
+from benchmarks.load_test import build_requests, percentile, populate, run_load_test
+from meal_max.models import weather_model
+from meal_max.models.user_model import User
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    """Serve the fake OpenWeather API and point weather_model at it."""
+    fake = FakeOpenWeather(seed=1)
+    server, base_url = fake.start()
+    monkeypatch.setattr(weather_model, "UPSTREAM_URLS", weather_model.upstream_urls(base_url))
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "fake-key")
+    yield fake
+    server.shutdown()
+
+
+def test_parse_latency():
+    """Test each latency distribution and the error for a malformed one."""
+    rng = random.Random(1)
+    assert parse_latency("fixed:0.1")(rng) == 0.1
+    assert 0.1 <= parse_latency("uniform:0.1,0.2")(rng) <= 0.2
+    assert parse_latency("exp:0.05")(rng) > 0
+    assert parse_latency("lognormal:0.08,0.5")(rng) > 0
+    with pytest.raises(ValueError, match="Invalid latency"):
+        parse_latency("normal:1")
+
+def test_fake_serves_every_endpoint():
+    """Test that all six endpoints answer, and that a missing API key is rejected."""
+    fake = FakeOpenWeather()
+    client = fake.create_app().test_client()
+    query = {"lat": 42.36, "lon": -71.06, "appid": "key", "dt": 1, "date": "2023-12-01"}
+    for endpoint, path in ENDPOINT_PATHS.items():
+        response = client.get(path, query_string=query)
+        assert response.status_code == 200, endpoint
+    assert "daily" in client.get(ENDPOINT_PATHS["onecall"], query_string={"lat": 1, "lon": 1, "appid": "key"}).get_json()
+    assert client.get(ENDPOINT_PATHS["weather"], query_string={"lat": 1, "lon": 1}).status_code == 401
+    assert fake.stats()["total"] == 8
+    assert fake.stats()["endpoints"]["weather"] == {"ok": 1, "unauthorized": 1}
+
+def test_fake_injects_failures():
+    """Test 429 and 503 injection."""
+    query = {"lat": 1, "lon": 1, "appid": "key"}
+    throttled = FakeOpenWeather(throttle_rate=1.0).create_app().test_client().get(ENDPOINT_PATHS["weather"], query_string=query)
+    assert throttled.status_code == 429
+    assert throttled.headers["Retry-After"] == "1"
+    failing = FakeOpenWeather(error_rate=1.0).create_app().test_client().get(ENDPOINT_PATHS["weather"], query_string=query)
+    assert failing.status_code == 503
+
+def test_weather_model_against_fake_upstream(session, fake_upstream):
+    """Test a real HTTP round trip from weather_model to the fake server."""
+    User.create_account("alice", "password123")
+    User.set_favorite("alice", "Boston", 42.36, -71.06)
+
+    result = weather_model.fetch_current_weather("alice")
+    weather_model.fetch_current_weather("alice")
+
+    assert result["current_weather"]["weather"][0]["description"] == "clear sky"
+    assert fake_upstream.stats()["endpoints"] == {"weather": {"ok": 1}}
+
+def test_load_test_reports(app, fake_upstream):
+    """Test a small load test run end to end."""
+    rng = random.Random(1)
+    usernames = populate(app, 10, rng)
+    report = run_load_test(app, fake_upstream, build_requests(usernames, 40, rng), concurrency=1)
+
+    assert report["requests"] == 40
+    assert report["statuses"] == {"200": 40}
+    assert 0 < report["upstream_calls"] <= 40 * 3
+    assert report["latency"]["p50_ms"] <= report["latency"]["p99_ms"]
+
+def test_percentile():
+    assert percentile([1, 2, 3, 4], 0.5) == 2
+    assert percentile([1, 2, 3, 4], 0.99) == 4
+    assert percentile([], 0.5) == 0.0
+    assert percentile(list(range(1, 101)), 0.99) == 99
+    assert percentile(list(range(1, 1001)), 0.99) == 990
+
+def test_historical_statistics_against_fake_upstream(session, fake_upstream):
+    """Test that the statistics are built from one day_summary call per day over real HTTP."""
+    User.create_account("alice", "password123")
+    User.set_favorite("alice", "Boston", 42.36, -71.06)
+
+    result = weather_model.fetch_historical_statistics("alice", "2023-12-01", "2023-12-06", window=3)
+
+    assert fake_upstream.stats()["endpoints"] == {"day_summary": {"ok": 6}}
+    assert result["days_with_data"] == 6
+    assert result["errors"] == {}
+    # The fake reports 1, 2, 0, 1, 2, 0 mm over the six days and a 10 degree daily range
+    assert result["precipitation"]["total"] == 6.0
+    assert result["precipitation"]["wet_days"] == 4
+    assert result["temperature"]["mean_daily_max"] - result["temperature"]["mean_daily_min"] == 10.0
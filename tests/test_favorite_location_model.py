@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import MagicMock
+
+from meal_max.models import favorite_location_model
+from meal_max.models.favorite_location_model import FavoriteLocation
+from meal_max.models.user_model import User
+from meal_max.models.weather_model import fetch_locations_weather
+
+
+@pytest.fixture
+def user(session):
+    User.create_account("traveller", "password123")
+    return "traveller"
+
+
+def test_add_and_get_locations(user):
+    """Test that locations come back in the order they were added."""
+    assert FavoriteLocation.add_location(user, "Home", 42.36, -71.06) == 1
+    assert FavoriteLocation.add_location(user, "Office", 42.35, -71.05) == 2
+    assert FavoriteLocation.get_locations(user) == [
+        ("Home", 42.36, -71.06, 1),
+        ("Office", 42.35, -71.05, 2),
+    ]
+
+def test_all_coordinates(user):
+    """Test streaming every user's favorites from both tables, grouped by user."""
+    User.create_account("homebody", "password123")
+    User.create_account("nowhere", "password123")
+    User.set_favorite(user, "Boston", 42.3601, -71.0589)
+    User.set_favorite("homebody", "Paris", 48.8566, 2.3522)
+    FavoriteLocation.add_location(user, "Office", 42.35, -71.05)
+    rows = list(FavoriteLocation.all_coordinates(batch_size=1))
+    assert [row[0] for row in rows] == sorted(row[0] for row in rows)
+    assert sorted(row[1:] for row in rows) == [
+        ("Boston", 42.3601, -71.0589), ("Office", 42.35, -71.05), ("Paris", 48.8566, 2.3522)]
+
+def test_get_locations_empty_and_unknown_user(user):
+    """Test that a user without locations gets an empty list and an unknown user an error."""
+    assert FavoriteLocation.get_locations(user) == []
+    with pytest.raises(ValueError, match="Username nobody not found"):
+        FavoriteLocation.get_locations("nobody")
+
+def test_add_location_limit(user, monkeypatch):
+    """Test that a user cannot exceed the maximum number of locations."""
+    monkeypatch.setattr(favorite_location_model, "MAX_FAVORITE_LOCATIONS", 1)
+    FavoriteLocation.add_location(user, "Home", 42.36, -71.06)
+    with pytest.raises(ValueError, match="already has 1 favorite locations"):
+        FavoriteLocation.add_location(user, "Office", 42.35, -71.05)
+
+def test_remove_location(user):
+    """Test that removing a location keeps the positions of the others."""
+    FavoriteLocation.add_location(user, "Home", 42.36, -71.06)
+    FavoriteLocation.add_location(user, "Office", 42.35, -71.05)
+    FavoriteLocation.remove_location(user, 1)
+    assert FavoriteLocation.get_locations(user) == [("Office", 42.35, -71.05, 2)]
+    with pytest.raises(ValueError, match="has no favorite location 1"):
+        FavoriteLocation.remove_location(user, 1)
+
+def test_fetch_locations_weather_dedupes_coordinates(user, mocker):
+    """Test that locations in one cache cell share one upstream call."""
+    FavoriteLocation.add_location(user, "Home", 42.3601, -71.0589)
+    FavoriteLocation.add_location(user, "Gym", 42.3599, -71.0591)  # Same cache cell as Home
+    FavoriteLocation.add_location(user, "Paris", 48.8566, 2.3522)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+
+    def fake_get(url, params=None, before_retry=None):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"main": {"temp": params["lat"]}}
+        return response
+    get = mocker.patch("meal_max.models.weather_model.http_client.get", side_effect=fake_get)
+
+    result = fetch_locations_weather(user)
+
+    assert get.call_count == 2
+    assert result["upstream_calls"] == 2
+    assert [entry["location"] for entry in result["locations"]] == ["Home", "Gym", "Paris"]
+    assert result["locations"][1]["current_weather"] == result["locations"][0]["current_weather"]
+    assert abs(result["locations"][2]["current_weather"]["main"]["temp"] - 48.8566) < 0.05
+
+def test_fetch_locations_weather_partial_failure(user, mocker):
+    """Test that one failing location is reported without failing the others."""
+    FavoriteLocation.add_location(user, "Home", 42.36, -71.06)
+    FavoriteLocation.add_location(user, "Paris", 48.86, 2.35)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+
+    def fake_get(url, params=None, before_retry=None):
+        if params["lat"] > 45:  # Paris
+            raise ValueError("boom")
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"main": {"temp": 10}}
+        return response
+    mocker.patch("meal_max.models.weather_model.http_client.get", side_effect=fake_get)
+
+    result = fetch_locations_weather(user)
+
+    assert result["locations"][0]["current_weather"] == {"main": {"temp": 10}}
+    assert result["locations"][1]["error"] == "boom"
+
+def test_favorite_locations_routes(client, user, mocker):
+    """Test adding, listing and removing locations over HTTP."""
+    response = client.post("/api/favorite-locations", json={
+        "username": user, "city_name": "Home", "latitude": 42.36, "longitude": -71.06})
+    assert response.status_code == 201
+    assert response.get_json()["position"] == 1
+    response = client.get("/api/favorite-locations", query_string={"username": user})
+    assert response.get_json()["locations"] == [
+        {"position": 1, "city_name": "Home", "latitude": 42.36, "longitude": -71.06}]
+    assert client.delete("/api/favorite-locations/1", query_string={"username": user}).status_code == 200
+    assert client.delete("/api/favorite-locations/1", query_string={"username": user}).status_code == 404
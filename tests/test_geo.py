@@ -0,0 +1,111 @@
+import time
+
+import pytest
+import requests
+from unittest.mock import MagicMock
+
+from meal_max.models import weather_model
+from meal_max.models.weather_model import fetch_current_weather
+from meal_max.utils import geo
+
+
+def test_encode_known_geohash():
+    """Test encoding against a published geohash."""
+    assert geo.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+def test_cell_center_is_canonical():
+    """Test that every point of a cell maps to the same center inside it."""
+    first = geo.cell_center(42.3590, -71.0560, 6)
+    second = geo.cell_center(42.3615, -71.0535, 6)
+    assert first == second
+    min_lat, max_lat, min_lon, max_lon = geo.bounds(first[0])
+    assert min_lat < first[1] < max_lat and min_lon < first[2] < max_lon
+    assert geo.encode(first[1], first[2], 6) == first[0]
+
+def test_bounds_rejects_invalid_geohash():
+    with pytest.raises(ValueError, match="Invalid geohash"):
+        geo.bounds("abc")  # 'a' is not in the geohash alphabet
+
+def test_haversine_km():
+    """Test a known distance: Boston to Paris is about 5,530 km."""
+    assert geo.haversine_km(42.3601, -71.0589, 48.8566, 2.3522) == pytest.approx(5530, rel=0.01)
+
+def test_spatial_index_nearest():
+    """Test nearest lookups within a radius, across grid cells and the antimeridian."""
+    index = geo.SpatialIndex(cell_degrees=0.1)
+    index.add("a", 42.36, -71.06)
+    index.add("b", 42.40, -71.06)
+    index.add("east", 0.0, 179.99)
+    assert index.nearest(42.361, -71.06, 10)[1] == "a"
+    assert [key for _, key in index.nearby(42.39, -71.06, 5)] == ["b", "a"]
+    assert index.nearest(42.0, -71.06, 10) is None
+    assert index.nearest(0.0, -179.99, 5)[1] == "east"
+    index.add("a", 10.0, 10.0)  # Moves the point
+    assert index.nearest(42.361, -71.06, 3) is None
+    index.remove("a")
+    assert len(index) == 2
+
+def test_spatial_index_lookup_is_fast():
+    """Test that a nearest lookup among many points stays well under a millisecond."""
+    index = geo.SpatialIndex()
+    for i in range(20000):
+        index.add(i, 40 + (i % 200) * 0.025, -75 + (i // 200) * 0.05)
+    started = time.perf_counter()
+    for _ in range(200):
+        index.nearest(42.36, -71.06, 2)
+    assert (time.perf_counter() - started) / 200 < 0.001
+
+def test_nearby_users_share_one_upstream_call(mocker):
+    """Test that favorites about 350 m apart are served by one cached response."""
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"main": {"temp": 10}}
+    get = mocker.patch("meal_max.models.weather_model.http_client.get", return_value=response)
+
+    fetch_current_weather("alice", ("Downtown", 42.3590, -71.0560))
+    result = fetch_current_weather("bob", ("Waterfront", 42.3615, -71.0535))
+
+    assert result["current_weather"] == {"main": {"temp": 10}}
+    get.assert_called_once()
+    _, lat, lon = geo.cell_center(42.3590, -71.0560, weather_model.CELL_PRECISION["weather"])
+    assert get.call_args.kwargs["params"]["lat"] == lat
+    assert get.call_args.kwargs["params"]["lon"] == lon
+
+def test_nearest_cached_fallback(mocker, monkeypatch):
+    """Test that a nearby cell's response stands in when the upstream fails on a cold cell."""
+    monkeypatch.setattr(weather_model, "NEAREST_FALLBACK_KM", 5.0)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"main": {"temp": 10}}
+    get = mocker.patch("meal_max.models.weather_model.http_client.get", return_value=response)
+    fetch_current_weather("alice", ("Downtown", 42.3590, -71.0560))
+
+    found = weather_model.nearest_cached("weather", 42.37, -71.04, 5)
+    assert found[0] == {"main": {"temp": 10}}
+    assert found[3] < 2
+
+    get.side_effect = requests.exceptions.ConnectionError("down")
+    result = fetch_current_weather("bob", ("Cambridge", 42.3736, -71.1097))
+    assert result["current_weather"] == {"main": {"temp": 10}}
+    assert result["stale"] is True
+    with pytest.raises(requests.exceptions.ConnectionError):
+        fetch_current_weather("carol", ("Paris", 48.8566, 2.3522))
+
+def test_spatial_index_follows_cache(mocker, monkeypatch):
+    """Test that cells are indexed only with the fallback on, and leave the index when evicted."""
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"main": {"temp": 10}}
+    mocker.patch("meal_max.models.weather_model.http_client.get", return_value=response)
+    index = weather_model.spatial_indexes["weather"]
+
+    fetch_current_weather("alice", ("Downtown", 42.3590, -71.0560))
+    assert len(index) == 0
+
+    monkeypatch.setattr(weather_model, "NEAREST_FALLBACK_KM", 5.0)
+    monkeypatch.setattr(weather_model.weather_cache, "maxsize", 1)
+    fetch_current_weather("bob", ("Cambridge", 42.3736, -71.1097))
+    assert len(index) == 1
+    fetch_current_weather("carol", ("Paris", 48.8566, 2.3522))
+    assert len(index) == 1
+    assert weather_model.nearest_cached("weather", 42.3736, -71.1097, 5) is None
@@ -0,0 +1,33 @@
+from meal_max.models.historical_store import HistoricalStore
+
+
+def test_put_and_get(tmp_path):
+    """Test storing and reading back one day."""
+    store = HistoricalStore(str(tmp_path / "historical.db"))
+    store.put("timemachine", "9q8yy", "2023-12-01", {"data": [{"temp": 15}]})
+    assert store.get("timemachine", "9q8yy", "2023-12-01") == {"data": [{"temp": 15}]}
+    assert store.get("timemachine", "9q8yy", "2023-12-02") is None
+
+def test_rows_are_keyed_by_endpoint_and_cell(tmp_path):
+    """Test that another cell or endpoint does not see a stored day."""
+    store = HistoricalStore(str(tmp_path / "historical.db"))
+    store.put("timemachine", "9q8yy", "2023-12-01", {"temp": 15})
+    assert store.get("timemachine", "9q8yv", "2023-12-01") is None
+    assert store.get("day_summary", "9q8yy", "2023-12-01") is None
+
+def test_get_many(tmp_path):
+    """Test reading several days at once, skipping unrequested ones."""
+    store = HistoricalStore(str(tmp_path / "historical.db"))
+    for day in ("2023-12-01", "2023-12-02", "2023-12-03"):
+        store.put("timemachine", "9q8yy", day, {"day": day})
+    result = store.get_many("timemachine", "9q8yy", ["2023-12-01", "2023-12-03", "2023-12-04"])
+    assert result == {"2023-12-01": {"day": "2023-12-01"}, "2023-12-03": {"day": "2023-12-03"}}
+    assert store.get_many("timemachine", "9q8yy", []) == {}
+
+def test_store_survives_reopen(tmp_path):
+    """Test that stored days persist across store instances."""
+    path = str(tmp_path / "historical.db")
+    store = HistoricalStore(path)
+    store.put("timemachine", "9q8yy", "2023-12-01", {"temp": 15})
+    store.close()
+    assert HistoricalStore(path).get("timemachine", "9q8yy", "2023-12-01") == {"temp": 15}
@@ -0,0 +1,41 @@
+from unittest.mock import MagicMock
+
+from meal_max.utils.http_cache import cache_control, etag_matches, payload_etag
+
+
+def test_payload_etag_tracks_payload():
+    """Test that the tag is stable for equal payloads and changes with new data."""
+    assert payload_etag("Boston", {"dt": 1, "temp": 10}) == payload_etag("Boston", {"temp": 10, "dt": 1})
+    assert payload_etag("Boston", {"dt": 1, "temp": 10}) != payload_etag("Boston", {"dt": 2, "temp": 10})
+
+def test_cache_control_matches_remaining_freshness():
+    """Test that max-age counts down with the data's age and drops to 0 when stale."""
+    assert cache_control(600, 100, False) == "public, max-age=500"
+    assert cache_control(600, 700, True, private=True, stale_if_error=60) == "private, max-age=0, stale-if-error=60"
+
+def test_etag_matches_weak_and_lists():
+    """Test If-None-Match parsing with weak tags, lists and wildcards."""
+    assert etag_matches('"a", W/"b"', "b")
+    assert etag_matches("*", "b")
+    assert not etag_matches('"a"', "b")
+    assert not etag_matches(None, "b")
+
+def test_current_weather_route_conditional(client, mocker):
+    """Test that a repeated request with the returned ETag gets an empty 304."""
+    mocker.patch("os.getenv", side_effect=lambda key, default=None: "mock_api_key" if key == "OPENWEATHER_API_KEY" else default)
+    client.post("/api/create-account", json={"username": "alice", "password": "password123"})
+    client.post("/api/set-favorite", json={"username": "alice", "city_name": "Boston", "latitude": 42.36, "longitude": -71.06})
+    mock_get = mocker.patch("meal_max.models.weather_model.http_client.get")
+    mock_get.return_value = MagicMock(**{"json.return_value": {"dt": 1, "main": {"temp": 10}}})
+
+    response = client.get("/api/current-weather?username=alice")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "public, max-age=600, stale-while-revalidate=300, stale-if-error=86400"
+    assert "Last-Modified" in response.headers
+    etag = response.headers["ETag"]
+
+    response = client.get("/api/current-weather?username=alice", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+    assert mock_get.call_count == 1
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from meal_max.utils.http_client import AsyncHTTPClient, HTTPClient
+
+
+def test_session_is_reused():
+    """Test that the client keeps a single pooled session."""
+    client = HTTPClient()
+    assert client.session is client.session
+    client.close()
+
+def test_session_pool_configuration():
+    """Test that the mounted adapter carries the pool settings and leaves retries to the client."""
+    client = HTTPClient(pool_maxsize=7, max_retries=5)
+    adapter = client.session.get_adapter("https://api.openweathermap.org")
+    assert adapter._pool_maxsize == 7
+    assert adapter.max_retries.total == 0
+    client.close()
+
+def test_get_sends_timeout(mocker):
+    """Test that every request carries the connect and read timeouts."""
+    client = HTTPClient(connect_timeout=1.5, read_timeout=4.0)
+    mock_get = mocker.patch.object(client.session, "get")
+    client.get("https://example.com", params={"q": 1})
+    mock_get.assert_called_once_with("https://example.com", params={"q": 1}, timeout=(1.5, 4.0))
+    client.close()
+
+def test_from_env(monkeypatch):
+    """Test that the client reads its settings from the environment."""
+    monkeypatch.setenv("UPSTREAM_POOL_MAXSIZE", "32")
+    monkeypatch.setenv("UPSTREAM_READ_TIMEOUT", "2.5")
+    client = HTTPClient.from_env()
+    assert client.pool_maxsize == 32
+    assert client.timeout[1] == 2.5
+
+def _responses(*statuses):
+    return [MagicMock(status_code=status) for status in statuses]
+
+def test_get_retries_server_errors(mocker):
+    """Test that a 5xx is retried with backoff, calling before_retry before each retry."""
+    client = HTTPClient(max_retries=2, backoff_factor=0)
+    mock_get = mocker.patch.object(client.session, "get", side_effect=_responses(503, 502, 200))
+    before_retry = MagicMock(return_value=True)
+
+    assert client.get("https://example.com", before_retry=before_retry).status_code == 200
+    assert mock_get.call_count == 3
+    assert before_retry.call_count == 2
+
+def test_get_does_not_retry_throttling(mocker):
+    """Test that a 429 is returned at once rather than spending more quota."""
+    client = HTTPClient(max_retries=2, backoff_factor=0)
+    mock_get = mocker.patch.object(client.session, "get", side_effect=_responses(429, 200))
+
+    assert client.get("https://example.com").status_code == 429
+    mock_get.assert_called_once()
+
+def test_get_stops_when_retry_refused(mocker):
+    """Test that the last response or error surfaces when before_retry refuses another attempt."""
+    client = HTTPClient(max_retries=2, backoff_factor=0)
+    mock_get = mocker.patch.object(client.session, "get", side_effect=_responses(503, 200))
+    assert client.get("https://example.com", before_retry=lambda: False).status_code == 503
+    mock_get.assert_called_once()
+
+    mocker.patch.object(client.session, "get", side_effect=requests.ConnectionError("down"))
+    with pytest.raises(requests.ConnectionError):
+        client.get("https://example.com", before_retry=lambda: False)
+
+def test_async_client_closes_client_left_on_previous_loop():
+    """Test that using the client from another event loop closes the one left on the old loop."""
+    client = AsyncHTTPClient()
+    old_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=old_loop.run_forever, daemon=True)
+    thread.start()
+
+    async def current():
+        return client.client
+
+    try:
+        old = asyncio.run_coroutine_threadsafe(current(), old_loop).result(5)
+        new = asyncio.run(current())
+        deadline = time.monotonic() + 5
+        while not old.is_closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert new is not old
+        assert old.is_closed
+    finally:
+        old_loop.call_soon_threadsafe(old_loop.stop)
+        thread.join(5)
+        old_loop.close()
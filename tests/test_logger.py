@@ -0,0 +1,75 @@
+import io
+import json
+import logging
+import threading
+
+from meal_max.utils.logger import NonBlockingQueueHandler, build_handler, configure_logger, get_handler
+
+
+def _logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    return logger
+
+
+def test_configure_logger_is_idempotent():
+    """Test that configuring a logger twice attaches the shared handler once."""
+    logger = logging.getLogger("tests.idempotent")
+    configure_logger(logger)
+    configure_logger(logger)
+    assert logger.handlers.count(get_handler()) == 1
+
+def test_json_format_includes_extra_and_exception():
+    """Test that JSON lines carry the message, extra fields and the traceback."""
+    stream = io.StringIO()
+    logger = _logger("tests.json", build_handler(stream, json_format=True))
+    try:
+        raise ValueError("bad")
+    except ValueError:
+        logger.exception("Failed for %s", "alice", extra={"route": "/api/login"})
+    entry = json.loads(stream.getvalue())
+    assert entry["level"] == "ERROR"
+    assert entry["logger"] == "tests.json"
+    assert entry["message"] == "Failed for alice"
+    assert entry["route"] == "/api/login"
+    assert "ValueError: bad" in entry["exc_info"]
+
+def test_sampling_keeps_warnings():
+    """Test that a zero sample rate drops INFO lines but never warnings."""
+    stream = io.StringIO()
+    logger = _logger("tests.sampling", build_handler(stream, sample_rate=0.0))
+    logger.info("dropped")
+    logger.warning("kept")
+    assert "dropped" not in stream.getvalue()
+    assert "kept" in stream.getvalue()
+
+def test_queued_handler_writes_from_listener_thread():
+    """Test that queued records are written by the listener, with arguments already resolved."""
+    stream = io.StringIO()
+    handler = build_handler(stream, json_format=True, queued=True)
+    logger = _logger("tests.queued", handler)
+    args = {"n": 1}
+    logger.info("value %s", args)
+    args["n"] = 2  # Mutated after logging; the line must show the original
+    handler.close()
+    entry = json.loads(stream.getvalue())
+    assert entry["message"] == "value {'n': 1}"
+    assert entry["thread"] == threading.current_thread().name
+
+def test_queued_handler_drops_when_full():
+    """Test that a full queue drops records instead of blocking the caller."""
+    release = threading.Event()
+
+    class SlowHandler(logging.Handler):
+        def emit(self, record):
+            release.wait(5)
+
+    handler = NonBlockingQueueHandler(SlowHandler(), queue_size=1)
+    logger = _logger("tests.full", handler)
+    for _ in range(5):
+        logger.info("line")
+    release.set()
+    handler.close()
+    assert 3 <= handler.dropped <= 4
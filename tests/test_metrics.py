@@ -0,0 +1,115 @@
+import threading
+
+import pytest
+import requests
+from unittest.mock import MagicMock
+
+from meal_max.models import weather_model
+from meal_max.models.weather_model import fetch_current_weather
+from meal_max.utils.metrics import Counter, Histogram, Registry, cache_collector, registry
+
+
+def test_counter_sums_across_threads():
+    """Test that increments from many threads are all counted."""
+    counter = Counter("jobs_total", "Jobs run.", ("kind",))
+
+    def work():
+        for _ in range(1000):
+            counter.inc(("a",))
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc(("b",), 2)
+    assert counter.values() == {("a",): 8000, ("b",): 2}
+
+def test_finished_threads_do_not_keep_shards():
+    """Test that short-lived threads' shards are merged into the totals rather than kept."""
+    counter = Counter("jobs_total", "Jobs run.")
+    histogram = Histogram("job_seconds", "Job time.", buckets=(1.0,))
+
+    def work():
+        counter.inc()
+        histogram.observe(0.5)
+
+    for _ in range(500):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    assert len(counter._shards) <= 1 and len(histogram._shards) <= 1
+    assert counter.values() == {(): 500}
+    assert histogram.values() == {(): ([500, 0], 250.0, 500)}
+
+def test_histogram_buckets_and_render():
+    """Test that observations land in cumulative buckets with a sum and count."""
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, ("/a",))
+    lines = histogram.render()
+    assert lines == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1.0"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 3.65',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+def test_histogram_timed_decorator():
+    """Test that the decorator observes a call even when it raises."""
+    histogram = Histogram("call_seconds", "Call time.", ("name",))
+
+    @histogram.timed("boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        boom()
+    assert histogram.values()[("boom",)][2] == 1
+
+def test_registry_render_and_collectors():
+    """Test the exposition format, including collector families shared by two caches."""
+    local = Registry()
+    local.counter("hits_total", "Hits.").inc()
+    assert local.counter("hits_total", "Hits.") is local.counter("hits_total", "Hits.")
+    with pytest.raises(ValueError):
+        local.histogram("hits_total", "Hits.")
+    stats = {"hits": 3, "stale_hits": 0, "misses": 1, "evictions": 0, "size": 2, "hit_ratio": 0.75}
+    local.register_collector(cache_collector("one", lambda: stats))
+    local.register_collector(cache_collector("two", lambda: stats))
+    text = local.render()
+    assert "# TYPE hits_total counter\nhits_total 1\n" in text
+    assert text.count("# TYPE cache_hits_total counter") == 1
+    assert 'cache_hits_total{cache="one"} 3' in text
+    assert 'cache_hit_ratio{cache="two"} 0.75' in text
+
+def test_upstream_calls_are_measured(mocker, monkeypatch):
+    """Test that upstream calls are counted by status and error type."""
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "mock_api_key")
+    mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=("Boston", 42.36, -71.06))
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"main": {"temp": 10}}
+    get = mocker.patch("meal_max.models.weather_model.http_client.get", return_value=response)
+    before = weather_model.UPSTREAM_REQUESTS.values()
+
+    fetch_current_weather("user")
+    get.side_effect = requests.exceptions.ConnectionError("down")
+    with pytest.raises(requests.exceptions.ConnectionError):
+        weather_model.refresh_cached("weather", ("Paris", 48.86, 2.35))
+
+    after = weather_model.UPSTREAM_REQUESTS.values()
+    assert after[("weather", "200")] - before.get(("weather", "200"), 0) == 1
+    assert after[("weather", "ConnectionError")] - before.get(("weather", "ConnectionError"), 0) == 1
+
+def test_metrics_route(client):
+    """Test that /metrics serves request latency and cache gauges."""
+    client.get("/api/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/health",status="200"}' in text
+    assert 'cache_entries{cache="weather"}' in text
+    assert 'upstream_circuit_state{endpoint="weather"} 0' in text
+    assert registry.render().startswith("# HELP")
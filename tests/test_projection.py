@@ -0,0 +1,27 @@
+import pytest
+
+from meal_max.utils.projection import parse_fields, project
+
+
+def test_parse_fields_builds_tree():
+    """Test that dotted paths nest and a whole-field path wins over its children."""
+    assert parse_fields("main.temp,weather.description,wind,wind.speed") == {
+        "main": {"temp": None},
+        "weather": {"description": None},
+        "wind": None,
+    }
+    assert parse_fields("") is None
+
+def test_parse_fields_rejects_empty_segments():
+    """Test that a malformed path is rejected."""
+    with pytest.raises(ValueError, match="Invalid field path 'main..temp'"):
+        parse_fields("main..temp")
+
+def test_project_prunes_dicts_and_lists():
+    """Test that lists are projected per element and missing fields are omitted."""
+    payload = {"main": {"temp": 10, "humidity": 80}, "weather": [{"id": 800, "description": "clear"}], "dt": 1}
+    assert project(payload, parse_fields("main.temp,weather.description,missing")) == {
+        "main": {"temp": 10},
+        "weather": [{"description": "clear"}],
+    }
+    assert project([{"temp": {"day": 20, "night": 10}}], parse_fields("temp.day")) == [{"temp": {"day": 20}}]
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+from unittest.mock import MagicMock
+
+from meal_max.models import weather_model
+from meal_max.utils.http_client import AsyncHTTPClient
+from meal_max.utils.rate_limit import (
+    GLOBAL, QuotaExceeded, QuotaGovernor, SQLiteTokenBucket, TokenBucket, background_priority, parse_rate
+)
+
+
+def test_parse_rate():
+    """Test rate parsing and the one-minute burst cap on long periods."""
+    assert parse_rate("60/min") == (1.0, 60)
+    rate, capacity = parse_rate("1440/day")
+    assert rate == pytest.approx(1 / 60)
+    assert capacity == 1.0
+    assert parse_rate("1440/day:50") == (pytest.approx(1 / 60), 50.0)
+    with pytest.raises(ValueError, match="Invalid rate"):
+        parse_rate("ten/min")
+    with pytest.raises(ValueError, match="burst must be at least 1"):
+        parse_rate("1440/day:0")
+
+def test_token_bucket_refills(mocker):
+    """Test that an empty bucket reports the wait until its next token."""
+    clock = mocker.patch("meal_max.utils.rate_limit.time.monotonic", return_value=0.0)
+    bucket = TokenBucket(rate=2, capacity=2)
+    assert bucket.try_take() == 0
+    assert bucket.try_take() == 0
+    assert bucket.try_take() == pytest.approx(0.5)
+    clock.return_value = 0.5
+    assert bucket.try_take() == 0
+
+def test_governor_rejects_when_wait_exceeds_max():
+    """Test that a call fails fast when no token can arrive in time."""
+    governor = QuotaGovernor({GLOBAL: TokenBucket(rate=0.1, capacity=1)}, max_wait=0.5)
+    governor.acquire("weather")
+    with pytest.raises(QuotaExceeded) as exc_info:
+        governor.acquire("weather")
+    assert exc_info.value.retry_after == pytest.approx(10, abs=0.1)
+    assert governor.stats()["rejected"] == 1
+
+def test_governor_queues_within_max_wait():
+    """Test that a call waits for a token that arrives before the deadline."""
+    governor = QuotaGovernor({GLOBAL: TokenBucket(rate=20, capacity=1)}, max_wait=1)
+    governor.acquire("weather")
+    started = time.monotonic()
+    governor.acquire("weather")
+    assert 0.03 < time.monotonic() - started < 0.5
+
+def test_governor_endpoint_bucket_refunds_global():
+    """Test that a call rejected by its endpoint bucket does not spend global quota."""
+    global_bucket = TokenBucket(rate=1, capacity=5)
+    governor = QuotaGovernor({GLOBAL: global_bucket, "onecall": TokenBucket(rate=0.01, capacity=1)}, max_wait=0)
+    governor.acquire("onecall")
+    with pytest.raises(QuotaExceeded):
+        governor.acquire("onecall")
+    governor.acquire("weather")
+    assert global_bucket.remaining() == pytest.approx(3, abs=0.01)
+
+def test_background_calls_leave_reserve():
+    """Test that background calls cannot spend the interactive reserve."""
+    governor = QuotaGovernor({GLOBAL: TokenBucket(rate=0.01, capacity=5)}, max_wait=0, background_reserve=0.4)
+    with background_priority():
+        for _ in range(3):
+            governor.acquire("weather")
+        with pytest.raises(QuotaExceeded):
+            governor.acquire("weather")
+    governor.acquire("weather")
+    governor.acquire("weather")
+
+def test_acquire_async():
+    """Test that the async variant waits for a token on the event loop."""
+    governor = QuotaGovernor({GLOBAL: TokenBucket(rate=20, capacity=1)}, max_wait=1)
+
+    async def acquire_twice():
+        await governor.acquire_async("weather")
+        await governor.acquire_async("weather")
+    asyncio.run(acquire_twice())
+    assert governor.stats()["granted"] == 2
+
+def test_acquire_async_takes_tokens_off_the_loop(mocker):
+    """Test that bucket I/O, which may block on a shared SQLite file, runs in a worker thread."""
+    governor = QuotaGovernor({GLOBAL: TokenBucket(rate=20, capacity=1)})
+    threads = []
+    try_acquire = governor._try_acquire
+    mocker.patch.object(governor, "_try_acquire", side_effect=lambda *args: threads.append(threading.get_ident()) or try_acquire(*args))
+
+    asyncio.run(governor.acquire_async("weather"))
+    assert threads and threading.get_ident() not in threads
+
+def test_sqlite_bucket_is_shared(tmp_path):
+    """Test that two buckets on the same file draw from one quota."""
+    path = str(tmp_path / "quota.db")
+    first = SQLiteTokenBucket(path, GLOBAL, rate=0.01, capacity=2)
+    second = SQLiteTokenBucket(path, GLOBAL, rate=0.01, capacity=2)
+    assert first.try_take() == 0
+    assert second.try_take() == 0
+    assert first.try_take() > 0
+    assert second.remaining() < 1
+
+def test_quota_exhaustion_maps_to_503(client, mocker):
+    """Test that an exhausted quota is a 503 with Retry-After rather than a 500."""
+    mocker.patch("os.getenv", side_effect=lambda key, default=None: "mock_api_key" if key == "OPENWEATHER_API_KEY" else default)
+    client.post("/api/create-account", json={"username": "alice", "password": "password123"})
+    client.post("/api/set-favorite", json={"username": "alice", "city_name": "Boston", "latitude": 42.36, "longitude": -71.06})
+    mocker.patch.object(weather_model, "quota_governor", QuotaGovernor({GLOBAL: TokenBucket(rate=0.01, capacity=1)}, max_wait=0))
+    mocker.patch("meal_max.models.weather_model.http_client.get").return_value = MagicMock(**{"json.return_value": {"dt": 1}})
+
+    assert client.get("/api/current-weather?username=alice").status_code == 200
+    response = client.get("/api/air-quality?username=alice")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "100"
+
+def _upstream_responses(*statuses):
+    responses = [MagicMock(status_code=status, **{"json.return_value": {"dt": 1}}) for status in statuses]
+    for response in responses:
+        if response.status_code >= 500:
+            response.raise_for_status.side_effect = requests.HTTPError(str(response.status_code), response=response)
+    return responses
+
+def test_retry_takes_a_token_per_attempt(mocker):
+    """Test that a 5xx followed by a successful retry spends two quota tokens."""
+    bucket = TokenBucket(rate=0.01, capacity=5)
+    mocker.patch.object(weather_model, "quota_governor", QuotaGovernor({GLOBAL: bucket}, max_wait=0))
+    mocker.patch.object(weather_model.http_client, "backoff_factor", 0)
+    mock_get = mocker.patch.object(weather_model.http_client.session, "get", side_effect=_upstream_responses(503, 200))
+    mocker.patch("os.getenv", return_value="mock_api_key")
+
+    weather_model.fetch_current_weather("alice", ("Boston", 42.36, -71.06))
+
+    assert mock_get.call_count == 2
+    assert bucket.remaining() == pytest.approx(3, abs=0.01)
+
+def test_retry_skipped_without_a_token(mocker):
+    """Test that a retry is not sent when the quota has no token left for it."""
+    mocker.patch.object(weather_model, "quota_governor",
+                        QuotaGovernor({GLOBAL: TokenBucket(rate=0.01, capacity=1)}, max_wait=0))
+    mocker.patch.object(weather_model.http_client, "backoff_factor", 0)
+    mock_get = mocker.patch.object(weather_model.http_client.session, "get", side_effect=_upstream_responses(503, 200))
+    mocker.patch("os.getenv", return_value="mock_api_key")
+
+    with pytest.raises(requests.HTTPError):
+        weather_model.fetch_current_weather("alice", ("Boston", 42.36, -71.06))
+    mock_get.assert_called_once()
+
+def test_async_retry_takes_a_token_per_attempt(mocker):
+    """Test that the async client's retries spend a token each too."""
+    bucket = TokenBucket(rate=0.01, capacity=5)
+    mocker.patch.object(weather_model, "quota_governor", QuotaGovernor({GLOBAL: bucket}, max_wait=0))
+    client = AsyncHTTPClient(backoff_factor=0)
+    mocker.patch.object(weather_model, "async_http_client", client)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+
+    async def run():
+        mock_get = mocker.patch.object(client.client, "get", side_effect=_upstream_responses(503, 502, 200))
+        await weather_model.fetch_current_weather_async("alice", ("Boston", 42.36, -71.06))
+        return mock_get
+
+    assert asyncio.run(run()).call_count == 3
+    assert bucket.remaining() == pytest.approx(2, abs=0.01)
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from meal_max.utils.singleflight import SingleFlight
+
+
+def _run_concurrently(flight, key, fn, count):
+    """Start ``count`` threads calling flight.do and collect their outcomes."""
+    outcomes = []
+    threads = []
+    for _ in range(count):
+        def worker():
+            try:
+                outcomes.append(flight.do(key, fn))
+            except Exception as e:
+                outcomes.append(e)
+        thread = threading.Thread(target=worker)
+        threads.append(thread)
+        thread.start()
+    return threads, outcomes
+
+def test_concurrent_calls_share_one_execution():
+    """Test that callers arriving while a call is in flight share its result."""
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def slow():
+        executions.append(1)
+        release.wait(5)
+        return "result"
+
+    threads, outcomes = _run_concurrently(flight, "key", slow, 5)
+    while flight.stats()["calls"] < 5:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes == ["result"] * 5
+    assert len(executions) == 1
+    assert flight.stats()["coalesced"] == 4
+    assert flight.stats()["in_flight"] == 0
+
+def test_exception_is_shared():
+    """Test that every waiting caller receives the leader's exception."""
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("upstream failed")
+
+    threads, outcomes = _run_concurrently(flight, "key", failing, 3)
+    while flight.stats()["calls"] < 3:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(outcomes) == 3
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+def test_sequential_calls_execute_again():
+    """Test that a key is forgotten once its call has finished."""
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    assert flight.stats()["coalesced"] == 0
+
+def test_exception_propagates_to_leader():
+    """Test that a lone caller sees the exception raised by the function."""
+    flight = SingleFlight()
+    with pytest.raises(ValueError, match="boom"):
+        flight.do("key", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flight.stats()["in_flight"] == 0
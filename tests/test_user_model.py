@@ -1,10 +1,15 @@
 from contextlib import contextmanager
 import re
 import sqlite3
+import time
 
+import hashlib
 import pytest
+from sqlalchemy import update
 from sqlalchemy.exc import IntegrityError
-from meal_max.models.user_model import User
+from meal_max.db import db
+from meal_max.models import user_model
+from meal_max.models.user_model import User, favorite_cache
 
 
 ######################################################
@@ -33,8 +38,9 @@ def test_create_account(session, sample_user):
 
     assert user is not None, "User should be created in the database."
     assert user.username == sample_user["username"], "Username should match the input."
-    assert len(user.salt) == 32, "Salt should be 32 characters (hex)."
-    assert len(user.password) == 64, "Password should be a 64-character SHA-256 hash."
+    assert user.salt.startswith("$2b$"), "Salt should be a bcrypt salt."
+    assert user.password.startswith(user.salt), "Password should be a bcrypt hash made with the stored salt."
+    assert len(user.password) == 60, "Password should be a 60-character bcrypt hash."
 
 #Create account with duplicate usernames 
 def test_create_account_duplicate_user(session, sample_user):
@@ -102,6 +108,85 @@ def test_login_nonexistent_user(session):
     with pytest.raises(ValueError, match="User nonexistentuser not found"):
         User.login("nonexistentuser", "newpassword")
 
+def test_login_upgrades_legacy_hash(session, sample_user):
+    """Test that a legacy SHA-256 hash still logs in and is upgraded to bcrypt."""
+    salt = "00" * 16
+    legacy_hash = hashlib.sha256((sample_user["password"] + salt).encode()).hexdigest()
+    session.add(User(username=sample_user["username"], salt=salt, password=legacy_hash))
+    session.commit()
+
+    assert User.login(**sample_user) is True, "Login should succeed with a legacy hash."
+    user = session.query(User).filter_by(username=sample_user["username"]).first()
+    assert user.password.startswith("$2b$"), "Legacy hash should be replaced with bcrypt."
+    assert User.login(**sample_user) is True, "Login should still succeed after the upgrade."
+
+def test_login_legacy_hash_wrong_password(session, sample_user):
+    """Test that a wrong password against a legacy hash fails and is not upgraded."""
+    salt = "00" * 16
+    legacy_hash = hashlib.sha256((sample_user["password"] + salt).encode()).hexdigest()
+    session.add(User(username=sample_user["username"], salt=salt, password=legacy_hash))
+    session.commit()
+
+    assert User.login(sample_user["username"], "wrongpassword") is False
+    user = session.query(User).filter_by(username=sample_user["username"]).first()
+    assert user.password == legacy_hash, "Hash should not change on a failed login."
+
+##################
+# Session Tokens #
+##################
+
+def test_session_token_round_trip(app, sample_user):
+    """Test that an issued token verifies back to its username."""
+    User.create_account(**sample_user)
+    token = User.issue_session_token(sample_user["username"])
+    assert User.verify_session_token(token) == sample_user["username"]
+
+def test_session_token_tampered(app, sample_user):
+    """Test that a modified token is rejected."""
+    User.create_account(**sample_user)
+    token = User.issue_session_token(sample_user["username"])
+    with pytest.raises(ValueError, match="Invalid session token"):
+        User.verify_session_token(token[:-2] + "xx")
+
+def test_session_token_expired(app, sample_user):
+    """Test that a token older than SESSION_TOKEN_MAX_AGE is rejected."""
+    User.create_account(**sample_user)
+    token = User.issue_session_token(sample_user["username"])
+    app.config["SESSION_TOKEN_MAX_AGE"] = -1
+    with pytest.raises(ValueError, match="Session token expired"):
+        User.verify_session_token(token)
+
+def test_session_token_does_not_query_database(app, sample_user, mocker):
+    """Test that verifying a token needs neither the database nor the KDF while the credential is cached."""
+    User.create_account(**sample_user)
+    token = User.issue_session_token(sample_user["username"])
+    mock_execute = mocker.patch.object(db.session, "execute")
+    mock_checkpw = mocker.patch("meal_max.models.user_model.bcrypt.checkpw")
+    assert User.verify_session_token(token) == sample_user["username"]
+    mock_execute.assert_not_called()
+    mock_checkpw.assert_not_called()
+
+def test_session_token_revoked_by_password_change(app, sample_user):
+    """Test that changing the password revokes tokens issued before, but not after."""
+    User.create_account(**sample_user)
+    old_token = User.issue_session_token(sample_user["username"])
+    User.update_password(sample_user["username"], "newpassword456")
+    with pytest.raises(ValueError, match="Session token revoked"):
+        User.verify_session_token(old_token)
+    new_token = User.issue_session_token(sample_user["username"])
+    assert User.verify_session_token(new_token) == sample_user["username"]
+
+def test_session_token_after_change_on_another_worker(app, sample_user):
+    """Test that a stale cached credential is re-checked before a token is rejected."""
+    User.create_account(**sample_user)
+    User.verify_session_token(User.issue_session_token(sample_user["username"]))
+    # Another worker changes the password and issues a token; this worker's cache is now behind
+    salt, hashed_password = User._generate_salted_hash("newpassword456")
+    User._update_columns(sample_user["username"], salt=salt, password=hashed_password)
+    token = User.issue_session_token(sample_user["username"])
+    user_model.credential_cache.set(sample_user["username"], "stale-fingerprint")
+    assert User.verify_session_token(token) == sample_user["username"]
+
 def test_set_favorite(session, sample_user):
     """Test setting a favorite location for a user."""
     User.create_account(**sample_user)
@@ -111,6 +196,14 @@ def test_set_favorite(session, sample_user):
     assert user.latitude == 42.3601, "Latitude should match input."
     assert user.longitude == -71.0589, "Longitude should match input."
 
+def test_set_favorite_issues_single_update(session, sample_user, mocker):
+    """Test that setting a favorite does not load the user row first."""
+    User.create_account(**sample_user)
+    execute = mocker.spy(db.session, "execute")
+    User.set_favorite(sample_user["username"], "Boston", 42.3601, -71.0589)
+    assert execute.call_count == 1
+    assert execute.call_args[0][0].is_dml, "Only an UPDATE statement should be executed."
+
 def test_set_favorite_nonexistent_user(session):
     """Test setting a favorite location for a non-existent user."""
     with pytest.raises(ValueError, match="Username nonexistentuser not found"):
@@ -127,4 +220,116 @@ def test_get_favorite_nonexistent_user(session):
     """Test getting the favorite location for a non-existent user."""
     with pytest.raises(ValueError, match="Username nonexistentuser not found"):
         User.get_favorite("nonexistentuser")
-        
\ No newline at end of file
+        
+def test_get_favorite_served_from_cache(session, sample_user, mocker):
+    """Test that repeat lookups for a user skip the database."""
+    User.create_account(**sample_user)
+    User.set_favorite(sample_user["username"], "Boston", 42.3601, -71.0589)
+    mock_execute = mocker.patch.object(db.session, "execute")
+    assert User.get_favorite(sample_user["username"]) == ("Boston", 42.3601, -71.0589)
+    mock_execute.assert_not_called()
+
+def test_get_favorite_populates_cache(session, sample_user):
+    """Test that a cache miss loads from the database and fills the cache."""
+    User.create_account(**sample_user)
+    User.set_favorite(sample_user["username"], "Boston", 42.3601, -71.0589)
+    favorite_cache.clear()
+    assert User.get_favorite(sample_user["username"]) == ("Boston", 42.3601, -71.0589)
+    assert favorite_cache.get(sample_user["username"]) == ("Boston", 42.3601, -71.0589)
+
+def test_cached_favorite_expires(session, sample_user, mocker):
+    """Test that a change made by another worker is seen once the cached favorite expires."""
+    User.create_account(**sample_user)
+    User.set_favorite(sample_user["username"], "Boston", 42.3601, -71.0589)
+    db.session.execute(update(User).where(User.username == sample_user["username"]).values(location_name="Paris"))
+    db.session.commit()
+    assert User.get_favorite(sample_user["username"])[0] == "Boston"
+
+    mocker.patch("meal_max.utils.cache.time.monotonic", return_value=time.monotonic() + user_model.FAVORITE_CACHE_TTL + 1)
+    assert User.get_favorite(sample_user["username"])[0] == "Paris"
+
+def test_set_favorite_updates_cache(session, sample_user):
+    """Test that changing the favorite is visible immediately."""
+    User.create_account(**sample_user)
+    User.set_favorite(sample_user["username"], "Boston", 42.3601, -71.0589)
+    User.get_favorite(sample_user["username"])
+    User.set_favorite(sample_user["username"], "Seattle", 47.6062, -122.3321)
+    assert User.get_favorite(sample_user["username"]) == ("Seattle", 47.6062, -122.3321)
+
+def test_favorite_cache_cross_process_invalidation(session, sample_user, tmp_path, mocker):
+    """Test that a change published by another process drops the local cache."""
+    from meal_max.utils.cache import VersionCounter
+    path = str(tmp_path / "version.db")
+    local = VersionCounter(path, check_interval=0)
+    other_process = VersionCounter(path, check_interval=0)
+    mocker.patch("meal_max.models.user_model.favorite_cache_version", local)
+
+    User.create_account(**sample_user)
+    User.set_favorite(sample_user["username"], "Boston", 42.3601, -71.0589)
+    User.get_favorite(sample_user["username"])
+    # Another worker writes straight to the shared database and bumps the version
+    session.query(User).filter_by(username=sample_user["username"]).update({"location_name": "Cambridge"})
+    session.commit()
+    other_process.bump()
+
+    assert User.get_favorite(sample_user["username"])[0] == "Cambridge"
+
+###############
+# Bulk Import #
+###############
+
+def test_bulk_create_accounts(session):
+    """Test creating many accounts with per-row errors."""
+    User.create_account("existing_user", "password123")
+    rows = [
+        {"username": "alice", "password": "password123"},
+        {"username": "bob", "password": "short"},
+        None,
+        {"username": "existing_user", "password": "password123"},
+        {"username": "alice", "password": "password456"},
+        {"username": "carol"},
+        {"username": "dave", "password": "password789"},
+    ]
+    report = User.bulk_create_accounts(rows, chunk_size=3)
+
+    assert report["created"] == 2
+    assert [(error["row"], error["error"]) for error in report["errors"]] == [
+        (2, "Password must be at least 8 characters long"),
+        (3, "Malformed row"),
+        (4, "User with username 'existing_user' already exists"),
+        (5, "User with username 'alice' already exists"),
+        (6, "Both username and password are required"),
+    ]
+    assert User.login("alice", "password123") is True
+    assert User.login("dave", "password789") is True
+
+def test_bulk_set_favorites(session):
+    """Test setting many favorites with per-row errors."""
+    User.bulk_create_accounts([{"username": "alice", "password": "password123"},
+                               {"username": "bob", "password": "password123"}])
+    User.get_favorite("alice")
+    rows = [
+        {"username": "alice", "city_name": "Boston", "latitude": "42.3601", "longitude": "-71.0589"},
+        {"username": "bob", "city_name": "Seattle", "latitude": 47.6062, "longitude": -122.3321},
+        {"username": "nobody", "city_name": "Paris", "latitude": 48.85, "longitude": 2.35},
+        {"username": "bob", "city_name": "Nowhere", "latitude": "north", "longitude": 0},
+        {"username": "alice", "city_name": "Boston"},
+    ]
+    report = User.bulk_set_favorites(rows)
+
+    assert report["updated"] == 2
+    assert [(error["row"], error["username"]) for error in report["errors"]] == [
+        (3, "nobody"), (4, "bob"), (5, "alice"),
+    ]
+    assert User.get_favorite("alice") == ("Boston", 42.3601, -71.0589)
+    assert User.get_favorite("bob") == ("Seattle", 47.6062, -122.3321)
+
+def test_export_favorites(session):
+    """Test streaming favorites back out in insertion order."""
+    User.bulk_create_accounts([{"username": "alice", "password": "password123"},
+                               {"username": "bob", "password": "password123"}])
+    User.set_favorite("alice", "Boston", 42.3601, -71.0589)
+    assert list(User.export_favorites(batch_size=1)) == [
+        {"username": "alice", "city_name": "Boston", "latitude": 42.3601, "longitude": -71.0589},
+        {"username": "bob", "city_name": None, "latitude": None, "longitude": None},
+    ]
@@ -1,7 +1,11 @@
+import threading
+import time
+
 import pytest
+import requests
 from unittest.mock import MagicMock
-from meal_max.models.weather_model import fetch_current_weather, fetch_forecast, fetch_historical_weather, fetch_air_quality, fetch_weather_overview
-from datetime import datetime
+from meal_max.models.weather_model import fetch_current_weather, fetch_forecast, fetch_historical_weather, fetch_air_quality, fetch_weather_overview, fetch_dashboard, fetch_historical_weather_range, location_cell, upstream_flights, weather_cache
+from datetime import datetime, timedelta, timezone
 
 
 
@@ -15,8 +19,8 @@ def test_fetch_current_weather(mocker):
     # Mock os.getenv to return a valid API key
     mocker.patch("os.getenv", return_value="mock_api_key")
 
-    # Mock requests.get
-    mock_requests_get = mocker.patch("meal_max.models.weather_model.requests.get")
+    # Mock the upstream HTTP client
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get")
     mock_response = MagicMock()
     mock_response.json.return_value = {"weather": [{"description": "clear sky"}], "main": {"temp": 10}}
     mock_response.raise_for_status = MagicMock()
@@ -40,8 +44,8 @@ def test_fetch_forecast(mocker):
     mock_get_favorite = mocker.patch("meal_max.models.weather_model.User.get_favorite")
     mock_get_favorite.return_value = ("Los Angeles", 34.0522, -118.2437)
 
-    # Mock requests.get
-    mock_requests_get = mocker.patch("meal_max.models.weather_model.requests.get")
+    # Mock the upstream HTTP client
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get")
     mock_response = MagicMock()
     mock_response.json.return_value = {"daily": [{"temp": {"day": 25}, "weather": [{"description": "sunny"}]}]}
     mock_response.raise_for_status = MagicMock()
@@ -67,8 +71,8 @@ def test_fetch_historical_weather(mocker):
     mock_get_favorite = mocker.patch("meal_max.models.weather_model.User.get_favorite")
     mock_get_favorite.return_value = ("San Francisco", 37.7749, -122.4194)
 
-    # Mock requests.get
-    mock_requests_get = mocker.patch("meal_max.models.weather_model.requests.get")
+    # Mock the upstream HTTP client
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get")
     mock_response = MagicMock()
     mock_response.json.return_value = {"current": {"temp": 15, "weather": [{"description": "cloudy"}]}}
     mock_response.raise_for_status = MagicMock()
@@ -93,8 +97,8 @@ def test_fetch_air_quality(mocker):
     mock_get_favorite = mocker.patch("meal_max.models.weather_model.User.get_favorite")
     mock_get_favorite.return_value = ("Seattle", 47.6062, -122.3321)
 
-    # Mock requests.get
-    mock_requests_get = mocker.patch("meal_max.models.weather_model.requests.get")
+    # Mock the upstream HTTP client
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get")
     mock_response = MagicMock()
     mock_response.json.return_value = {"list": [{"main": {"aqi": 3}, "components": {"pm2_5": 12.0}}]}
     mock_response.raise_for_status = MagicMock()
@@ -122,8 +126,8 @@ def test_fetch_weather_overview(mocker):
     # Mock os.getenv to return a valid API key
     mocker.patch("os.getenv", return_value="mock_api_key")
 
-    # Mock requests.get
-    mock_requests_get = mocker.patch("meal_max.models.weather_model.requests.get")
+    # Mock the upstream HTTP client
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get")
     mock_response = MagicMock()
     mock_response.json.return_value = {"overview": {"temp": 15, "description": "clear sky"}}
     mock_response.raise_for_status = MagicMock()
@@ -158,8 +162,8 @@ def test_fetch_weather_overview_empty_response(mocker):
     # Mock os.getenv to return a valid API key
     mocker.patch("os.getenv", return_value="mock_api_key")
 
-    # Mock requests.get to return an empty JSON response
-    mock_requests_get = mocker.patch("meal_max.models.weather_model.requests.get")
+    # Mock the upstream HTTP client to return an empty JSON response
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get")
     mock_response = MagicMock()
     mock_response.json.return_value = {}
     mock_response.raise_for_status = MagicMock()
@@ -203,11 +207,11 @@ def test_fetch_forecast_empty_response(mocker):
     # Mock get_favorite
     mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=("Los Angeles", 34.0522, -118.2437))
 
-    # Mock requests.get to return an empty forecast response
+    # Mock the upstream HTTP client to return an empty forecast response
     mock_response = mocker.Mock()
     mock_response.json.return_value = {}
     mock_response.raise_for_status = mocker.Mock()
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch("meal_max.models.weather_model.http_client.get", return_value=mock_response)
 
     # Call the function
     result = fetch_forecast(username)
@@ -227,3 +231,313 @@ def test_fetch_historical_weather_invalid_date(mocker):
     with pytest.raises(ValueError, match="time data 'not-a-date' does not match format '%Y-%m-%d'"):
         fetch_historical_weather(username, query_date)
 
+
+def test_fetch_current_weather_uses_cache(mocker):
+    # Two users with the same favorite city share one upstream call
+    mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=("Boston", 42.3601, -71.0589))
+    mocker.patch("os.getenv", return_value="mock_api_key")
+
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get")
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"main": {"temp": 10}}
+    mock_requests_get.return_value = mock_response
+
+    first = fetch_current_weather("user_one")
+    second = fetch_current_weather("user_two")
+
+    assert first["current_weather"] == second["current_weather"]
+    mock_requests_get.assert_called_once()
+    assert weather_cache.stats()["hits"] == 1
+
+def test_fetch_current_weather_cache_key_ignores_small_offsets(mocker):
+    # Coordinates that round to the same bucket share a cache entry
+    mock_get_favorite = mocker.patch("meal_max.models.weather_model.User.get_favorite")
+    mocker.patch("os.getenv", return_value="mock_api_key")
+
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get")
+    mock_requests_get.return_value.json.return_value = {"main": {"temp": 10}}
+
+    mock_get_favorite.return_value = ("Boston", 42.3601, -71.0589)
+    fetch_current_weather("user_one")
+    mock_get_favorite.return_value = ("Boston", 42.3612, -71.0577)
+    fetch_current_weather("user_two")
+    mock_get_favorite.return_value = ("Cambridge", 42.3736, -71.1097)
+    fetch_current_weather("user_three")
+
+    assert mock_requests_get.call_count == 2
+
+def test_fetch_dashboard(mocker):
+    username = "test_user"
+
+    # Mock get_favorite
+    mock_get_favorite = mocker.patch("meal_max.models.weather_model.User.get_favorite")
+    mock_get_favorite.return_value = ("Boston", 42.3601, -71.0589)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+
+    # Return a different payload per upstream endpoint
+    payloads = {
+        "weather": {"main": {"temp": 10}},
+        "onecall": {"daily": [{"temp": {"day": 12}}]},
+        "air_pollution": {"list": [{"main": {"aqi": 2}}]},
+    }
+    def fake_get(url, params=None, before_retry=None):
+        response = MagicMock()
+        response.json.return_value = payloads[url.rsplit("/", 1)[-1]]
+        return response
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get", side_effect=fake_get)
+
+    result = fetch_dashboard(username)
+
+    assert result["location"] == "Boston"
+    assert result["current_weather"]["main"]["temp"] == 10
+    assert result["forecast"][0]["temp"]["day"] == 12
+    assert result["air_quality"]["list"][0]["main"]["aqi"] == 2
+    assert result["errors"] == {}
+    mock_get_favorite.assert_called_once_with(username)
+    assert mock_requests_get.call_count == 3
+
+def test_fetch_dashboard_partial_failure(mocker):
+    # One failing upstream is reported without sinking the other sections
+    mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=("Boston", 42.3601, -71.0589))
+    mocker.patch("os.getenv", return_value="mock_api_key")
+
+    def fake_get(url, params=None, before_retry=None):
+        if url.endswith("air_pollution"):
+            raise requests.ConnectionError("upstream unavailable")
+        response = MagicMock()
+        response.json.return_value = {"main": {"temp": 10}}
+        return response
+    mocker.patch("meal_max.models.weather_model.http_client.get", side_effect=fake_get)
+
+    result = fetch_dashboard("test_user", ["current_weather", "air_quality"])
+
+    assert result["current_weather"]["main"]["temp"] == 10
+    assert "air_quality" not in result
+    assert result["errors"] == {"air_quality": "upstream unavailable"}
+
+def test_fetch_dashboard_unknown_section(mocker):
+    with pytest.raises(ValueError, match="Unknown dashboard sections: pollen"):
+        fetch_dashboard("test_user", ["pollen"])
+
+def test_fetch_current_weather_coalesces_concurrent_calls(mocker):
+    # A burst of identical cold-cache requests results in one upstream call
+    mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=("Boston", 42.3601, -71.0589))
+    mocker.patch("os.getenv", return_value="mock_api_key")
+
+    release = threading.Event()
+    def slow_get(url, params=None, before_retry=None):
+        release.wait(5)
+        response = MagicMock()
+        response.json.return_value = {"main": {"temp": 10}}
+        return response
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get", side_effect=slow_get)
+
+    upstream_flights.reset()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetch_current_weather("test_user"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while upstream_flights.stats()["calls"] < 4:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 4
+    mock_requests_get.assert_called_once()
+    assert upstream_flights.stats()["coalesced"] == 3
+
+def test_fetch_historical_weather_range(mocker):
+    username = "test_user"
+
+    # Mock get_favorite
+    mock_get_favorite = mocker.patch("meal_max.models.weather_model.User.get_favorite")
+    mock_get_favorite.return_value = ("San Francisco", 37.7749, -122.4194)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+
+    # Echo the requested timestamp back so ordering can be checked
+    def fake_get(url, params=None, before_retry=None):
+        response = MagicMock()
+        response.json.return_value = {"data": [{"dt": params["dt"]}]}
+        return response
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get", side_effect=fake_get)
+
+    results = list(fetch_historical_weather_range(username, "2023-12-01", "2023-12-05", max_concurrency=2))
+
+    assert [day["date"] for day in results] == ["2023-12-01", "2023-12-02", "2023-12-03", "2023-12-04", "2023-12-05"]
+    timestamps = [day["historical_weather"]["data"][0]["dt"] for day in results]
+    assert timestamps == sorted(timestamps)
+    assert all(day["location"] == "San Francisco" for day in results)
+    mock_get_favorite.assert_called_once_with(username)
+    assert mock_requests_get.call_count == 5
+
+def test_fetch_historical_weather_range_limits_calls_in_flight(mocker):
+    # A slot is only freed once the call occupying it has finished
+    mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=("San Francisco", 37.7749, -122.4194))
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def slow_get(url, params=None, before_retry=None):
+        with lock:
+            in_flight.append(params["dt"])
+            peak.append(len(in_flight))
+        time.sleep(0.02)
+        with lock:
+            in_flight.remove(params["dt"])
+        response = MagicMock()
+        response.json.return_value = {"data": []}
+        return response
+    mocker.patch("meal_max.models.weather_model.http_client.get", side_effect=slow_get)
+
+    results = list(fetch_historical_weather_range("test_user", "2023-12-01", "2023-12-08", max_concurrency=2))
+
+    assert len(results) == 8
+    assert max(peak) == 2
+
+def test_fetch_historical_weather_range_day_failure(mocker):
+    # A failing day is reported in place without ending the stream
+    mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=("San Francisco", 37.7749, -122.4194))
+    mocker.patch("os.getenv", return_value="mock_api_key")
+
+    failing_dt = int(datetime.strptime("2023-12-02", "%Y-%m-%d").timestamp())
+    def fake_get(url, params=None, before_retry=None):
+        if params["dt"] == failing_dt:
+            raise requests.ConnectionError("upstream unavailable")
+        response = MagicMock()
+        response.json.return_value = {"data": []}
+        return response
+    mocker.patch("meal_max.models.weather_model.http_client.get", side_effect=fake_get)
+
+    results = list(fetch_historical_weather_range("test_user", "2023-12-01", "2023-12-03"))
+
+    assert [day["date"] for day in results] == ["2023-12-01", "2023-12-02", "2023-12-03"]
+    assert results[1]["error"] == "upstream unavailable"
+    assert "historical_weather" in results[2]
+
+def test_fetch_historical_weather_range_reversed(mocker):
+    with pytest.raises(ValueError, match="End date must not be before start date."):
+        fetch_historical_weather_range("test_user", "2023-12-05", "2023-12-01")
+
+def test_fetch_historical_weather_range_too_long(mocker):
+    with pytest.raises(ValueError, match="Date range must not exceed"):
+        fetch_historical_weather_range("test_user", "2020-01-01", "2023-12-01")
+
+def test_fetch_historical_weather_reads_store(mocker, historical_store):
+    # A stored day is served from disk even after the in-memory cache is cleared
+    mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=("San Francisco", 37.7749, -122.4194))
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get")
+    mock_requests_get.return_value.json.return_value = {"data": [{"temp": 15}]}
+
+    fetch_historical_weather("test_user", "2023-12-01")
+    weather_cache.clear()
+    result = fetch_historical_weather("test_user", "2023-12-01")
+
+    assert result["historical_weather"] == {"data": [{"temp": 15}]}
+    mock_requests_get.assert_called_once()
+    cell = location_cell("timemachine", ("San Francisco", 37.7749, -122.4194))
+    assert historical_store.get("timemachine", cell, "2023-12-01") == {"data": [{"temp": 15}]}
+
+def test_fetch_historical_weather_range_uses_store(mocker, historical_store):
+    # Only days missing from the store go upstream; a nearby location in the same cell shares its days
+    mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=("San Francisco", 37.7749, -122.4194))
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    historical_store.put("timemachine", location_cell("timemachine", ("San Francisco", 37.77, -122.42)),
+                         "2023-12-02", {"data": [{"temp": 2}]})
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get")
+    mock_requests_get.return_value.json.return_value = {"data": [{"temp": 0}]}
+
+    results = list(fetch_historical_weather_range("test_user", "2023-12-01", "2023-12-03"))
+
+    assert [day["historical_weather"]["data"][0]["temp"] for day in results] == [0, 2, 0]
+    assert mock_requests_get.call_count == 2
+
+def test_fetch_historical_weather_does_not_store_today(mocker, historical_store):
+    # Today and later dates may still change, so they bypass the store
+    location = ("San Francisco", 37.7749, -122.4194)
+    mocker.patch("meal_max.models.weather_model.User.get_favorite", return_value=location)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    mock_requests_get = mocker.patch("meal_max.models.weather_model.http_client.get")
+    mock_requests_get.return_value.json.return_value = {"data": [{"temp": 15}]}
+    today = datetime.now(timezone.utc).date()
+    dates = [str(today - timedelta(days=1)), str(today), str(today + timedelta(days=1))]
+    cell = location_cell("timemachine", location)
+    historical_store.put("timemachine", cell, dates[1], {"data": [{"temp": -1}]})
+
+    results = list(fetch_historical_weather_range("test_user", dates[0], dates[2]))
+    fetch_historical_weather("test_user", dates[2])
+
+    assert [day["historical_weather"]["data"][0]["temp"] for day in results] == [15, 15, 15]
+    assert historical_store.get("timemachine", cell, dates[0]) == {"data": [{"temp": 15}]}
+    assert historical_store.get("timemachine", cell, dates[2]) is None
+
+
+def _expire_cached_entries(mocker, seconds):
+    """Move the cache clock forward so stored entries look older."""
+    now = time.monotonic()
+    mocker.patch("meal_max.utils.cache.time.monotonic", return_value=now + seconds)
+
+
+def test_fetch_current_weather_serves_stale_while_revalidating(mocker):
+    location = ("Boston", 42.3601, -71.0589)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    mock_get = mocker.patch("meal_max.models.weather_model.http_client.get")
+    mock_get.return_value.json.return_value = {"main": {"temp": 10}}
+    fetch_current_weather("test_user", location)
+
+    _expire_cached_entries(mocker, 11 * 60)
+    refreshed = threading.Event()
+    def slow_get(url, params=None, before_retry=None):
+        refreshed.wait(5)
+        response = MagicMock()
+        response.json.return_value = {"main": {"temp": 20}}
+        return response
+    mock_get.side_effect = slow_get
+
+    result = fetch_current_weather("test_user", location)
+
+    assert result["current_weather"] == {"main": {"temp": 10}}
+    assert result["stale"] is True
+    assert result["age"] >= 11 * 60
+    refreshed.set()
+    for _ in range(500):
+        result = fetch_current_weather("test_user", location)
+        if not result["stale"]:
+            break
+        time.sleep(0.01)
+    assert result["current_weather"] == {"main": {"temp": 20}}
+    assert mock_get.call_count == 2
+
+
+def test_fetch_current_weather_serves_stale_if_error(mocker):
+    location = ("Boston", 42.3601, -71.0589)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    mock_get = mocker.patch("meal_max.models.weather_model.http_client.get")
+    mock_get.return_value.json.return_value = {"main": {"temp": 10}}
+    fetch_current_weather("test_user", location)
+
+    # Past the stale-while-revalidate window, the upstream is called synchronously
+    _expire_cached_entries(mocker, 60 * 60)
+    mock_get.side_effect = requests.Timeout("upstream timed out")
+
+    result = fetch_current_weather("test_user", location)
+
+    assert result["current_weather"] == {"main": {"temp": 10}}
+    assert result["stale"] is True
+
+
+def test_fetch_current_weather_client_error_is_not_masked(mocker):
+    location = ("Boston", 42.3601, -71.0589)
+    mocker.patch("os.getenv", return_value="mock_api_key")
+    mock_get = mocker.patch("meal_max.models.weather_model.http_client.get")
+    mock_get.return_value.json.return_value = {"main": {"temp": 10}}
+    fetch_current_weather("test_user", location)
+
+    _expire_cached_entries(mocker, 60 * 60)
+    error_response = MagicMock(status_code=401)
+    mock_get.return_value.raise_for_status.side_effect = requests.HTTPError("401", response=error_response)
+
+    with pytest.raises(requests.HTTPError):
+        fetch_current_weather("test_user", location)
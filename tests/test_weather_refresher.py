@@ -0,0 +1,135 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from meal_max.models import weather_model
+from meal_max.models.favorite_location_model import FavoriteLocation
+from meal_max.models.user_model import User
+from meal_max.models.weather_refresher import WeatherRefresher
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "mock_api_key")
+
+
+def _add_users(favorites):
+    User.bulk_create_accounts([{"username": username, "password": "password123"} for username in favorites])
+    for username, (city, lat, lon) in favorites.items():
+        User.set_favorite(username, city, lat, lon)
+
+
+def _mock_upstream(mocker):
+    mock_get = mocker.patch("meal_max.models.weather_model.http_client.get")
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"main": {"temp": 12}}
+    mock_get.return_value = mock_response
+    return mock_get
+
+
+def test_run_once_fetches_each_location_once(app, mocker):
+    """Test that users sharing a location cost one upstream call per endpoint."""
+    _add_users({
+        "alice": ("Boston", 42.3601, -71.0589),
+        "bob": ("Boston", 42.3602, -71.0590),
+        "carol": ("Paris", 48.8566, 2.3522),
+    })
+    mock_get = _mock_upstream(mocker)
+
+    summary = WeatherRefresher(app, max_concurrency=2).run_once()
+
+    assert summary["users"] == 3
+    assert summary["cells"] == 4
+    assert summary["calls"] == 4
+    assert summary["errors"] == 0
+    assert mock_get.call_count == 4
+
+
+def test_run_once_schedules_cells_per_endpoint(app, mocker):
+    """Test that locations sharing only a coarse endpoint's cell share that endpoint's call."""
+    # Both fall in air quality cell drt2y, but in different current weather cells
+    _add_users({"alice": ("Boston", 42.345, -71.08), "bob": ("Brookline", 42.33, -71.10)})
+    mock_get = _mock_upstream(mocker)
+
+    summary = WeatherRefresher(app).run_once()
+
+    assert summary["locations"] == 2
+    assert summary["calls"] == 3
+    urls = [call.args[0] for call in mock_get.call_args_list]
+    assert urls.count(weather_model.UPSTREAM_URLS["weather"]) == 2
+    assert urls.count(weather_model.UPSTREAM_URLS["air_pollution"]) == 1
+
+
+def test_run_once_prewarms_cache(app, mocker):
+    """Test that a user request after a refresh is served from the cache."""
+    _add_users({"alice": ("Boston", 42.3601, -71.0589)})
+    mock_get = _mock_upstream(mocker)
+
+    WeatherRefresher(app).run_once()
+    mock_get.reset_mock()
+    result = weather_model.fetch_current_weather("alice")
+
+    assert result["current_weather"]["main"]["temp"] == 12
+    mock_get.assert_not_called()
+
+
+def test_run_once_prewarms_favorite_locations(app, mocker):
+    """Test that saved locations are refreshed too, in the cell live requests use."""
+    # Rounding to 4 decimals would move this point into the neighbouring current weather cell
+    location = ("South Boston", 42.330337, -71.041242)
+    _add_users({"alice": ("Boston", 42.3601, -71.0589)})
+    FavoriteLocation.add_location("alice", *location)
+    mock_get = _mock_upstream(mocker)
+
+    summary = WeatherRefresher(app).run_once()
+    mock_get.reset_mock()
+    weather_model.fetch_current_weather("alice", location)
+
+    assert summary["locations"] == 2
+    assert summary["users"] == 1
+    mock_get.assert_not_called()
+
+
+def test_run_once_respects_budget(app, mocker):
+    """Test that the most popular locations are refreshed within the budget."""
+    _add_users({
+        "alice": ("Paris", 48.8566, 2.3522),
+        "bob": ("Boston", 42.3601, -71.0589),
+        "carol": ("Boston", 42.3601, -71.0589),
+    })
+    mock_get = _mock_upstream(mocker)
+
+    summary = WeatherRefresher(app, budget=2).run_once()
+
+    assert summary["calls"] == 2
+    assert summary["skipped"] == 2
+    # Only Boston, called at the center of its cache cell
+    assert all(abs(call.kwargs["params"]["lat"] - 42.36) < 0.05 for call in mock_get.call_args_list)
+
+
+def test_run_once_counts_errors(app, mocker):
+    """Test that a failing upstream call is counted without stopping the run."""
+    _add_users({"alice": ("Boston", 42.3601, -71.0589), "bob": ("Paris", 48.8566, 2.3522)})
+    mock_get = _mock_upstream(mocker)
+    mock_get.return_value.raise_for_status.side_effect = weather_model.requests.HTTPError("503")
+
+    refresher = WeatherRefresher(app)
+    summary = refresher.run_once()
+
+    assert summary["errors"] == 4
+    assert refresher.stats()["runs"] == 1
+
+
+def test_start_and_stop(app, mocker):
+    """Test that the background thread runs and stops cleanly."""
+    _mock_upstream(mocker)
+    refresher = WeatherRefresher(app, interval=60)
+    refresher.start()
+    deadline = time.monotonic() + 5
+    while refresher.stats()["runs"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    refresher.stop(timeout=5)
+    stats = refresher.stats()
+    assert not stats["running"]
+    assert stats["runs"] == 1